@@ -1,7 +1,11 @@
 __version__ = "0.1.0"
 from mlops_monitoring.signature import new_signature, get_summary
 from mlops_monitoring.client import (
+    AsyncMonitoringClient,
+    MonitoringClient,
     save_and_compare_signature,
     update_project_standard,
     save_errors_report,
 )
+from mlops_monitoring.spool import SignatureSpool
+from mlops_monitoring.reports import ParquetReportSink, most_failed_columns
@@ -0,0 +1,219 @@
+import asyncio
+import collections
+import json
+from typing import Collection, Deque, Dict, List, Optional, Tuple
+from starlette.routing import Match, Router
+from mlops_monitoring.telemetry import Counter
+
+# key of the limit shared by all heavy routes in AdmissionController.all_limits()
+HEAVY_TOTAL = "all_heavy"
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class AdmissionLimit:
+    """Limit of requests processed at once, with a bounded FIFO queue of waiting requests.
+
+    Must be used from a single event loop, like the rest of the server state.
+    """
+
+    def __init__(self, max_in_flight: int, max_queued: int, queue_timeout: float):
+        """
+        Args:
+            max_in_flight: Maximal number of requests processed at once.
+            max_queued: Maximal number of requests waiting for a free slot.
+            queue_timeout: Maximal time in seconds a request waits for a free slot.
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self.in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = collections.deque()
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> None:
+        """Wait for a free slot.
+
+        Raises:
+            AdmissionRejected: With status 429 if the queue is full, or 503 if no slot was
+                freed within queue_timeout.
+        """
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            return
+        if len(self._waiters) >= self.max_queued:
+            raise AdmissionRejected(429, "Too many requests are waiting")
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout)
+        except asyncio.TimeoutError:
+            self._remove(waiter)
+            raise AdmissionRejected(503, "Server is overloaded, no free slot")
+        except BaseException:
+            # the request was cancelled, possibly right after the slot was handed over to it
+            if waiter.done() and not waiter.cancelled():
+                self.release()
+            else:
+                self._remove(waiter)
+            raise
+
+    def release(self) -> None:
+        # the slot is handed over to the first waiting request, so in_flight stays the same
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _remove(self, waiter: "asyncio.Future[None]") -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+
+class AdmissionController:
+    """Assigns an AdmissionLimit to every route of the application.
+
+    Every route has its own limit, so a flood of one kind of requests doesn't delay the others.
+    Routes in heavy_paths get the smaller heavy limits, the rest get the light limits.
+    Heavy routes also share the heavy_total limit, so light requests keep their share of
+    the server when many heavy routes are busy at once.
+    """
+
+    def __init__(
+        self,
+        router: Router,
+        heavy_paths: Collection[str],
+        heavy: Tuple[int, int] = (16, 32),
+        light: Tuple[int, int] = (64, 256),
+        heavy_total: Optional[Tuple[int, int]] = None,
+        queue_timeout: float = 5.0,
+        retry_after: int = 5,
+    ):
+        """
+        Args:
+            router: Router of the application, used to find the route of a request.
+            heavy_paths: Route paths of expensive requests, e.g. "/profile_and_compare/{project_name}".
+            heavy: Maximal in-flight and queued requests of every heavy route.
+            light: Maximal in-flight and queued requests of every other route.
+            heavy_total: Maximal in-flight and queued requests of all heavy routes together,
+                not limited by default.
+            queue_timeout: See AdmissionLimit.
+            retry_after: Value of the Retry-After header of rejected requests, in seconds.
+        """
+        self.router = router
+        self.heavy_paths = set(heavy_paths)
+        self.heavy = heavy
+        self.light = light
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self.limits: Dict[str, AdmissionLimit] = {}
+        self.heavy_total_limit = (
+            AdmissionLimit(*heavy_total, queue_timeout) if heavy_total else None
+        )
+
+    def limit_for(self, scope) -> Tuple[Optional[str], Optional[AdmissionLimit]]:
+        """Return path of the route matching the request and its limit.
+
+        Requests not matching any route are not limited, the router rejects them anyway.
+        """
+        for route in self.router.routes:
+            match, _ = route.matches(scope)
+            if match == Match.FULL:
+                path = getattr(route, "path", None)
+                break
+        else:
+            return None, None
+        if path not in self.limits:
+            max_in_flight, max_queued = (
+                self.heavy if path in self.heavy_paths else self.light
+            )
+            self.limits[path] = AdmissionLimit(
+                max_in_flight, max_queued, self.queue_timeout
+            )
+        return path, self.limits[path]
+
+    def all_limits(self) -> Dict[str, AdmissionLimit]:
+        """Limits by route path, the limit shared by heavy routes is under HEAVY_TOTAL."""
+        limits = dict(self.limits)
+        if self.heavy_total_limit is not None:
+            limits[HEAVY_TOTAL] = self.heavy_total_limit
+        return limits
+
+    def limits_for(self, scope) -> Tuple[Optional[str], List[AdmissionLimit]]:
+        """Return path of the route matching the request and all limits it must acquire in order."""
+        path, limit = self.limit_for(scope)
+        if limit is None:
+            return path, []
+        if path in self.heavy_paths and self.heavy_total_limit is not None:
+            return path, [limit, self.heavy_total_limit]
+        return path, [limit]
+
+
+class AdmissionControlMiddleware:
+    """ASGI middleware answering 429 or 503 with Retry-After instead of processing excess requests."""
+
+    def __init__(
+        self,
+        app,
+        controller: AdmissionController,
+        rejected: Optional[Counter] = None,
+    ):
+        """
+        Args:
+            app: The wrapped ASGI application.
+            controller: Controller with limits of the routes.
+            rejected: Counter of rejected requests with labels "endpoint" and "status".
+        """
+        self.app = app
+        self.controller = controller
+        self.rejected = rejected
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path, limits = self.controller.limits_for(scope)
+        acquired: List[AdmissionLimit] = []
+        try:
+            try:
+                for limit in limits:
+                    await limit.acquire()
+                    acquired.append(limit)
+            except AdmissionRejected as e:
+                if self.rejected is not None:
+                    self.rejected.inc(endpoint=path, status=str(e.status_code))
+                await _send_rejection(send, e, self.controller.retry_after)
+                return
+            await self.app(scope, receive, send)
+        finally:
+            for limit in reversed(acquired):
+                limit.release()
+
+
+async def _send_rejection(send, rejection: AdmissionRejected, retry_after: int) -> None:
+    body = json.dumps({"detail": rejection.detail}).encode()
+    await send(
+        {
+            "type": "http.response.start",
+            "status": rejection.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(retry_after).encode()),
+            ],
+        }
+    )
+    await send({"type": "http.response.body", "body": body})
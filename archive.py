@@ -0,0 +1,451 @@
+import bisect
+import datetime
+import mmap
+import os
+import struct
+from typing import Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+from whylogs.proto import DatasetProfileMessage
+from mlops_monitoring.signature import (
+    Signature,
+    profile_from_message,
+    profile_to_message,
+)
+from mlops_monitoring.data import Reader, SQLWriter, Writer
+
+# Archive file starts with magic bytes and format version, followed by records of
+# RECORD_HEADER (profile length, upload date in ms since epoch, project name length),
+# the project name in utf-8 and the serialized DatasetProfileMessage.
+MAGIC = b"MLSA"
+FORMAT_VERSION = 1
+FILE_HEADER = MAGIC + bytes([FORMAT_VERSION])
+RECORD_HEADER = struct.Struct("<IqH")
+
+# Index file has the same layout with INDEX_HEADER (offset of the record) before each record
+# header, so it can always be rebuilt by scanning the archive.
+INDEX_MAGIC = b"MLSI"
+INDEX_FILE_HEADER = INDEX_MAGIC + bytes([FORMAT_VERSION])
+INDEX_HEADER = struct.Struct("<Q")
+
+_EPOCH = datetime.datetime(1970, 1, 1)
+
+
+class ArchiveRecord(NamedTuple):
+    offset: int
+    length: int
+    upload_date: datetime.datetime
+    project_name: str
+
+    @property
+    def data_offset(self) -> int:
+        """Offset of the serialized profile in the archive."""
+        return self.offset + RECORD_HEADER.size + len(self.project_name.encode("utf-8"))
+
+    @property
+    def end(self) -> int:
+        """Offset right after the record."""
+        return self.data_offset + self.length
+
+
+def _to_ms(date: datetime.datetime) -> int:
+    return (date - _EPOCH) // datetime.timedelta(milliseconds=1)
+
+
+def _from_ms(timestamp: int) -> datetime.datetime:
+    return _EPOCH + datetime.timedelta(milliseconds=timestamp)
+
+
+def encode_record(
+    project_name: str, upload_date: datetime.datetime, profile_bytes: bytes
+) -> bytes:
+    """Encode serialized profile as a length-prefixed archive record.
+
+    Args:
+        project_name: A project name of the signature.
+        upload_date: Upload date of the signature.
+        profile_bytes: Serialized DatasetProfileMessage.
+
+    Returns:
+        Record header followed by the project name and the profile.
+    """
+    name = project_name.encode("utf-8")
+    header = RECORD_HEADER.pack(len(profile_bytes), _to_ms(upload_date), len(name))
+    return header + name + bytes(profile_bytes)
+
+
+def iter_records(buffer, offset: int = 0) -> Iterator[ArchiveRecord]:
+    """Iterate over complete records in the buffer, a truncated last record is ignored.
+
+    Args:
+        buffer: Bytes-like object with consecutive records.
+        offset: Offset of the first record in the buffer.
+
+    Yields:
+        Records in the order they are stored.
+    """
+    while offset + RECORD_HEADER.size <= len(buffer):
+        length, timestamp, name_length = RECORD_HEADER.unpack_from(buffer, offset)
+        name_start = offset + RECORD_HEADER.size
+        end = name_start + name_length + length
+        if end > len(buffer):
+            return
+        project_name = bytes(buffer[name_start : name_start + name_length]).decode(
+            "utf-8"
+        )
+        yield ArchiveRecord(offset, length, _from_ms(timestamp), project_name)
+        offset = end
+
+
+def _index_path(path: str) -> str:
+    return f"{path}.idx"
+
+
+def _read_index(path: str) -> List[ArchiveRecord]:
+    # Helper reading index entries, a missing or damaged index file gives an empty index
+    try:
+        with open(_index_path(path), "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return []
+    if not data.startswith(INDEX_FILE_HEADER):
+        return []
+
+    records = []
+    position = len(INDEX_FILE_HEADER)
+    entry_size = INDEX_HEADER.size + RECORD_HEADER.size
+    while position + entry_size <= len(data):
+        (offset,) = INDEX_HEADER.unpack_from(data, position)
+        length, timestamp, name_length = RECORD_HEADER.unpack_from(
+            data, position + INDEX_HEADER.size
+        )
+        name_start = position + entry_size
+        if name_start + name_length > len(data):
+            break
+        project_name = data[name_start : name_start + name_length].decode("utf-8")
+        records.append(ArchiveRecord(offset, length, _from_ms(timestamp), project_name))
+        position = name_start + name_length
+    return records
+
+
+def _encode_index_entry(record: ArchiveRecord) -> bytes:
+    name = record.project_name.encode("utf-8")
+    return (
+        INDEX_HEADER.pack(record.offset)
+        + RECORD_HEADER.pack(record.length, _to_ms(record.upload_date), len(name))
+        + name
+    )
+
+
+class SignatureArchiveWriter:
+    """Appends signatures to an archive file and its index.
+
+    Opening an existing archive continues it. If the previous writer was interrupted,
+    a truncated last record is removed and missing index entries are restored.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path to the archive file, the index is stored next to it with .idx suffix.
+        """
+        self.path = path
+        self._file = open(path, "a+b")
+        self._file.seek(0)
+        header = self._file.read(len(FILE_HEADER))
+        if not header:
+            self._file.write(FILE_HEADER)
+        elif header != FILE_HEADER:
+            self._file.close()
+            raise ValueError(f"{path} is not a signature archive")
+        self._recover()
+        self._index = open(_index_path(path), "ab")
+
+    def _recover(self) -> None:
+        # Helper for dropping a truncated record and writing missing index entries
+        self._file.flush()
+        size = os.path.getsize(self.path)
+        indexed = _read_index(self.path)
+        records = [record for record in indexed if record.end <= size]
+        end = records[-1].end if records else len(FILE_HEADER)
+        with mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            missing = list(iter_records(buffer, end))
+        if missing:
+            end = missing[-1].end
+        if end < size:
+            self._file.truncate(end)
+        if missing or len(records) < len(indexed) or not indexed:
+            with open(_index_path(self.path), "wb") as index:
+                index.write(INDEX_FILE_HEADER)
+                for record in records + missing:
+                    index.write(_encode_index_entry(record))
+
+    def append(
+        self, signature: Signature, upload_date: Optional[datetime.datetime] = None
+    ) -> ArchiveRecord:
+        """Append signature to the archive.
+
+        Args:
+            signature: A signature to store.
+            upload_date: Upload date of the signature, current time by default.
+
+        Returns:
+            Index entry of the stored signature.
+        """
+        return self.append_message(
+            profile_to_message(signature.profile).SerializeToString(),
+            signature.project_name,
+            upload_date or datetime.datetime.now(),
+        )
+
+    def append_message(
+        self, profile_bytes: bytes, project_name: str, upload_date: datetime.datetime
+    ) -> ArchiveRecord:
+        """Append serialized profile to the archive without parsing it.
+
+        Args:
+            profile_bytes: Serialized DatasetProfileMessage.
+            project_name: A project name of the signature.
+            upload_date: Upload date of the signature.
+
+        Returns:
+            Index entry of the stored signature.
+        """
+        self._file.seek(0, os.SEEK_END)
+        record = ArchiveRecord(
+            self._file.tell(), len(profile_bytes), upload_date, project_name
+        )
+        self._file.write(encode_record(project_name, upload_date, profile_bytes))
+        self._index.write(_encode_index_entry(record))
+        return record
+
+    def flush(self) -> None:
+        # index is flushed after the archive, so it never points to unwritten records
+        self._file.flush()
+        self._index.flush()
+
+    def close(self) -> None:
+        self.flush()
+        self._file.close()
+        self._index.close()
+
+    def __enter__(self) -> "SignatureArchiveWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class SignatureArchive:
+    """Read-only memory-mapped signature archive.
+
+    Profiles are sliced out of the mapping without copying, so iterating over the archive
+    costs only parsing of the profiles that are actually used. Records are also available
+    by position, and the index allows selecting records by project and upload date
+    without touching the archive data.
+    """
+
+    def __init__(self, path: str):
+        """
+        Args:
+            path: Path to the archive file written by SignatureArchiveWriter.
+
+        Raises:
+            ValueError: The file is not a signature archive.
+        """
+        self.path = path
+        # an empty file, e.g. created by a writer that was interrupted right away, has no
+        # records, and mmap can't map it
+        self._buffer: Optional[mmap.mmap] = None
+        with open(path, "rb") as file:
+            if os.fstat(file.fileno()).st_size:
+                self._buffer = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(
+            self._buffer if self._buffer is not None else FILE_HEADER
+        )
+        if bytes(self._view[: len(FILE_HEADER)]) != FILE_HEADER:
+            self.close()
+            raise ValueError(f"{path} is not a signature archive")
+
+        records = [
+            record for record in _read_index(path) if record.end <= len(self._view)
+        ]
+        end = records[-1].end if records else len(FILE_HEADER)
+        # records that are not indexed yet, e.g. the writer is still running
+        records.extend(iter_records(self._view, end))
+        self._records = records
+
+        self._projects: Dict[str, Tuple[List[datetime.datetime], List[int]]] = {}
+        for position in sorted(
+            range(len(records)), key=lambda i: records[i].upload_date
+        ):
+            dates, positions = self._projects.setdefault(
+                records[position].project_name, ([], [])
+            )
+            dates.append(records[position].upload_date)
+            positions.append(position)
+
+    @property
+    def project_names(self) -> List[str]:
+        return sorted(self._projects)
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __getitem__(self, position: int) -> Signature:
+        return self.read_signature(self._records[position])
+
+    def __iter__(self) -> Iterator[Signature]:
+        for record in self._records:
+            yield self.read_signature(record)
+
+    def records(
+        self,
+        project_name: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> List[ArchiveRecord]:
+        """Select records from the index.
+
+        Args:
+            project_name: A project name of the records, all projects by default.
+            start: Start of the upload date range, inclusive.
+            end: End of the upload date range, exclusive.
+
+        Returns:
+            Records of a project ordered by upload date, or records of all projects
+            in the archive order.
+        """
+        if project_name is None:
+            return [
+                record
+                for record in self._records
+                if (start is None or record.upload_date >= start)
+                and (end is None or record.upload_date < end)
+            ]
+
+        dates, positions = self._projects.get(project_name, ([], []))
+        first = bisect.bisect_left(dates, start) if start is not None else 0
+        last = bisect.bisect_left(dates, end) if end is not None else len(dates)
+        return [self._records[position] for position in positions[first:last]]
+
+    def read_bytes(self, record: ArchiveRecord) -> memoryview:
+        """Return serialized profile of the record as a slice of the mapped file."""
+        return self._view[record.data_offset : record.end]
+
+    def read_signature(self, record: ArchiveRecord) -> Signature:
+        message = DatasetProfileMessage()
+        message.ParseFromString(self.read_bytes(record))
+        return Signature(profile_from_message(message), record.project_name)
+
+    def iter_signatures(
+        self,
+        project_name: Optional[str] = None,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+    ) -> Iterator[Tuple[ArchiveRecord, Signature]]:
+        """Iterate over signatures selected as in records()."""
+        for record in self.records(project_name, start, end):
+            yield record, self.read_signature(record)
+
+    def close(self) -> None:
+        self._view.release()
+        if self._buffer is not None:
+            self._buffer.close()
+
+    def __enter__(self) -> "SignatureArchive":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def export_signatures(
+    reader: Reader,
+    path: str,
+    project_names: Iterable[str],
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    granularity: Optional[str] = "raw",
+) -> int:
+    """Append signatures history of the projects to an archive.
+
+    Records keep only the project name and upload date, so import_signatures() writes every
+    record back as a raw signature and standards as ordinary signatures. Export raw signatures,
+    the default, to restore history; roll-ups exported with another granularity, or with None
+    for the coarsest available ones, are meant for analysis and must not be imported.
+
+    Args:
+        reader: A reader of the signatures table.
+        path: Path to the archive file, an existing archive is continued.
+        project_names: Project names of the signatures to export.
+        start: Start of the upload date range, inclusive.
+        end: End of the upload date range, exclusive.
+        granularity: Granularity of the signatures, see Reader.read_signatures_history().
+            Only raw signatures by default.
+
+    Returns:
+        Number of exported signatures.
+    """
+    exported = 0
+    with SignatureArchiveWriter(path) as archive:
+        for project_name in project_names:
+            for record in reader.read_signatures_history(
+                project_name, start, end, granularity=granularity
+            ):
+                archive.append(record.signature, record.upload_date)
+                exported += 1
+    return exported
+
+
+def import_signatures(
+    path: str,
+    writer: Writer,
+    project_name: Optional[str] = None,
+    start: Optional[datetime.datetime] = None,
+    end: Optional[datetime.datetime] = None,
+    batch_size: int = 100,
+    keep_upload_dates: bool = True,
+) -> int:
+    """Write signatures from an archive to the database.
+
+    Signatures are written in batches through Writer.write_signatures(), the database assigns
+    them new ids. Signatures identical to already stored ones are skipped by the writer.
+
+    Args:
+        path: Path to the archive file.
+        writer: A writer of the signatures table.
+        project_name: A project name of the signatures to import, all projects by default.
+        start: Start of the upload date range, inclusive.
+        end: End of the upload date range, exclusive.
+        batch_size: Number of signatures written in one transaction.
+        keep_upload_dates: Write signatures with their archived upload dates instead of the
+            current time, requires an SQLWriter.
+
+    Returns:
+        Number of signatures written to the database.
+
+    Raises:
+        TypeError: keep_upload_dates is set and the writer can't write upload dates.
+    """
+    if keep_upload_dates and not isinstance(writer, SQLWriter):
+        raise TypeError(
+            f"{type(writer).__name__} can't write signatures with upload dates"
+        )
+
+    def write(batch: List[Signature], upload_dates: List[datetime.datetime]) -> int:
+        if keep_upload_dates and isinstance(writer, SQLWriter):
+            return writer.write_signatures(batch, upload_dates)
+        return writer.write_signatures(batch)
+
+    imported = 0
+    batch: List[Signature] = []
+    upload_dates: List[datetime.datetime] = []
+    with SignatureArchive(path) as archive:
+        for record, signature in archive.iter_signatures(project_name, start, end):
+            batch.append(signature)
+            upload_dates.append(record.upload_date)
+            if len(batch) == batch_size:
+                imported += write(batch, upload_dates)
+                batch, upload_dates = [], []
+        if batch:
+            imported += write(batch, upload_dates)
+    return imported
@@ -0,0 +1,68 @@
+"""Synthetic dataframes shared by the benchmarks."""
+
+from typing import NamedTuple
+import numpy as np
+import pandas as pd
+
+CATEGORIES = np.array([f"category_{i}" for i in range(20)], dtype=object)
+
+
+class FrameSpec(NamedTuple):
+    rows: int
+    columns: int
+    categorical_share: float = 0.0
+    null_rate: float = 0.0
+
+    @property
+    def name(self) -> str:
+        return (
+            f"{self.rows}x{self.columns}"
+            f"-cat{self.categorical_share:g}-null{self.null_rate:g}"
+        )
+
+
+def make_frame(
+    rows: int,
+    columns: int,
+    categorical_share: float = 0.0,
+    null_rate: float = 0.0,
+    seed: int = 42,
+) -> pd.DataFrame:
+    """Build a frame with float, integer and categorical columns.
+
+    Numeric columns alternate between normal floats and Poisson integers, categorical
+    columns hold strings with a skewed distribution over CATEGORIES.
+
+    Args:
+        rows: Number of rows.
+        columns: Number of columns.
+        categorical_share: Share of categorical columns.
+        null_rate: Share of missing values in every column.
+        seed: Seed of the random generator, equal seeds give equal frames.
+
+    Returns:
+        A dataframe with columns col_0, col_1, ...
+    """
+    rng = np.random.default_rng(seed)
+    categorical_columns = round(columns * categorical_share)
+    data = {}
+    for i in range(columns):
+        if i >= columns - categorical_columns:
+            weights = rng.dirichlet(np.ones(len(CATEGORIES)))
+            values = rng.choice(CATEGORIES, size=rows, p=weights)
+        elif i % 2 == 0:
+            values = rng.normal(loc=i, size=rows)
+        else:
+            values = rng.poisson(lam=i % 10 + 1, size=rows)
+        if null_rate > 0:
+            missing = None if values.dtype == object else np.nan
+            values = values.astype(object if values.dtype == object else float)
+            values[rng.random(rows) < null_rate] = missing
+        data[f"col_{i}"] = values
+    return pd.DataFrame(data)
+
+
+def make_spec_frame(spec: FrameSpec, seed: int = 42) -> pd.DataFrame:
+    return make_frame(
+        spec.rows, spec.columns, spec.categorical_share, spec.null_rate, seed=seed
+    )
@@ -0,0 +1,58 @@
+"""Storage size and read latency of signature blobs for every available codec.
+
+Usage:
+    python -m mlops_monitoring.benchmarks.storage_compression --rows 10000 --columns 200
+"""
+
+import argparse
+import time
+import pandas as pd
+from whylogs.core.datasetprofile import DatasetProfile
+from mlops_monitoring.signature import new_signature
+from mlops_monitoring.compression import (
+    available_codecs,
+    compress_blob,
+    decompress_blob,
+)
+from mlops_monitoring.benchmarks.frames import make_frame
+
+
+def measure_codec(proto_signature: bytes, codec: str, repeats: int) -> dict:
+    start = time.perf_counter()
+    blob = compress_blob(proto_signature, codec)
+    write_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for _ in range(repeats):
+        DatasetProfile.from_protobuf_string(decompress_blob(blob))
+    read_seconds = (time.perf_counter() - start) / repeats
+
+    return {
+        "codec": codec,
+        "size_bytes": len(blob),
+        "ratio": round(len(proto_signature) / len(blob), 2),
+        "compress_ms": round(write_seconds * 1000, 2),
+        "read_ms": round(read_seconds * 1000, 2),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--rows", type=int, default=10000)
+    parser.add_argument("--columns", type=int, default=100)
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+
+    signature = new_signature(make_frame(args.rows, args.columns), "benchmark")
+    proto_signature = signature.profile.to_protobuf().SerializeToString()
+    results = pd.DataFrame(
+        [
+            measure_codec(proto_signature, codec, args.repeats)
+            for codec in available_codecs()
+        ]
+    )
+    print(results.to_string(index=False))
+
+
+if __name__ == "__main__":
+    main()
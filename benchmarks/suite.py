@@ -0,0 +1,443 @@
+"""End-to-end benchmarks of profiling, compare, serialization and the server.
+
+Results are saved as JSON, a saved run can be passed as --baseline to find regressions.
+
+Usage:
+    python -m mlops_monitoring.benchmarks.suite --output results.json
+    python -m mlops_monitoring.benchmarks.suite --quick --baseline results.json
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import os
+import platform
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Iterator, List, Sequence
+import requests
+from whylogs.proto import DatasetProfileMessage
+from mlops_monitoring.benchmarks.frames import FrameSpec, make_spec_frame
+from mlops_monitoring.benchmarks.storage_compression import measure_codec
+from mlops_monitoring.client import MonitoringClient
+from mlops_monitoring.compare import compare_signatures
+from mlops_monitoring.compression import available_codecs
+from mlops_monitoring.signature import (
+    Signature,
+    json_to_signature,
+    profile_dataframe_parallel,
+    profile_from_message,
+    profile_to_message,
+    signature_to_dict,
+)
+
+SECTIONS = ("profiling", "compare", "serialization", "server")
+
+PROFILING_SPECS = [
+    FrameSpec(100000, 20),
+    FrameSpec(10000, 200),
+    FrameSpec(10000, 200, categorical_share=0.5),
+    FrameSpec(10000, 200, null_rate=0.3),
+]
+COMPARE_COLUMNS = [10, 50, 200, 1000]
+SERIALIZATION_SPECS = [FrameSpec(10000, 200), FrameSpec(10000, 1000, 0.2, 0.1)]
+SERVER_SPECS = [FrameSpec(1000, 20), FrameSpec(1000, 500, 0.2, 0.1)]
+
+QUICK_PROFILING_SPECS = [FrameSpec(5000, 10), FrameSpec(1000, 50, 0.5, 0.3)]
+QUICK_COMPARE_COLUMNS = [10, 50]
+QUICK_SERIALIZATION_SPECS = [FrameSpec(1000, 50, 0.2, 0.1)]
+QUICK_SERVER_SPECS = [FrameSpec(1000, 20)]
+
+
+def _result(benchmark: str, params: Dict[str, Any], **metrics: float) -> Dict[str, Any]:
+    return {"benchmark": benchmark, "params": params, "metrics": metrics}
+
+
+def _median_ms(func: Callable[[], Any], repeats: int) -> float:
+    durations = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        func()
+        durations.append(time.perf_counter() - start)
+    return round(statistics.median(durations) * 1000, 3)
+
+
+def _profile(frame, cores: int, project_name: str = "benchmark") -> Signature:
+    profile = profile_dataframe_parallel(
+        frame, project_name, datetime.datetime.now(), cores
+    )
+    return Signature(profile, project_name)
+
+
+def _as_parsed(signature: Signature) -> Signature:
+    # signatures are compared on the server after being parsed from protobuf
+    message = DatasetProfileMessage.FromString(
+        profile_to_message(signature.profile).SerializeToString()
+    )
+    return Signature(profile_from_message(message), signature.project_name)
+
+
+def bench_profiling(
+    specs: Sequence[FrameSpec], cores: Sequence[int]
+) -> Iterator[Dict[str, Any]]:
+    """Throughput of profiling, the parallel part of new_signature(), by frame shape and cores."""
+    for spec in specs:
+        frame = make_spec_frame(spec)
+        for core_count in cores:
+            start = time.perf_counter()
+            _profile(frame, core_count)
+            seconds = time.perf_counter() - start
+            yield _result(
+                "profiling",
+                {"frame": spec.name, "cores": core_count},
+                seconds=round(seconds, 3),
+                cells_per_second=round(spec.rows * spec.columns / seconds),
+            )
+
+
+def bench_compare(
+    column_counts: Sequence[int], rows: int, cores: int, repeats: int
+) -> Iterator[Dict[str, Any]]:
+    """Latency of compare_signatures() by number of columns, on mixed frames with nulls."""
+    for columns in column_counts:
+        spec = FrameSpec(rows, columns, categorical_share=0.2, null_rate=0.1)
+        standard = _as_parsed(_profile(make_spec_frame(spec, seed=1), cores))
+        signature = _as_parsed(_profile(make_spec_frame(spec, seed=2), cores))
+        # the first compare decodes the lazily parsed columns
+        start = time.perf_counter()
+        compare_signatures(signature, standard)
+        first_ms = round((time.perf_counter() - start) * 1000, 3)
+        yield _result(
+            "compare",
+            {"columns": columns, "rows": rows},
+            first_ms=first_ms,
+            median_ms=_median_ms(
+                lambda: compare_signatures(signature, standard), repeats
+            ),
+        )
+
+
+def bench_serialization(
+    specs: Sequence[FrameSpec], cores: int, repeats: int
+) -> Iterator[Dict[str, Any]]:
+    """Sizes and times of the protobuf and JSON encodings, and of stored blobs of every codec."""
+    for spec in specs:
+        signature = _profile(make_spec_frame(spec), cores)
+        proto = profile_to_message(signature.profile).SerializeToString()
+        as_json = json.dumps(signature_to_dict(signature))
+        yield _result(
+            "serialization",
+            {"frame": spec.name, "format": "protobuf"},
+            size_bytes=len(proto),
+            serialize_ms=_median_ms(
+                lambda: profile_to_message(signature.profile).SerializeToString(),
+                repeats,
+            ),
+            parse_ms=_median_ms(
+                lambda: profile_from_message(DatasetProfileMessage.FromString(proto)),
+                repeats,
+            ),
+        )
+        yield _result(
+            "serialization",
+            {"frame": spec.name, "format": "json"},
+            size_bytes=len(as_json),
+            serialize_ms=_median_ms(
+                lambda: json.dumps(signature_to_dict(signature)), repeats
+            ),
+            parse_ms=_median_ms(lambda: json_to_signature(as_json), repeats),
+        )
+        for codec in available_codecs():
+            measured = measure_codec(proto, codec, repeats)
+            yield _result(
+                "storage",
+                {"frame": spec.name, "codec": measured.pop("codec")},
+                **measured,
+            )
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_server(database: str, port: int, write_behind: bool) -> subprocess.Popen:
+    # the server reads its configuration at import, so it runs in its own process
+    env = dict(
+        os.environ,
+        SQL_SERVER=database,
+        SIGNATURES_TABLE="signatures",
+        SIGNATURES_STORAGE="sqlite",
+        WRITE_BEHIND="1" if write_behind else "0",
+        WRITE_BEHIND_SPILL_PATH=f"{database}.spill",
+    )
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "mlops_monitoring.server:app",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+        ],
+        env=env,
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError("Monitoring server failed to start")
+        try:
+            requests.get(f"http://127.0.0.1:{port}/metrics", timeout=1)
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError("Monitoring server didn't start within 60 seconds")
+
+
+def _signature_sender(
+    client: MonitoringClient,
+    signature: Signature,
+    transport: str,
+    cached: bool,
+    requests_count: int,
+) -> Callable[[], Any]:
+    # Helper sending the signature, uncached requests send copies with a tag distinct across
+    # requests, transports and frames, so the content hash differs and the server can't reuse
+    # a signature and report stored by an earlier request; the frame is in the project name
+    if cached:
+        signatures = itertools.repeat(signature)
+    else:
+        message = profile_to_message(signature.profile)
+        copies = []
+        for request in range(requests_count):
+            message.properties.tags["benchmark_request"] = (
+                f"{signature.project_name}/{transport}/{request}"
+            )
+            copy = DatasetProfileMessage.FromString(message.SerializeToString())
+            copies.append(Signature(profile_from_message(copy), signature.project_name))
+        signatures = iter(copies)
+    return lambda: client.save_and_compare_signature(
+        next(signatures), transport=transport
+    )
+
+
+def _latency_metrics(func: Callable[[], Any], requests_count: int) -> Dict[str, float]:
+    durations = []
+    for _ in range(requests_count):
+        start = time.perf_counter()
+        func()
+        durations.append((time.perf_counter() - start) * 1000)
+    durations.sort()
+    return {
+        "p50_ms": round(durations[len(durations) // 2], 3),
+        "p95_ms": round(
+            durations[min(len(durations) - 1, int(len(durations) * 0.95))], 3
+        ),
+        "mean_ms": round(statistics.mean(durations), 3),
+    }
+
+
+def bench_server(
+    specs: Sequence[FrameSpec],
+    cores: int,
+    requests_count: int,
+    write_behind: bool = False,
+) -> Iterator[Dict[str, Any]]:
+    """Request latency of a local server storing signatures in SQLite, measured by the client.
+
+    The server's WRITE_BEHIND setting is pinned by write_behind, with it signatures are written
+    after the response is sent.
+    """
+    with tempfile.TemporaryDirectory() as directory:
+        port = _free_port()
+        server = _start_server(
+            os.path.join(directory, "signatures.db"), port, write_behind
+        )
+        try:
+            client = MonitoringClient(f"http://127.0.0.1:{port}", cache_dir=None)
+            for spec in specs:
+                project_name = f"benchmark-{spec.name}"
+                standard = _profile(make_spec_frame(spec, seed=1), cores, project_name)
+                signature = _profile(make_spec_frame(spec, seed=2), cores, project_name)
+                client.update_project_standard(standard)
+                for transport in ("protobuf", "json"):
+                    for cached in (False, True):
+                        yield _result(
+                            "server",
+                            {
+                                "frame": spec.name,
+                                "endpoint": "save_and_compare_signature",
+                                "transport": transport,
+                                "cached": cached,
+                            },
+                            **_latency_metrics(
+                                _signature_sender(
+                                    client, signature, transport, cached, requests_count
+                                ),
+                                requests_count,
+                            ),
+                        )
+                yield _result(
+                    "server",
+                    {
+                        "frame": spec.name,
+                        "endpoint": "get_project_standard",
+                        "transport": "protobuf",
+                    },
+                    **_latency_metrics(
+                        lambda: client.get_project_standard(project_name),
+                        requests_count,
+                    ),
+                )
+            client.close()
+        finally:
+            server.terminate()
+            server.wait()
+
+
+def _result_key(result: Dict[str, Any]) -> str:
+    return result["benchmark"] + json.dumps(result["params"], sort_keys=True)
+
+
+def _higher_is_better(metric: str) -> bool:
+    return metric.endswith("per_second") or metric == "ratio"
+
+
+def compare_with_baseline(
+    results: List[Dict[str, Any]], baseline: List[Dict[str, Any]], tolerance: float
+) -> List[Dict[str, Any]]:
+    """Find metrics that got worse than in the baseline by more than tolerance.
+
+    Args:
+        results: Results of the current run.
+        baseline: Results of a stored run, benchmarks missing in either run are skipped.
+        tolerance: Allowed relative change, e.g. 0.2 for 20%.
+
+    Returns:
+        Regressions with benchmark, params, metric, baseline and current values and the relative change.
+    """
+    baseline_by_key = {_result_key(result): result for result in baseline}
+    regressions = []
+    for result in results:
+        previous = baseline_by_key.get(_result_key(result))
+        if previous is None:
+            continue
+        for metric, value in result["metrics"].items():
+            old_value = previous["metrics"].get(metric)
+            if not old_value:
+                continue
+            change = (value - old_value) / old_value
+            worse = -change if _higher_is_better(metric) else change
+            if worse > tolerance:
+                regressions.append(
+                    {
+                        "benchmark": result["benchmark"],
+                        "params": result["params"],
+                        "metric": metric,
+                        "baseline": old_value,
+                        "current": value,
+                        "change": round(change, 3),
+                    }
+                )
+    return regressions
+
+
+def _default_cores() -> List[int]:
+    cpu_count = os.cpu_count() or 1
+    return sorted(
+        {core_count for core_count in (1, 2, 4, cpu_count) if core_count <= cpu_count}
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--output", default="benchmark_results.json")
+    parser.add_argument("--baseline", help="Results of an earlier run to compare with.")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    parser.add_argument("--sections", default=",".join(SECTIONS))
+    parser.add_argument(
+        "--cores",
+        default=",".join(map(str, _default_cores())),
+        help="Core counts of the profiling benchmark, the last one is used elsewhere.",
+    )
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument(
+        "--quick", action="store_true", help="Small frames for a smoke run."
+    )
+    parser.add_argument(
+        "--write-behind",
+        action="store_true",
+        help="The server writes signatures after responding, see WRITE_BEHIND.",
+    )
+    args = parser.parse_args()
+
+    sections = args.sections.split(",")
+    cores = [int(core_count) for core_count in args.cores.split(",")]
+    benchmarks = {
+        "profiling": lambda: bench_profiling(
+            QUICK_PROFILING_SPECS if args.quick else PROFILING_SPECS, cores
+        ),
+        "compare": lambda: bench_compare(
+            QUICK_COMPARE_COLUMNS if args.quick else COMPARE_COLUMNS,
+            1000 if args.quick else 10000,
+            cores[-1],
+            args.repeats,
+        ),
+        "serialization": lambda: bench_serialization(
+            QUICK_SERIALIZATION_SPECS if args.quick else SERIALIZATION_SPECS,
+            cores[-1],
+            args.repeats,
+        ),
+        "server": lambda: bench_server(
+            QUICK_SERVER_SPECS if args.quick else SERVER_SPECS,
+            cores[-1],
+            args.requests,
+            write_behind=args.write_behind,
+        ),
+    }
+    results = []
+    for section in sections:
+        for result in benchmarks[section]():
+            print(json.dumps(result), flush=True)
+            results.append(result)
+
+    with open(args.output, "w") as file:
+        json.dump(
+            {
+                "meta": {
+                    "date": datetime.datetime.now().isoformat(timespec="seconds"),
+                    "python": platform.python_version(),
+                    "platform": platform.platform(),
+                    "cpu_count": os.cpu_count(),
+                    "quick": args.quick,
+                    "write_behind": args.write_behind,
+                },
+                "results": results,
+            },
+            file,
+            indent=2,
+        )
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)["results"]
+        regressions = compare_with_baseline(results, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"Regression: {json.dumps(regression)}")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
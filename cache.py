@@ -0,0 +1,188 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Optional, Sequence
+from mlops_monitoring.signature import signature_hash
+from mlops_monitoring.data import SQLReader, SignatureRecord
+
+
+class LRUCache:
+    """Thread-safe least recently used cache with optional time to live of the entries.
+
+    Counts hits and misses, so cache efficiency can be monitored.
+    """
+
+    def __init__(self, maxsize: int = 128, ttl: Optional[float] = None):
+        """
+        Args:
+            maxsize: Maximal number of entries, least recently used entries are evicted first.
+            ttl: Time in seconds after which entries expire, entries never expire by default.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or self._is_expired(entry[1]):
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key: Hashable, value: Any) -> None:
+        with self._lock:
+            self._entries[key] = (value, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            return default if entry is None else entry[0]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and not self._is_expired(entry[1])
+
+    def _is_expired(self, created: float) -> bool:
+        return self.ttl is not None and time.monotonic() - created > self.ttl
+
+
+class StandardCache:
+    """Cache of parsed project standards.
+
+    A cached standard is returned without touching the database for check_interval seconds.
+    After that its id is compared with the id of the current standard in the database,
+    which is a cheap indexed query, and the standard is reloaded only if it was replaced.
+    """
+
+    def __init__(
+        self, reader: SQLReader, maxsize: int = 128, check_interval: float = 60.0
+    ):
+        """
+        Args:
+            reader: A reader of the signatures table.
+            maxsize: Maximal number of cached standards.
+            check_interval: Time in seconds during which a cached standard is used without checking the database.
+        """
+        self.reader = reader
+        self.check_interval = check_interval
+        self.hits = 0
+        self.misses = 0
+        self._standards = LRUCache(maxsize)
+        self._lock = threading.Lock()
+
+    def get(self, project_name: str) -> SignatureRecord:
+        """
+        Return standard of the project, loading it from the database if it's not cached or outdated.
+
+        Returned records always have a content hash, it's calculated for legacy rows.
+
+        Args:
+            project_name: A project name of the standard.
+
+        Raises:
+            HTTPException: The project has no standard.
+        """
+        entry = self._standards.get(project_name)
+        if entry is not None:
+            record, checked = entry
+            now = time.monotonic()
+            if now - checked < self.check_interval:
+                self._count(hit=True)
+                return record
+            if (
+                self.reader.read_project_standard_id(project_name)
+                == record.signature_id
+            ):
+                self._standards.put(project_name, (record, now))
+                self._count(hit=True)
+                return record
+
+        self._count(hit=False)
+        record = self.reader.read_project_standard_record(project_name)
+        return self._put(project_name, record)
+
+    def get_many(self, project_names: Sequence[str]) -> Dict[str, SignatureRecord]:
+        """
+        Return standards of many projects, at most one query checks outdated standards
+        and one query loads the missing ones.
+
+        Args:
+            project_names: Project names of the standards.
+
+        Returns:
+            Standards by project name, projects without standard are omitted.
+        """
+        standards, outdated = {}, {}
+        now = time.monotonic()
+        for project_name in set(project_names):
+            entry = self._standards.get(project_name)
+            if entry is None:
+                continue
+            record, checked = entry
+            if now - checked < self.check_interval:
+                standards[project_name] = record
+            else:
+                outdated[project_name] = record
+
+        if outdated:
+            current_ids = self.reader.read_project_standard_ids(list(outdated))
+            for project_name, record in outdated.items():
+                if current_ids.get(project_name) == record.signature_id:
+                    self._standards.put(project_name, (record, now))
+                    standards[project_name] = record
+        self._count(hit=True, count=len(standards))
+
+        missing = [name for name in set(project_names) if name not in standards]
+        if missing:
+            self._count(hit=False, count=len(missing))
+            records = self.reader.read_project_standard_records(missing)
+            for project_name, record in records.items():
+                standards[project_name] = self._put(project_name, record)
+        return standards
+
+    def _put(self, project_name: str, record: SignatureRecord) -> SignatureRecord:
+        if record.content_hash is None:
+            # standards written before deduplication have no stored hash
+            record = record._replace(content_hash=signature_hash(record.signature))
+        self._standards.put(project_name, (record, time.monotonic()))
+        return record
+
+    def invalidate(self, project_name: str) -> None:
+        self._standards.pop(project_name)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def __len__(self) -> int:
+        return len(self._standards)
+
+    def _count(self, hit: bool, count: int = 1) -> None:
+        with self._lock:
+            if hit:
+                self.hits += count
+            else:
+                self.misses += count
@@ -1,75 +1,798 @@
 import requests
+import asyncio
 import json
-from typing import List
-from mlops_monitoring.signature import signature_to_dict, json_to_signature, Signature
-from mlops_monitoring.compare import ComparingReport
+import datetime
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from typing import (
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+from google.protobuf.message import DecodeError
+from whylogs.proto import DatasetProfileMessage
+from mlops_monitoring.signature import (
+    signature_to_dict,
+    json_to_signature,
+    Signature,
+    profile_from_message,
+    profile_to_message,
+)
+from mlops_monitoring.compare import ComparingReport, compare_signatures
+from mlops_monitoring.archive import encode_record, iter_records
+from mlops_monitoring.reports import ParquetReportSink
+from mlops_monitoring.transport import (
+    BATCH_MEDIA_TYPE,
+    DEFAULT_CONTENT_ENCODING,
+    PROTOBUF_MEDIA_TYPE,
+    available_encodings,
+    body_encoder,
+    decode_body,
+    encode_body,
+)
 
+try:
+    import httpx
+except ImportError:
+    httpx = None
 
-def save_and_compare_signature(
-    signature: Signature, server_address: str
-) -> ComparingReport:
-    """Send signature to the monitoring server to receive a comparing report for signature's standard.
+logger = logging.getLogger(__name__)
 
-    Args:
-        signature: A signature object generated from data that we want to store and compare. Should have correct project name.
-        server_address: An address of a monitoring server, including port.
+# standards downloaded by get_project_standard() are cached here
+STANDARDS_CACHE_DIR = os.environ.get(
+    "MLOPS_MONITORING_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "mlops_monitoring", "standards"),
+)
+# connect and read timeouts in seconds, compares of wide signatures may take minutes
+DEFAULT_TIMEOUT = (10.0, 300.0)
+# responses of admission control, the request was rejected before it was processed
+RETRY_STATUSES = (429, 503)
+# longest wait in seconds before a retry, even if the server asks for more in Retry-After
+MAX_RETRY_AFTER = 60.0
+# sync and job modes compare on the server, local mode compares in-process and only
+# uploads the signature in the background
+MODES = ("sync", "job", "local")
 
-    Returns:
-        A ComparingReport object that contains a short status message and a dictionary with failed tests per data column.
 
-    Raises:
-        ConnectionError: An error occured during connection to the server.
-        HTTPError: Code 400 means that server couldn't find standard for the given signature's project.
+class _CappedRetry(Retry):
+    # Retry of GET requests that waits at most MAX_RETRY_AFTER seconds
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        return None if retry_after is None else min(retry_after, MAX_RETRY_AFTER)
+
+
+def _retry_delay(retry_after: str, backoff: float) -> float:
+    # Helper returning seconds to wait before repeating a request rejected by the admission
+    # control, Retry-After in seconds is respected up to MAX_RETRY_AFTER
+    return (
+        min(float(retry_after), MAX_RETRY_AFTER) if retry_after.isdigit() else backoff
+    )
+
+
+class MonitoringClient:
+    """Client of one monitoring server, reusing keep-alive connections between calls.
+
+    Requests go through a pooled requests.Session. GET requests are retried with exponential
+    backoff after connection errors and 429/502/503/504 responses. Uploads are retried only
+    when they certainly weren't processed: after failed connects and 429/503 responses of the
+    admission control, respecting Retry-After. Clients are thread-safe and can be shared.
+    """
+
+    def __init__(
+        self,
+        server_address: str,
+        pool_size: int = 10,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        cache_dir: Optional[str] = STANDARDS_CACHE_DIR,
+        standard_ttl: float = 60.0,
+    ):
+        """
+        Args:
+            server_address: An address of a monitoring server, including port.
+            pool_size: Maximal number of connections kept open, should match the number of threads using the client.
+            timeout: Timeout in seconds of every request, or a tuple of connect and read timeouts.
+            retries: Maximal number of retries of a request.
+            backoff_factor: Retries wait backoff_factor * 2 ** (retry - 1) seconds.
+            cache_dir: Directory of cached standards, see get_project_standard(). None disables caching.
+            standard_ttl: Seconds a standard is used by local compares before it's revalidated with the server.
+        """
+        self.server_address = server_address.rstrip("/")
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.cache_dir = cache_dir
+        self.standard_ttl = standard_ttl
+        self.pool_size = pool_size
+        self._standards: Dict[str, Tuple[Signature, float]] = {}
+        self._uploader: Optional[ThreadPoolExecutor] = None
+        self._lock = threading.Lock()
+        retry = _CappedRetry(
+            total=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(429, 502, 503, 504),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def save_and_compare_signature(
+        self,
+        signature: Signature,
+        transport: str = "protobuf",
+        mode: str = "sync",
+        poll_interval: float = 20.0,
+    ) -> ComparingReport:
+        """Send signature to the monitoring server to receive a comparing report for signature's standard.
+
+        Args:
+            signature: A signature object generated from data that we want to store and compare. Should have correct project name.
+            transport: "protobuf" to send compressed binary profile or "json" for servers without binary endpoints.
+            mode: "sync" to receive the report in the response, "job" to let the server compare
+                in the background and poll for the report, which avoids proxy timeouts for wide signatures,
+                or "local" to compare with a locally cached standard and upload the signature in the
+                background, see flush(). Local reports are identical to the server ones.
+            poll_interval: In "job" mode, seconds the server may hold every poll until the report is ready.
+
+        Returns:
+            A ComparingReport object that contains a short status message and a dictionary with failed tests per data column.
+
+        Raises:
+            ConnectionError: An error occured during connection to the server.
+            HTTPError: Code 400 means that server couldn't find standard for the given signature's project.
+                In "job" mode it's also raised if the compare job failed.
+        """
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode}, expected one of {MODES}")
+        if mode == "local":
+            return self._compare_locally(signature, transport)
+        if mode == "sync":
+            response = self._send_signature(
+                signature, "/save_and_compare_signature/", transport
+            )
+            return ComparingReport(*response.json())
+
+        response = self._send_signature(
+            signature, "/jobs/save_and_compare_signature/", transport
+        )
+        return self._wait_for_report(response, poll_interval)
+
+    def save_and_compare_signatures(
+        self, signatures: Sequence[Signature]
+    ) -> Iterator[Tuple[int, ComparingReport]]:
+        """Send many signatures in one request and receive comparing reports as soon as they are ready.
+
+        Args:
+            signatures: Signatures to store and compare, may belong to different projects.
+
+        Yields:
+            Position of the signature in the given sequence and its ComparingReport, in the order
+            compares finish. Signatures of projects without standard get a report with an error message.
+
+        Raises:
+            ConnectionError: An error occured during connection to the server.
+            HTTPError: Code 400 means that the server couldn't parse the batch.
+        """
+        upload_date = datetime.datetime.now()
+        records = b"".join(
+            encode_record(
+                signature.project_name,
+                upload_date,
+                profile_to_message(signature.profile).SerializeToString(),
+            )
+            for signature in signatures
+        )
+        return self.save_and_compare_records(records)
+
+    def save_and_compare_records(
+        self, records: bytes
+    ) -> Iterator[Tuple[int, ComparingReport]]:
+        """Send already serialized signatures in one request, see save_and_compare_signatures().
+
+        Args:
+            records: Concatenated records written by archive.encode_record().
+        """
+        with self._post(
+            "/proto/save_and_compare_signatures/",
+            data=encode_body(records, DEFAULT_CONTENT_ENCODING),
+            headers={
+                "Content-Type": BATCH_MEDIA_TYPE,
+                "Content-Encoding": DEFAULT_CONTENT_ENCODING,
+            },
+            stream=True,
+        ) as response:
+            for line in response.iter_lines():
+                if line:
+                    result = json.loads(line)
+                    yield result["index"], ComparingReport(*result["report"])
+
+    def save_record(self, record: bytes) -> None:
+        """Store an already serialized signature without comparing it, through /proto/save_signature/.
+
+        Args:
+            record: A record written by archive.encode_record().
+
+        Raises:
+            ConnectionError: An error occured during connection to the server.
+            HTTPError: Code 400 means that the server couldn't parse the signature.
+        """
+        (parsed,) = iter_records(record)
+        self._post(
+            "/proto/save_signature/",
+            data=encode_body(record[parsed.data_offset :], DEFAULT_CONTENT_ENCODING),
+            params={"project_name": parsed.project_name},
+            headers={
+                "Content-Type": PROTOBUF_MEDIA_TYPE,
+                "Content-Encoding": DEFAULT_CONTENT_ENCODING,
+            },
+        )
+
+    def update_project_standard(
+        self, new_standard: Signature, transport: str = "protobuf"
+    ) -> None:
+        """Send singature to the monitoring server and mark it as related project signature.
+
+        Args:
+            new_standard: A signature object containing data profile to use as new standard and a project name.
+            transport: See save_and_compare_signature().
+
+        Raises:
+            ConnectionError: An error occured during connection to the server.
+        """
+        self._send_signature(new_standard, "/update_project_standard/", transport)
+        return None
+
+    def get_project_standard(
+        self, project_name: str, transport: str = "protobuf"
+    ) -> Signature:
+        """Get specified project standard from the monitoring server.
+
+        Downloaded standards are kept in cache_dir together with their ETag. A cached standard
+        is revalidated with the server on every call and downloaded again only if it was replaced.
+
+        Args:
+            project_name: A project name that will be used to find relevant project standard.
+            transport: See save_and_compare_signature().
+
+        Raises:
+            ConnectionError: An error occured during connection to the server.
+            HTTPError: Code 400 means that server couldn't find standard for the given signature's project.
+        """
+        cache_path = (
+            _standard_cache_path(self.cache_dir, self.server_address, project_name)
+            if self.cache_dir
+            else None
+        )
+        cached = _read_cached_standard(cache_path) if cache_path else None
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        if transport == "json":
+            response = self._get(
+                f"/get_project_standard/{project_name}", headers=headers
+            )
+            if response.status_code == 304:
+                return Signature(profile_from_message(cached[1]), project_name)
+            standard = json_to_signature(response.text)
+            # parsed profiles keep their column messages, so this doesn't encode them again
+            message = profile_to_message(standard.profile)
+        else:
+            headers["Accept"] = PROTOBUF_MEDIA_TYPE
+            headers["Accept-Encoding"] = ", ".join(reversed(available_encodings()))
+            # body is decoded here, requests would only decode gzip by itself
+            with self._get(
+                f"/proto/get_project_standard/{project_name}",
+                headers=headers,
+                stream=True,
+            ) as response:
+                body = response.raw.read(decode_content=False)
+                encoding = response.headers.get("Content-Encoding")
+            if response.status_code == 304:
+                return Signature(profile_from_message(cached[1]), project_name)
+            message = DatasetProfileMessage.FromString(decode_body(body, encoding))
+            standard = Signature(profile_from_message(message), project_name)
+
+        etag = response.headers.get("ETag")
+        if cache_path and etag:
+            _write_cached_standard(cache_path, etag, message)
+        return standard
+
+    def flush(self) -> None:
+        """Wait until signatures of local compares are uploaded."""
+        with self._lock:
+            uploader, self._uploader = self._uploader, None
+        if uploader is not None:
+            uploader.shutdown(wait=True)
+
+    def close(self) -> None:
+        self.flush()
+        self.session.close()
+
+    def __enter__(self) -> "MonitoringClient":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _compare_locally(self, signature: Signature, transport: str) -> ComparingReport:
+        # the server compares the signature parsed from the uploaded message, so the local
+        # compare uses the same round trip to give identical reports
+        standard = self._local_standard(signature.project_name, transport)
+        uploaded = _parsed_as_uploaded(signature)
+        with self._lock:
+            if self._uploader is None:
+                self._uploader = ThreadPoolExecutor(
+                    max_workers=min(4, self.pool_size),
+                    thread_name_prefix="signature-upload",
+                )
+            upload = self._uploader.submit(
+                self._send_signature, uploaded, "/save_signature/", transport
+            )
+        upload.add_done_callback(_log_failed_upload)
+        return compare_signatures(uploaded, standard)
+
+    def _local_standard(self, project_name: str, transport: str) -> Signature:
+        with self._lock:
+            entry = self._standards.get(project_name)
+        if entry is not None and time.monotonic() - entry[1] < self.standard_ttl:
+            return entry[0]
+        standard = self.get_project_standard(project_name, transport)
+        with self._lock:
+            self._standards[project_name] = (standard, time.monotonic())
+        return standard
+
+    def _get(self, gateway: str, **kwargs) -> requests.Response:
+        response = self.session.get(
+            f"{self.server_address}{gateway}", timeout=self.timeout, **kwargs
+        )
+        response.raise_for_status()
+        return response
+
+    def _post(self, gateway: str, **kwargs) -> requests.Response:
+        # POST is not retried by the session, a request is repeated only if it was rejected
+        # by the admission control, which happens before the body is processed
+        for retry in range(self.retries + 1):
+            response = self.session.post(
+                f"{self.server_address}{gateway}", timeout=self.timeout, **kwargs
+            )
+            if response.status_code not in RETRY_STATUSES or retry == self.retries:
+                break
+            retry_after = response.headers.get("Retry-After", "")
+            response.close()
+            time.sleep(_retry_delay(retry_after, self.backoff_factor * 2**retry))
+        response.raise_for_status()
+        return response
+
+    def _send_signature(
+        self,
+        signature: Signature,
+        gateway: str,
+        transport: str,
+        encoding: Optional[str] = DEFAULT_CONTENT_ENCODING,
+    ) -> requests.Response:
+        # Helper for sending signature in the JSON or binary format
+        if transport == "json":
+            return self._post(gateway, data=json.dumps(signature_to_dict(signature)))
+        if transport != "protobuf":
+            raise ValueError(
+                f"Unknown transport {transport}, expected protobuf or json"
+            )
+
+        body = encode_body(
+            profile_to_message(signature.profile).SerializeToString(), encoding
+        )
+        return self._post(
+            f"/proto{gateway}",
+            data=body,
+            params={"project_name": signature.project_name},
+            headers={"Content-Type": PROTOBUF_MEDIA_TYPE, "Content-Encoding": encoding},
+        )
+
+    def _wait_for_report(
+        self, response: requests.Response, poll_interval: float
+    ) -> ComparingReport:
+        # Helper long-polling the compare job until it's finished
+        job = response.json()
+        while response.status_code == 202:
+            response = self._get(
+                f"/jobs/{job['job_id']}", params={"wait": poll_interval}
+            )
+            job = response.json()
+        if job["status"] == "failed":
+            raise requests.HTTPError(
+                f"Compare job {job['job_id']} failed: {job['error']}", response=response
+            )
+        return ComparingReport(*job["report"])
+
 
+class AsyncMonitoringClient:
+    """Asyncio client of one monitoring server, the counterpart of MonitoringClient.
+
+    Connections are pooled by httpx and at most max_concurrency requests are sent at once,
+    the rest wait without opening connections. Binary signatures are serialized in a thread
+    and uploaded in compressed chunks, so the event loop isn't blocked by wide signatures.
+    Retries follow MonitoringClient. Failed requests raise httpx.HTTPStatusError.
+    """
+
+    # compressed uploads are produced in pieces of this many bytes of the serialized profile
+    UPLOAD_CHUNK_SIZE = 256 * 1024
+
+    def __init__(
+        self,
+        server_address: str,
+        max_connections: int = 100,
+        max_concurrency: int = 100,
+        timeout: Union[float, Tuple[float, float]] = DEFAULT_TIMEOUT,
+        retries: int = 3,
+        backoff_factor: float = 0.5,
+        cache_dir: Optional[str] = STANDARDS_CACHE_DIR,
+        standard_ttl: float = 60.0,
+    ):
+        """
+        Args:
+            server_address: An address of a monitoring server, including port.
+            max_connections: Maximal number of open connections, idle ones are kept alive.
+            max_concurrency: Maximal number of requests sent at once.
+            timeout: See MonitoringClient.
+            retries: See MonitoringClient.
+            backoff_factor: See MonitoringClient.
+            cache_dir: See MonitoringClient.
+            standard_ttl: See MonitoringClient.
+
+        Raises:
+            ImportError: httpx is not installed.
+        """
+        if httpx is None:
+            raise ImportError("AsyncMonitoringClient requires httpx")
+        connect_timeout, read_timeout = (
+            timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        )
+        self.server_address = server_address.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.retries = retries
+        self.backoff_factor = backoff_factor
+        self.cache_dir = cache_dir
+        self.standard_ttl = standard_ttl
+        self._standards: Dict[str, Tuple[Signature, float]] = {}
+        self._uploads: "set[asyncio.Future[httpx.Response]]" = set()
+        self._client = httpx.AsyncClient(
+            base_url=self.server_address,
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections,
+            ),
+        )
+        # semaphore is created lazily to be bound to the running event loop
+        self._semaphore: Optional[asyncio.Semaphore] = None
+
+    async def save_and_compare_signature(
+        self,
+        signature: Signature,
+        transport: str = "protobuf",
+        mode: str = "sync",
+        poll_interval: float = 20.0,
+    ) -> ComparingReport:
+        """Send signature to the monitoring server, see MonitoringClient.save_and_compare_signature()."""
+        if mode not in MODES:
+            raise ValueError(f"Unknown mode {mode}, expected one of {MODES}")
+        if mode == "local":
+            return await self._compare_locally(signature, transport)
+        gateway = (
+            "/save_and_compare_signature/"
+            if mode == "sync"
+            else "/jobs/save_and_compare_signature/"
+        )
+        response = await self._send_signature(signature, gateway, transport)
+        job = response.json()
+        if mode == "sync":
+            return ComparingReport(*job)
+
+        while response.status_code == 202:
+            response = await self._request(
+                "GET", f"/jobs/{job['job_id']}", params={"wait": poll_interval}
+            )
+            job = response.json()
+        if job["status"] == "failed":
+            raise httpx.HTTPStatusError(
+                f"Compare job {job['job_id']} failed: {job['error']}",
+                request=response.request,
+                response=response,
+            )
+        return ComparingReport(*job["report"])
+
+    async def update_project_standard(
+        self, new_standard: Signature, transport: str = "protobuf"
+    ) -> None:
+        """Send singature to the monitoring server and mark it as related project signature."""
+        await self._send_signature(new_standard, "/update_project_standard/", transport)
+        return None
+
+    async def get_project_standard(
+        self, project_name: str, transport: str = "protobuf"
+    ) -> Signature:
+        """Get specified project standard, see MonitoringClient.get_project_standard()."""
+        loop = asyncio.get_running_loop()
+        cache_path = (
+            _standard_cache_path(self.cache_dir, self.server_address, project_name)
+            if self.cache_dir
+            else None
+        )
+        cached = (
+            await loop.run_in_executor(None, _read_cached_standard, cache_path)
+            if cache_path
+            else None
+        )
+        headers = {"If-None-Match": cached[0]} if cached else {}
+
+        if transport == "json":
+            gateway = f"/get_project_standard/{project_name}"
+        else:
+            gateway = f"/proto/get_project_standard/{project_name}"
+            headers["Accept"] = PROTOBUF_MEDIA_TYPE
+            headers["Accept-Encoding"] = ", ".join(reversed(available_encodings()))
+        # body is decoded here like in MonitoringClient, httpx decodes only some encodings
+        response = await self._request("GET", gateway, stream=True, headers=headers)
+        try:
+            body = b"".join([piece async for piece in response.aiter_raw()])
+        finally:
+            await response.aclose()
+        if response.status_code == 304:
+            return Signature(profile_from_message(cached[1]), project_name)
+
+        return await loop.run_in_executor(
+            None,
+            self._parse_standard,
+            project_name,
+            transport,
+            body,
+            response.headers.get("Content-Encoding"),
+            response.headers.get("ETag"),
+            cache_path,
+        )
+
+    async def flush(self) -> None:
+        """Wait until signatures of local compares are uploaded."""
+        while self._uploads:
+            await asyncio.gather(*self._uploads, return_exceptions=True)
+
+    async def aclose(self) -> None:
+        await self.flush()
+        await self._client.aclose()
+
+    async def __aenter__(self) -> "AsyncMonitoringClient":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.aclose()
+
+    async def _compare_locally(
+        self, signature: Signature, transport: str
+    ) -> ComparingReport:
+        # See MonitoringClient._compare_locally()
+        loop = asyncio.get_running_loop()
+        standard = await self._local_standard(signature.project_name, transport)
+        uploaded = await loop.run_in_executor(None, _parsed_as_uploaded, signature)
+        upload = asyncio.ensure_future(
+            self._send_signature(uploaded, "/save_signature/", transport)
+        )
+        self._uploads.add(upload)
+        upload.add_done_callback(self._uploads.discard)
+        upload.add_done_callback(_log_failed_upload)
+        return await loop.run_in_executor(None, compare_signatures, uploaded, standard)
+
+    async def _local_standard(self, project_name: str, transport: str) -> Signature:
+        entry = self._standards.get(project_name)
+        if entry is not None and time.monotonic() - entry[1] < self.standard_ttl:
+            return entry[0]
+        standard = await self.get_project_standard(project_name, transport)
+        self._standards[project_name] = (standard, time.monotonic())
+        return standard
+
+    @staticmethod
+    def _parse_standard(
+        project_name: str,
+        transport: str,
+        body: bytes,
+        encoding: Optional[str],
+        etag: Optional[str],
+        cache_path: Optional[str],
+    ) -> Signature:
+        # Helper parsing the standard and caching it, runs in a thread
+        body = decode_body(body, encoding)
+        if transport == "json":
+            standard = json_to_signature(body.decode())
+            message = profile_to_message(standard.profile)
+        else:
+            message = DatasetProfileMessage.FromString(body)
+            standard = Signature(profile_from_message(message), project_name)
+        if cache_path and etag:
+            _write_cached_standard(cache_path, etag, message)
+        return standard
+
+    async def _send_signature(
+        self, signature: Signature, gateway: str, transport: str
+    ) -> "httpx.Response":
+        # Helper for sending signature in the JSON or binary format
+        loop = asyncio.get_running_loop()
+        if transport == "json":
+            body = await loop.run_in_executor(
+                None, lambda: json.dumps(signature_to_dict(signature)).encode()
+            )
+            return await self._request("POST", gateway, body_factory=lambda: body)
+        if transport != "protobuf":
+            raise ValueError(
+                f"Unknown transport {transport}, expected protobuf or json"
+            )
+
+        profile_bytes = await loop.run_in_executor(
+            None, lambda: profile_to_message(signature.profile).SerializeToString()
+        )
+        return await self._request(
+            "POST",
+            f"/proto{gateway}",
+            body_factory=lambda: self._iter_upload(profile_bytes),
+            params={"project_name": signature.project_name},
+            headers={
+                "Content-Type": PROTOBUF_MEDIA_TYPE,
+                "Content-Encoding": DEFAULT_CONTENT_ENCODING,
+            },
+        )
+
+    async def _iter_upload(self, profile_bytes: bytes) -> AsyncIterator[bytes]:
+        compress, flush = body_encoder(DEFAULT_CONTENT_ENCODING)
+        view = memoryview(profile_bytes)
+        for offset in range(0, len(view), self.UPLOAD_CHUNK_SIZE):
+            piece = compress(view[offset : offset + self.UPLOAD_CHUNK_SIZE])
+            if piece:
+                yield piece
+        yield flush()
+
+    async def _request(
+        self,
+        method: str,
+        gateway: str,
+        body_factory: Optional[Callable[[], object]] = None,
+        stream: bool = False,
+        **kwargs,
+    ) -> "httpx.Response":
+        # Helper sending a request with retries like MonitoringClient, streamed bodies
+        # can't be replayed, so body_factory creates the body of every attempt;
+        # with stream=True the response body is left unread
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        retry_statuses = RETRY_STATUSES if method == "POST" else (429, 502, 503, 504)
+        async with self._semaphore:
+            for retry in range(self.retries + 1):
+                if body_factory is not None:
+                    kwargs["content"] = body_factory()
+                delay = self.backoff_factor * 2**retry
+                request = self._client.build_request(method, gateway, **kwargs)
+                try:
+                    response = await self._client.send(request, stream=stream)
+                except httpx.TransportError as e:
+                    # an upload may have been processed unless the connection failed
+                    if retry == self.retries or (
+                        method == "POST" and not isinstance(e, httpx.ConnectError)
+                    ):
+                        raise
+                    await asyncio.sleep(delay)
+                    continue
+                if response.status_code not in retry_statuses or retry == self.retries:
+                    break
+                await response.aclose()
+                retry_after = response.headers.get("Retry-After", "")
+                await asyncio.sleep(_retry_delay(retry_after, delay))
+        if response.status_code >= 400:
+            await response.aread()
+            response.raise_for_status()
+        return response
+
+
+_default_clients: Dict[Tuple[str, Optional[str]], MonitoringClient] = {}
+_default_clients_lock = threading.Lock()
+
+
+def get_client(
+    server_address: str, cache_dir: Optional[str] = STANDARDS_CACHE_DIR
+) -> MonitoringClient:
+    """Return the shared client of the server used by the module-level functions."""
+    key = (server_address, cache_dir)
+    with _default_clients_lock:
+        if key not in _default_clients:
+            _default_clients[key] = MonitoringClient(
+                server_address, cache_dir=cache_dir
+            )
+        return _default_clients[key]
+
+
+def save_and_compare_signature(
+    signature: Signature,
+    server_address: str,
+    transport: str = "protobuf",
+    mode: str = "sync",
+    poll_interval: float = 20.0,
+) -> ComparingReport:
+    """Send signature to the monitoring server to receive a comparing report for signature's standard.
+
+    See MonitoringClient.save_and_compare_signature(), server_address is an address of a monitoring server, including port.
+    In "local" mode uploads continue in the background, they are finished before the interpreter exits.
     """
-    json_to_save = json.dumps(signature_to_dict(signature))
-    response = _send_post_request(
-        json_to_save, server_address, "/save_and_compare_signature/"
+    return get_client(server_address).save_and_compare_signature(
+        signature, transport, mode, poll_interval
     )
-    return ComparingReport(*response.json())
 
 
-def update_project_standard(new_standard: Signature, server_address: str) -> None:
-    """Send singature to the monitoring server and mark it as related project signature.
+def save_and_compare_signatures(
+    signatures: Sequence[Signature], server_address: str
+) -> Iterator[Tuple[int, ComparingReport]]:
+    """Send many signatures in one request, see MonitoringClient.save_and_compare_signatures()."""
+    return get_client(server_address).save_and_compare_signatures(signatures)
 
-    Args:
-        new_standard: A signature object containing data profile to use as new standard and a project name.
 
-    Raises:
-        ConnectionError: An error occured during connection to the server.
+def update_project_standard(
+    new_standard: Signature, server_address: str, transport: str = "protobuf"
+) -> None:
+    """Send singature to the monitoring server and mark it as related project signature.
+
+    See MonitoringClient.update_project_standard().
     """
-    json_to_save = json.dumps(signature_to_dict(new_standard))
-    _send_post_request(json_to_save, server_address, "/update_project_standard/")
+    get_client(server_address).update_project_standard(new_standard, transport)
     return None
 
 
-def get_project_standard(project_name: str, server_address: str) -> Signature:
+def get_project_standard(
+    project_name: str,
+    server_address: str,
+    transport: str = "protobuf",
+    cache_dir: Optional[str] = STANDARDS_CACHE_DIR,
+) -> Signature:
     """Get specified project standard from the monitoring server.
 
-    Args:
-        project_name: A project name that will be used to find relevant project standard.
-        server_address: An address of a monitoring server.
-
-    Raises:
-        ConnectionError: An error occured during connection to the server.
-        HTTPError: Code 400 means that server couldn't find standard for the given signature's project.
+    See MonitoringClient.get_project_standard(), cache_dir=None disables caching of the standard.
     """
-    uri = f"{server_address}/get_project_standard/{project_name}"
-    response = requests.get(uri)
-    response.raise_for_status()
-    standard = json_to_signature(response.text)
-    return standard
+    return get_client(server_address, cache_dir).get_project_standard(
+        project_name, transport
+    )
 
 
-def save_errors_report(report: ComparingReport) -> None:
+def save_errors_report(
+    report: ComparingReport, sink: Optional[ParquetReportSink] = None
+) -> None:
     """Save comparing report in the form of a simple txt file.
 
     Args:
         report: A ComparingReport object to be saved.
+        sink: Sink appending the report to a parquet dataset instead of the txt file, use it
+            to analyze reports of many runs, see reports.most_failed_columns(). The report is
+            buffered by the sink and written when the sink is flushed or closed, which happens
+            at the latest when the interpreter exits, unless the sink was created with
+            flush_on_exit=False.
 
     Raises:
         IOError: Something gone wrong during file saving.
     """
+    if sink is not None:
+        sink.add(report)
+        return None
     with open(f"{report.project_name}_data_health_report.txt", "w") as file:
         file.write(f"Data Monitoring Report for: {report.project_name} project\n\n")
         file.write(f"Message: {report.message}\n\n")
@@ -87,12 +810,54 @@ def save_errors_report(report: ComparingReport) -> None:
     return None
 
 
-def _send_post_request(
-    data: str, server_address: str, gateway: str
-) -> requests.Response:
-    # Helper for sending post requests
+def _parsed_as_uploaded(signature: Signature) -> Signature:
+    # Helper returning the signature as the server parses it from the uploaded message
+    message = profile_to_message(signature.profile)
+    return Signature(profile_from_message(message), signature.project_name)
+
+
+def _log_failed_upload(upload: Future) -> None:
+    if not upload.cancelled() and upload.exception() is not None:
+        logger.error(f"Failed to upload signature: {upload.exception()}")
+
+
+def _standard_cache_path(cache_dir: str, server_address: str, project_name: str) -> str:
+    # Helper naming the cache file, standards of different servers are kept apart
+    key = hashlib.sha256(f"{server_address}\n{project_name}".encode()).hexdigest()
+    return os.path.join(cache_dir, f"{key}.standard")
+
+
+def _read_cached_standard(path: str) -> Optional[Tuple[str, DatasetProfileMessage]]:
+    # Helper reading ETag and the standard written by _write_cached_standard(),
+    # missing or damaged files are ignored
+    try:
+        with open(path, "rb") as file:
+            etag = file.readline().decode().strip()
+            message = DatasetProfileMessage.FromString(file.read())
+    except (OSError, UnicodeDecodeError, DecodeError):
+        return None
+    return (etag, message) if etag else None
+
 
-    uri = f"{server_address}{gateway}"
-    response = requests.post(uri, data=data)
-    response.raise_for_status()
-    return response
+def _write_cached_standard(
+    path: str, etag: str, message: DatasetProfileMessage
+) -> None:
+    # Helper writing the standard atomically, so concurrent jobs never read a partial file
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file = tempfile.NamedTemporaryFile(
+            dir=os.path.dirname(path), suffix=".tmp", delete=False
+        )
+    except OSError:
+        # the cache is an optimization, a read-only or full disk must not fail the call
+        return
+    try:
+        with file:
+            file.write(etag.encode() + b"\n")
+            file.write(message.SerializeToString())
+        os.replace(file.name, path)
+    except OSError:
+        try:
+            os.remove(file.name)
+        except OSError:
+            pass
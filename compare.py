@@ -1,4 +1,4 @@
-from mlops_monitoring.signature import Signature
+from mlops_monitoring.signature import LazyColumns, Signature
 from mlops_monitoring.metrics import (
     MetricResult,
     calculate_histogram_intersection,
@@ -7,6 +7,9 @@ from mlops_monitoring.metrics import (
     calculate_null_rate_discrepancy,
     calculate_category_histogram_intersection,
 )
+from mlops_monitoring.telemetry import histogram, timed
+from whylogs.core.statistics.datatypes import StringTracker
+from whylogs.proto import ColumnMessage
 
 from typing import Dict, Any, Set, Tuple, List, Optional, Callable, NewType, Sequence
 import numpy as np
@@ -14,6 +17,21 @@ import pandas as pd
 
 from typing import NamedTuple
 
+# Message of batch reports of signatures whose project has no standard, formatted with the
+# project name, the server doesn't store such signatures
+STANDARD_NOT_FOUND_MESSAGE = "Error: standard for project {} not found!"
+
+# Observed in the process running the compare, compare_pool records observations of its workers
+# in the server process
+COMPARE_SECONDS = histogram(
+    "mlops_compare_seconds", "Duration of comparing a signature with its standard."
+)
+METRIC_SECONDS = histogram(
+    "mlops_compare_metric_seconds",
+    "Duration of a single comparison metric applied to one column.",
+    ["metric"],
+)
+
 
 class ComparingReport(NamedTuple):
     project_name: str
@@ -22,6 +40,7 @@ class ComparingReport(NamedTuple):
     failed_columns_stats: Optional[Dict[str, str]]
 
 
+@timed(COMPARE_SECONDS)
 def compare_signatures(signature: Signature, standard: Signature) -> ComparingReport:
     """Compare two signatures and produce comparing report that contains info about failed tests.
 
@@ -187,21 +206,52 @@ def calculate_column_stats(
     Returns:
         A list of metric results.
     """
-    return [metric_func(signature, standard, colname) for metric_func in metrics]
+    results = []
+    for metric_func in metrics:
+        with timed(METRIC_SECONDS, metric=metric_func.__name__):
+            results.append(metric_func(signature, standard, colname))
+    return results
 
 
 def get_signature_cols(signature: Signature) -> Set[str]:
     return set(signature.profile.columns.keys())
 
 
+def _column_message(signature: Signature, colname: str) -> Optional[ColumnMessage]:
+    # Helper giving the protobuf message of a lazily parsed column, so it's not decoded
+    columns = signature.profile.columns
+    return columns.get_message(colname) if isinstance(columns, LazyColumns) else None
+
+
 def get_numeric_cols(signature: Signature) -> Set[str]:
-    signature_cols = get_signature_cols(signature)
-    return {
-        col
-        for col in signature_cols
-        if signature.profile.columns[col].number_tracker.to_summary() is not None
-    }
+    numeric_cols = set()
+    for col in get_signature_cols(signature):
+        message = _column_message(signature, col)
+        if message is not None:
+            # the number summary is None exactly when its variance has no count
+            count = message.numbers.variance.count
+        else:
+            count = signature.profile.columns[col].number_tracker.variance.count
+        if count > 0:
+            numeric_cols.add(col)
+    return numeric_cols
 
 
 def get_categorical_cols(signature: Signature) -> Set[str]:
-    return set(signature.profile.flat_summary()["frequent_strings"].keys())
+    """Get columns with frequent strings, the same as in DatasetProfile.flat_summary().
+
+    Only string trackers of columns that saw strings are summarized, high cardinality
+    columns have no frequent strings.
+    """
+    categorical_cols = set()
+    for col in get_signature_cols(signature):
+        message = _column_message(signature, col)
+        if message is None:
+            string_tracker = signature.profile.columns[col].string_tracker
+        elif message.strings.count > 0:
+            string_tracker = StringTracker.from_protobuf(message.strings)
+        else:
+            continue
+        if string_tracker.count > 0 and string_tracker.to_summary().frequent.items:
+            categorical_cols.add(col)
+    return categorical_cols
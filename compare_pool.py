@@ -0,0 +1,217 @@
+import asyncio
+import multiprocessing
+import time
+import weakref
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Callable, List, MutableMapping, Optional, Tuple
+import pandas as pd
+from google.protobuf.json_format import Parse
+from whylogs.proto import DatasetProfileMessage
+from mlops_monitoring.signature import Signature, message_hash, profile_from_message
+from mlops_monitoring.compare import ComparingReport, compare_signatures
+from mlops_monitoring.ingest import profile_chunk
+from mlops_monitoring.cache import LRUCache
+from mlops_monitoring.telemetry import (
+    REGISTRY,
+    Observation,
+    captured_observations,
+    histogram,
+)
+
+# Parsed standards kept by every worker process, keyed by their content hash
+STANDARDS_PER_WORKER = 32
+_standards = LRUCache(maxsize=STANDARDS_PER_WORKER)
+
+
+# Metrics recorded inside worker processes are not visible to the server, so workers return
+# durations of their tasks and observations of their histograms, e.g. compare.COMPARE_SECONDS,
+# and the pool records them in the server process
+POOL_TASK_SECONDS = histogram(
+    "mlops_compare_pool_task_seconds",
+    "Duration of a task in a compare pool worker.",
+    ["task"],
+)
+POOL_WAIT_SECONDS = histogram(
+    "mlops_compare_pool_wait_seconds",
+    "Time a task waited for a free compare pool worker, including transfer of arguments and results.",
+    ["task"],
+)
+
+
+class StandardNotCached(Exception):
+    """Worker doesn't have the standard yet, the call should be repeated with its serialized message."""
+
+
+def parse_signature(profile_json: str, project_name: str) -> Tuple[bytes, str]:
+    """Convert JSON profile to serialized protobuf message, runs in a worker process.
+
+    Args:
+        profile_json: Dataset profile in the JSON format of signature_to_dict().
+        project_name: A project name of the signature.
+
+    Returns:
+        Serialized DatasetProfileMessage and its content hash, see signature.message_hash().
+    """
+    message = Parse(profile_json, DatasetProfileMessage())
+    return message.SerializeToString(), message_hash(message, project_name)
+
+
+def hash_signature(profile_bytes: bytes, project_name: str) -> str:
+    """Validate serialized profile and calculate its content hash, runs in a worker process.
+
+    Args:
+        profile_bytes: Serialized DatasetProfileMessage.
+        project_name: A project name of the signature.
+
+    Returns:
+        Content hash of the message, see signature.message_hash().
+
+    Raises:
+        DecodeError: The bytes are not a serialized DatasetProfileMessage.
+    """
+    message = DatasetProfileMessage.FromString(profile_bytes)
+    return message_hash(message, project_name)
+
+
+def signature_from_bytes(profile_bytes: bytes, project_name: str) -> Signature:
+    message = DatasetProfileMessage.FromString(profile_bytes)
+    return Signature(profile_from_message(message), project_name)
+
+
+def compare_serialized(
+    signature_bytes: bytes,
+    project_name: str,
+    standard_key: str,
+    standard_bytes: Optional[bytes] = None,
+) -> ComparingReport:
+    """Compare serialized signature with a standard cached in the worker process.
+
+    Args:
+        signature_bytes: Serialized DatasetProfileMessage of the new signature.
+        project_name: A project name of the signature and the standard.
+        standard_key: Content hash of the standard.
+        standard_bytes: Serialized standard, only needed when the worker doesn't have it yet.
+
+    Returns:
+        A ComparingReport object, see compare.compare_signatures().
+
+    Raises:
+        StandardNotCached: The standard is not cached and standard_bytes are not given.
+    """
+    standard = _standards.get(standard_key)
+    if standard is None:
+        if standard_bytes is None:
+            raise StandardNotCached(standard_key)
+        standard = signature_from_bytes(standard_bytes, project_name)
+        _standards.put(standard_key, standard)
+    return compare_signatures(
+        signature_from_bytes(signature_bytes, project_name), standard
+    )
+
+
+def _run_timed(func: Callable, *args) -> Tuple[object, float, List[Observation]]:
+    # Helper running func in a worker and returning its result together with the duration
+    # and histogram observations made by func
+    start = time.perf_counter()
+    with captured_observations() as observations:
+        result = func(*args)
+    return result, time.perf_counter() - start, observations
+
+
+class ComparePool:
+    """Runs profile parsing, raw data profiling and signature comparison outside of the event loop.
+
+    Work is done by a pool of processes, so CPU-heavy compares don't block other requests.
+    Every process keeps its own cache of parsed standards, a standard is sent to a process
+    only the first time it's needed there. With max_workers=0 a thread pool is used instead,
+    which is convenient for tests and debugging.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, max_concurrency: int = 0):
+        """
+        Args:
+            max_workers: Number of worker processes, number of CPUs by default.
+            max_concurrency: Maximal number of tasks submitted at once, the rest wait without
+                occupying the pool queue. Twice the number of workers by default.
+        """
+        self.max_workers = max_workers
+        self._executor = self._create_executor()
+        self.max_concurrency = max_concurrency or 2 * (
+            max_workers or multiprocessing.cpu_count()
+        )
+        # asyncio primitives are bound to an event loop, so every loop gets its own semaphore
+        self._semaphores: MutableMapping[
+            asyncio.AbstractEventLoop, asyncio.Semaphore
+        ] = weakref.WeakKeyDictionary()
+
+    async def parse_signature(
+        self, profile_json: str, project_name: str
+    ) -> Tuple[bytes, str]:
+        """Run parse_signature() in the pool."""
+        return await self._submit(parse_signature, profile_json, project_name)
+
+    async def hash_signature(self, profile_bytes: bytes, project_name: str) -> str:
+        """Run hash_signature() in the pool, the bytes are not sent back."""
+        return await self._submit(hash_signature, profile_bytes, project_name)
+
+    async def profile_chunk(self, chunk: pd.DataFrame, project_name: str) -> bytes:
+        """Run ingest.profile_chunk() in the pool."""
+        return await self._submit(profile_chunk, chunk, project_name)
+
+    async def compare(
+        self,
+        signature_bytes: bytes,
+        project_name: str,
+        standard_key: str,
+        get_standard_bytes: Callable[[], bytes],
+    ) -> ComparingReport:
+        """Run compare_serialized() in the pool.
+
+        Args:
+            signature_bytes: Serialized DatasetProfileMessage of the new signature.
+            project_name: A project name of the signature and the standard.
+            standard_key: Content hash of the standard.
+            get_standard_bytes: Function serializing the standard, called only if a worker doesn't have it.
+        """
+        try:
+            return await self._submit(
+                compare_serialized, signature_bytes, project_name, standard_key
+            )
+        except StandardNotCached:
+            return await self._submit(
+                compare_serialized,
+                signature_bytes,
+                project_name,
+                standard_key,
+                get_standard_bytes(),
+            )
+
+    async def _submit(self, func, *args):
+        loop = asyncio.get_running_loop()
+        semaphore = self._semaphores.get(loop)
+        if semaphore is None:
+            semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        async with semaphore:
+            start = time.perf_counter()
+            result, duration, observations = await loop.run_in_executor(
+                self._executor, _run_timed, func, *args
+            )
+        REGISTRY.record(observations)
+        POOL_TASK_SECONDS.observe(duration, task=func.__name__)
+        POOL_WAIT_SECONDS.observe(
+            time.perf_counter() - start - duration, task=func.__name__
+        )
+        return result
+
+    def _create_executor(self) -> Executor:
+        if self.max_workers == 0:
+            return ThreadPoolExecutor()
+        # spawned workers don't inherit threads and connections of the server
+        return ProcessPoolExecutor(
+            self.max_workers, mp_context=multiprocessing.get_context("spawn")
+        )
+
+    def shutdown(self) -> None:
+        """Stop the workers, new workers are started if the pool is used again."""
+        self._executor.shutdown(wait=True)
+        self._executor = self._create_executor()
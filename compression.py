@@ -0,0 +1,106 @@
+import zlib
+from typing import Callable, Dict, Optional, Tuple
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+try:
+    import lz4.frame as lz4_frame
+except ImportError:
+    lz4_frame = None
+
+
+# Compressed blobs start with a header: magic bytes, format version and codec id.
+# Serialized DatasetProfileMessage always starts with a tag of one of its first fields
+# (0x0A, 0x12 or 0x1A), so blobs without the magic are treated as legacy raw protobuf.
+MAGIC = b"MLSG"
+FORMAT_VERSION = 1
+HEADER_SIZE = len(MAGIC) + 2
+
+CODEC_IDS: Dict[str, int] = {"none": 0, "zlib": 1, "zstd": 2, "lz4": 3}
+CODEC_NAMES: Dict[int, str] = {v: k for k, v in CODEC_IDS.items()}
+
+
+def available_codecs() -> Tuple[str, ...]:
+    """Return names of codecs that can be used in the current environment."""
+    return tuple(codec for codec in CODEC_IDS if _get_codec(codec, strict=False))
+
+
+def _zstd_compress(data: bytes) -> bytes:
+    return zstandard.ZstdCompressor(level=3).compress(data)
+
+
+def _zstd_decompress(data: bytes) -> bytes:
+    return zstandard.ZstdDecompressor().decompress(data)
+
+
+def _get_codec(
+    codec: str, strict: bool = True
+) -> Optional[Tuple[Callable[[bytes], bytes], Callable[[bytes], bytes]]]:
+    # Helper returning (compress, decompress) functions for the codec
+    if codec == "none":
+        return bytes, bytes
+    if codec == "zlib":
+        return (lambda data: zlib.compress(data, 6)), zlib.decompress
+    if codec == "zstd" and zstandard is not None:
+        return _zstd_compress, _zstd_decompress
+    if codec == "lz4" and lz4_frame is not None:
+        return lz4_frame.compress, lz4_frame.decompress
+    if not strict:
+        return None
+    if codec in CODEC_IDS:
+        raise ValueError(f"Codec {codec} is not installed")
+    raise ValueError(f"Unknown codec {codec}, expected one of {list(CODEC_IDS)}")
+
+
+DEFAULT_CODEC = "zstd" if zstandard is not None else "zlib"
+
+
+def compress_blob(data: bytes, codec: str = DEFAULT_CODEC) -> bytes:
+    """Compress serialized signature and prepend header describing the format.
+
+    Args:
+        data: Serialized protobuf message.
+        codec: Name of the codec, one of "none", "zlib", "zstd" or "lz4".
+
+    Returns:
+        Header followed by the compressed data.
+
+    Raises:
+        ValueError: Codec is unknown or its package is not installed.
+    """
+    compress, _ = _get_codec(codec)
+    header = MAGIC + bytes([FORMAT_VERSION, CODEC_IDS[codec]])
+    return header + compress(data)
+
+
+def decompress_blob(blob: bytes) -> bytes:
+    """Restore serialized signature from the stored blob.
+
+    Blobs written before compression was introduced don't have a header and are returned as is.
+
+    Args:
+        blob: Data produced by compress_blob() or raw serialized protobuf message.
+
+    Returns:
+        Serialized protobuf message.
+
+    Raises:
+        ValueError: Blob was written with unsupported format version or codec.
+    """
+    if not is_compressed(blob):
+        return blob
+
+    version, codec_id = blob[len(MAGIC)], blob[len(MAGIC) + 1]
+    if version != FORMAT_VERSION:
+        raise ValueError(f"Unsupported signature blob format version {version}")
+    if codec_id not in CODEC_NAMES:
+        raise ValueError(f"Unknown signature blob codec id {codec_id}")
+    _, decompress = _get_codec(CODEC_NAMES[codec_id])
+    return decompress(blob[HEADER_SIZE:])
+
+
+def is_compressed(blob: bytes) -> bool:
+    return bytes(blob[: len(MAGIC)]) == MAGIC
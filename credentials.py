@@ -0,0 +1,95 @@
+import logging
+import os
+import subprocess
+import threading
+import time
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def _run_command(command: str) -> int:
+    return subprocess.run(command, shell=True).returncode
+
+
+class KerberosTicketManager:
+    """Renews Kerberos tickets in a background thread, so requests don't run kinit themselves.
+
+    The renewal command is run once on start and then every renew_interval seconds, which
+    should be well below the ticket lifetime. Failed renewals are retried every retry_interval
+    seconds. Without a command the manager does nothing, which is convenient for local runs.
+    """
+
+    def __init__(
+        self,
+        command: Optional[str],
+        renew_interval: float = 3600.0,
+        retry_interval: float = 60.0,
+        runner: Callable[[str], int] = _run_command,
+    ):
+        """
+        Args:
+            command: Shell command obtaining a ticket, e.g. kinit with a keytab.
+            renew_interval: Time in seconds between successful renewals.
+            retry_interval: Time in seconds before retrying a failed renewal.
+            runner: Function running the command and returning its exit code, can be replaced in tests.
+        """
+        self.command = command
+        self.renew_interval = renew_interval
+        self.retry_interval = retry_interval
+        self.last_renewal: Optional[float] = None
+        self.failed_renewals = 0
+        self._runner = runner
+        self._stopped = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_env(cls) -> "KerberosTicketManager":
+        """Create manager for DEV_KEYTAB_COMMAND renewed every KERBEROS_RENEW_INTERVAL seconds."""
+        return cls(
+            os.environ.get("DEV_KEYTAB_COMMAND"),
+            renew_interval=float(os.environ.get("KERBEROS_RENEW_INTERVAL", "3600")),
+        )
+
+    def renew(self) -> bool:
+        """Run the renewal command once.
+
+        Returns:
+            True if the command succeeded or there is nothing to run.
+        """
+        if not self.command:
+            return True
+        try:
+            return_code = self._runner(self.command)
+        except OSError:
+            logger.exception("Failed to run Kerberos renewal command")
+            return_code = -1
+        if return_code != 0:
+            self.failed_renewals += 1
+            logger.error(f"Kerberos renewal command exited with code {return_code}")
+            return False
+        self.last_renewal = time.time()
+        return True
+
+    def start(self) -> None:
+        """Renew tickets now and keep renewing them in the background."""
+        if not self.command or self._thread is not None:
+            return
+        renewed = self.renew()
+        self._stopped.clear()
+        self._thread = threading.Thread(
+            target=self._run, args=(renewed,), name="kerberos-renewal", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self, renewed: bool) -> None:
+        while not self._stopped.wait(
+            self.renew_interval if renewed else self.retry_interval
+        ):
+            renewed = self.renew()
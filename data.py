@@ -1,25 +1,54 @@
-from mlops_monitoring.signature import Signature
+from mlops_monitoring.signature import (
+    Signature,
+    message_hash,
+    profile_from_message,
+    profile_to_message,
+)
+from mlops_monitoring.compression import DEFAULT_CODEC, compress_blob, decompress_blob
+from mlops_monitoring.telemetry import histogram, timed
 from sqlalchemy import (
     MetaData,
     Table,
     Column,
     BigInteger,
+    Integer,
     SmallInteger,
     String,
     LargeBinary,
     DateTime,
+    Index,
+    event,
+    func,
+    and_,
+    or_,
+    not_,
+    inspect,
+    text,
 )
 from fastapi import HTTPException
 from sqlalchemy.orm import registry
 from sqlalchemy.orm.decl_api import DeclarativeMeta
 from abc import ABC, abstractmethod
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
 import urllib.parse
 import datetime
 import pandas as pd
-from typing import Dict, Any, Type
+from typing import (
+    Dict,
+    Any,
+    Type,
+    Sequence,
+    Tuple,
+    List,
+    Optional,
+    Iterator,
+    NamedTuple,
+    Set,
+)
 from whylogs.core.datasetprofile import DatasetProfile
+from whylogs.proto import DatasetProfileMessage
 
 
 class Base(metaclass=DeclarativeMeta):
@@ -35,11 +64,144 @@ class Base(metaclass=DeclarativeMeta):
 
 class SQLSignature(Base):
     __tablename__ = "stub"
-    signature_id = Column(BigInteger, primary_key=True, index=True, autoincrement=True)
+    # SQLite only autoincrements INTEGER primary keys
+    signature_id = Column(
+        BigInteger().with_variant(Integer, "sqlite"),
+        primary_key=True,
+        index=True,
+        autoincrement=True,
+    )
     project_name = Column(String, index=True)
     is_standard = Column(SmallInteger)
     signature_binary = Column(LargeBinary)
     upload_date = Column(DateTime, default=True)
+    # see GRANULARITIES, NULL in rows written before roll-ups were introduced
+    granularity = Column(SmallInteger)
+    # see signature.message_hash(), NULL in rows written before deduplication was introduced
+    content_hash = Column(String(64))
+
+    __table_args__ = (
+        Index("ix_signatures_project_name_is_standard", "project_name", "is_standard"),
+        Index("ix_signatures_project_name_upload_date", "project_name", "upload_date"),
+        Index(
+            "ix_signatures_project_name_content_hash", "project_name", "content_hash"
+        ),
+    )
+
+
+class SQLColumnProfile(Base):
+    # Column profiles of signatures written with split_columns=True,
+    # the signature row then keeps only the profile properties
+    __tablename__ = "stub_columns"
+    signature_id = Column(BigInteger, primary_key=True, autoincrement=False)
+    column_name = Column(String(256), primary_key=True)
+    column_binary = Column(LargeBinary)
+
+
+class SQLCompareJob(Base):
+    # State of compare jobs of the /jobs/ endpoints, shared by all server processes
+    __tablename__ = "stub_jobs"
+    job_id = Column(String(64), primary_key=True)
+    status = Column(String(16))
+    # JSON of the ComparingReport of a finished job
+    report = Column(String)
+    error = Column(String)
+    updated_date = Column(DateTime, index=True)
+
+
+# Engines are expensive to create and own the connection pool, so we keep one per database
+_ENGINES: Dict[Tuple[str, str], Engine] = {}
+# Keys of _ENGINES whose columns table was checked by a writer with split_columns=True
+_COLUMNS_TABLES: Set[Tuple[str, str]] = set()
+
+DB_OPERATION_SECONDS = histogram(
+    "mlops_db_operation_seconds",
+    "Duration of signature storage operations, including connection checkout.",
+    ["operation"],
+)
+
+
+def pool_status() -> Dict[Tuple[str, str], Dict[str, int]]:
+    """Return connection pool statistics of every engine, keyed like _ENGINES.
+
+    Only QueuePool reports all statistics, pools that don't keep connections report none.
+    """
+    status = {}
+    for key, engine in list(_ENGINES.items()):
+        stats = {}
+        for stat in ("size", "checkedin", "checkedout", "overflow"):
+            method = getattr(engine.pool, stat, None)
+            if callable(method):
+                stats[stat] = method()
+        status[key] = stats
+    return status
+
+
+# Roll-up signatures merge all signatures of a period that starts at their upload_date
+GRANULARITIES = {"raw": 0, "day": 1, "week": 2, "month": 3}
+GRANULARITY_NAMES = {v: k for k, v in GRANULARITIES.items()}
+
+
+class SignatureRecord(NamedTuple):
+    signature_id: int
+    upload_date: datetime.datetime
+    signature: Signature
+    granularity: str = "raw"
+    is_standard: bool = False
+    content_hash: Optional[str] = None
+
+
+class CompareJobRecord(NamedTuple):
+    job_id: str
+    status: str
+    report: Optional[str]
+    error: Optional[str]
+    updated_date: datetime.datetime
+
+
+def get_period(
+    date: datetime.datetime, granularity: str
+) -> Tuple[datetime.datetime, datetime.datetime]:
+    """Get start (inclusive) and end (exclusive) of the roll-up period that contains the date.
+
+    Weeks start on Monday. Raw signatures cover only their own upload date.
+    """
+    if granularity == "raw":
+        return date, date
+    start = datetime.datetime(date.year, date.month, date.day)
+    if granularity == "day":
+        return start, start + datetime.timedelta(days=1)
+    if granularity == "week":
+        start -= datetime.timedelta(days=start.weekday())
+        return start, start + datetime.timedelta(days=7)
+    if granularity == "month":
+        start = start.replace(day=1)
+        end = (start + datetime.timedelta(days=32)).replace(day=1)
+        return start, end
+    raise ValueError(
+        f"Unknown granularity {granularity}, expected one of {list(GRANULARITIES)}"
+    )
+
+
+_MAX_PERIOD_LENGTH = {
+    "raw": None,
+    "day": datetime.timedelta(days=1),
+    "week": datetime.timedelta(days=7),
+    "month": datetime.timedelta(days=31),
+}
+
+
+def _merge_periods(
+    periods: Sequence[Tuple[datetime.datetime, datetime.datetime]],
+) -> List[Tuple[datetime.datetime, datetime.datetime]]:
+    # Helper for joining overlapping and adjacent periods
+    merged: List[Tuple[datetime.datetime, datetime.datetime]] = []
+    for start, end in sorted(periods):
+        if merged and start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(end, merged[-1][1]))
+        else:
+            merged.append((start, end))
+    return merged
 
 
 class SQLConnection:
@@ -47,6 +209,8 @@ class SQLConnection:
         self._server_address = server_address
         self._table_name = table_name
         self.SQLSignature = self._get_table()
+        self.SQLColumnProfile = self._get_columns_table()
+        self.SQLCompareJob = self._get_jobs_table()
 
     @property
     def server_address(self):
@@ -74,13 +238,27 @@ class SQLConnection:
             + f"SERVER={self.server_address};DATABASE=Mechkar;Trusted_Connection=yes"
         )
 
-    def _create_connection(self):
+    def _create_engine(self) -> Engine:
         params = urllib.parse.quote_plus(string=self._create_connection_string())
         engine = create_engine(
             "mssql+pyodbc:///?odbc_connect=%s" % params,
             connect_args={"check_same_thread": False},
         )
-        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+        return engine
+
+    def _engine_key(self) -> Tuple[str, str]:
+        return (self._create_connection_string(), self.signatures_table_name)
+
+    def _get_engine(self) -> Engine:
+        key = self._engine_key()
+        if key not in _ENGINES:
+            _ENGINES[key] = self._create_engine()
+        return _ENGINES[key]
+
+    def _create_connection(self):
+        Session = sessionmaker(
+            autocommit=False, autoflush=False, bind=self._get_engine()
+        )
         return Session
 
     def _get_table(self) -> Type[SQLSignature]:
@@ -92,43 +270,278 @@ class SQLConnection:
         table.__table__.schema = schema_name
         return table
 
+    def upgrade_schema(self) -> None:
+        """Create tables, columns and indexes that are missing in the database.
+
+        Must be run before tables created by previous versions of the package are used, the
+        mapped columns, e.g. granularity and content_hash, are selected by every query.
+        The server runs it on startup unless UPGRADE_SCHEMA=0, then it has to be run manually,
+        e.g. SQLWriter(server_address, table_name).upgrade_schema(), by an account allowed to
+        alter the tables. Existing tables are checked first, so it may be run repeatedly.
+        """
+        self._upgrade_schema(self._get_engine())
+
+    def _upgrade_schema(self, engine: Engine) -> None:
+        for table in (
+            self.SQLSignature.__table__,
+            self.SQLColumnProfile.__table__,
+            self.SQLCompareJob.__table__,
+        ):
+            table.create(bind=engine, checkfirst=True)
+            existing_columns = {
+                column["name"]
+                for column in inspect(engine).get_columns(
+                    table.name, schema=table.schema
+                )
+            }
+            table_name = engine.dialect.identifier_preparer.format_table(table)
+            with engine.begin() as connection:
+                for column in table.columns:
+                    if column.name not in existing_columns:
+                        column_type = column.type.compile(dialect=engine.dialect)
+                        connection.execute(
+                            text(
+                                f"ALTER TABLE {table_name} ADD {column.name} {column_type}"
+                            )
+                        )
+            for index in table.indexes:
+                index.create(bind=engine, checkfirst=True)
+
+    def _get_columns_table(self) -> Type[SQLColumnProfile]:
+        table = SQLColumnProfile
+        table.__table__.name = f"{self.SQLSignature.__table__.name}_columns"
+        table.__table__.schema = self.SQLSignature.__table__.schema
+        return table
+
+    def _get_jobs_table(self) -> Type[SQLCompareJob]:
+        table = SQLCompareJob
+        table.__table__.name = f"{self.SQLSignature.__table__.name}_jobs"
+        table.__table__.schema = self.SQLSignature.__table__.schema
+        return table
+
+
+class SQLiteConnection(SQLConnection):
+    """Connection to a local SQLite database, used for benchmarks and single-node deployments.
+
+    The server address is a path to the database file. The database runs in WAL mode,
+    so readers are not blocked by a writer, and the signatures table with its indexes
+    is created or upgraded on the first connection.
+    """
+
+    def _create_connection_string(self) -> str:
+        return f"sqlite:///{self.server_address}"
+
+    def _create_engine(self) -> Engine:
+        engine = create_engine(
+            self._create_connection_string(),
+            connect_args={"check_same_thread": False},
+        )
+        event.listen(engine, "connect", _set_sqlite_pragmas)
+        self._upgrade_schema(engine)
+        return engine
+
+    def _get_table(self) -> Type[SQLSignature]:
+        # SQLite has no schemas, so the whole name is used as a table name
+        table = SQLSignature
+        table.__table__.name = self.signatures_table_name.split(".")[-1]
+        table.__table__.schema = None
+        return table
+
+
+def _set_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    # Helper for configuring every new SQLite connection
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.execute("PRAGMA synchronous=NORMAL")
+    cursor.close()
+
 
 class Writer(ABC):
     @abstractmethod
-    def write_signature(self, signature: Signature) -> None:
+    def write_signature(self, signature: Signature) -> Optional[int]:
         raise NotImplementedError
 
+    def write_signatures(self, signatures: Sequence[Signature]) -> int:
+        for signature in signatures:
+            self.write_signature(signature)
+        return len(signatures)
+
 
 class Reader(ABC):
     @abstractmethod
-    def read_signature(self, signature_id: int) -> Signature:
+    def read_signature(
+        self, signature_id: int, columns: Optional[Sequence[str]] = None
+    ) -> Signature:
         raise NotImplementedError
 
     @abstractmethod
-    def read_project_standard(self, project_name: str) -> Signature:
+    def read_project_standard(
+        self, project_name: str, columns: Optional[Sequence[str]] = None
+    ) -> Signature:
         raise NotImplementedError
 
+    def read_signatures_history(
+        self,
+        project_name: str,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+        granularity: Optional[str] = None,
+    ) -> Iterator[SignatureRecord]:
+        """Stream signatures of the project uploaded in the time range, see SQLReader.
+
+        Not abstract, so readers written before history queries keep working without it.
+        """
+        raise NotImplementedError(
+            f"{type(self).__name__} can't read signatures history"
+        )
+
 
 class SQLWriter(SQLConnection, Writer):
-    def write_signature(self, signature: Signature) -> None:
+    def __init__(
+        self,
+        server_address,
+        table_name,
+        codec: str = DEFAULT_CODEC,
+        split_columns: bool = False,
+    ):
+        """
+        Args:
+            server_address: An address of the database server.
+            table_name: Signatures table name including schema.
+            codec: Codec used to compress new signatures, see compression.compress_blob().
+            split_columns: Store each column profile as a separate row, so readers can load a subset of columns.
+        """
+        super().__init__(server_address, table_name)
+        self.codec = codec
+        self.split_columns = split_columns
+
+    def _get_engine(self) -> Engine:
+        engine = super()._get_engine()
+        key = self._engine_key()
+        if self.split_columns and key not in _COLUMNS_TABLES:
+            # databases created by older versions have only the signatures table,
+            # the rest of the schema is added by upgrade_schema()
+            self.SQLColumnProfile.__table__.create(bind=engine, checkfirst=True)
+            _COLUMNS_TABLES.add(key)
+        return engine
+
+    @timed(DB_OPERATION_SECONDS, operation="write_signature")
+    def write_signature(self, signature: Signature) -> int:
+        """
+        Write signature to the database unless the project already has an identical one.
+
+        Args:
+            signature: signature to store.
+
+        Returns:
+            Id of the new signature or of the existing identical signature.
+        """
         data_for_uploading = self._prepare_signature_for_uploading(signature)
-        self._write_signature_to_db(data_for_uploading)
+        signature_item, _ = data_for_uploading
+        con = self._create_connection()
+        with con() as session:
+            duplicate_ids = self._find_duplicates(
+                session, signature_item.project_name, [signature_item.content_hash]
+            )
+            if duplicate_ids:
+                return duplicate_ids[signature_item.content_hash]
+            self._add_signature(session, data_for_uploading)
+            session.commit()
+            return signature_item.signature_id
+
+    def _find_duplicates(
+        self, session, project_name: str, content_hashes: Sequence[str]
+    ) -> Dict[str, int]:
+        # Helper returning ids of raw project signatures with the given content hashes
+        rows = session.query(
+            self.SQLSignature.content_hash, self.SQLSignature.signature_id
+        ).filter(
+            self.SQLSignature.project_name == project_name,
+            self.SQLSignature.content_hash.in_(content_hashes),
+            func.coalesce(self.SQLSignature.granularity, 0) == GRANULARITIES["raw"],
+        )
+        return {content_hash: signature_id for content_hash, signature_id in rows}
 
-    def _write_signature_to_db(self, data_for_uploading: SQLSignature) -> None:
+    def _write_signature_to_db(
+        self, data_for_uploading: Tuple[SQLSignature, List[SQLColumnProfile]]
+    ) -> None:
         """
         Helper for writing ready dictionary to the database.
 
         Args:
-            data_for_uploading: dictionary with artifactory table columns as keys.
+            data_for_uploading: signature row and rows of its separately stored columns.
         """
         con = self._create_connection()
         with con() as session:
-            session.add(data_for_uploading)
+            self._add_signature(session, data_for_uploading)
             session.commit()
-            session.refresh(data_for_uploading)
 
         return None
 
+    def _add_signature(
+        self, session, data_for_uploading: Tuple[SQLSignature, List[SQLColumnProfile]]
+    ) -> None:
+        # Helper for adding signature row and its column rows to the session
+        signature_item, column_items = data_for_uploading
+        session.add(signature_item)
+        if column_items:
+            session.flush()
+            for column_item in column_items:
+                column_item.signature_id = signature_item.signature_id
+            session.add_all(column_items)
+
+    @timed(DB_OPERATION_SECONDS, operation="write_signatures")
+    def write_signatures(
+        self,
+        signatures: Sequence[Signature],
+        upload_dates: Optional[Sequence[datetime.datetime]] = None,
+    ) -> int:
+        """
+        Write many signatures to the database in a single transaction.
+
+        Signatures identical to already stored ones or to each other are written once.
+
+        Args:
+            signatures: signatures to store, may belong to different projects.
+            upload_dates: upload dates of the signatures, e.g. when restoring an archive,
+                the current time by default.
+
+        Returns:
+            Number of written signatures, without the skipped duplicates.
+        """
+        if upload_dates is None:
+            upload_dates = [datetime.datetime.now()] * len(signatures)
+        unique_items: Dict[
+            Tuple[str, str], Tuple[SQLSignature, List[SQLColumnProfile]]
+        ] = {}
+        for signature, upload_date in zip(signatures, upload_dates):
+            item = self._prepare_signature_for_uploading(signature, upload_date)
+            unique_items.setdefault((item[0].project_name, item[0].content_hash), item)
+
+        con = self._create_connection()
+        with con() as session:
+            hashes_by_project: Dict[str, List[str]] = {}
+            for project_name, content_hash in unique_items:
+                hashes_by_project.setdefault(project_name, []).append(content_hash)
+            for project_name, content_hashes in hashes_by_project.items():
+                for content_hash in self._find_duplicates(
+                    session, project_name, content_hashes
+                ):
+                    del unique_items[(project_name, content_hash)]
+
+            data_for_uploading = list(unique_items.values())
+            if self.split_columns:
+                # column rows need ids of the signature rows
+                for item in data_for_uploading:
+                    self._add_signature(session, item)
+            else:
+                session.bulk_save_objects([item for item, _ in data_for_uploading])
+            session.commit()
+
+        return len(data_for_uploading)
+
+    @timed(DB_OPERATION_SECONDS, operation="update_standard")
     def update_standard(self, signature: Signature) -> None:
         """
         Helper for updating standard using ready dictionary to the database.
@@ -138,40 +551,198 @@ class SQLWriter(SQLConnection, Writer):
 
         """
         data_for_uploading = self._prepare_signature_for_uploading(signature)
-        data_for_uploading.is_standard = 1
+        signature_item, _ = data_for_uploading
+        signature_item.is_standard = 1
         con = self._create_connection()
         with con() as session:
             (
                 session.query(self.SQLSignature)
                 .filter(
-                    self.SQLSignature.project_name == data_for_uploading.project_name,
+                    self.SQLSignature.project_name == signature_item.project_name,
                     self.SQLSignature.is_standard == 1,
                 )
                 .update({"is_standard": 0})
             )
-            session.add(data_for_uploading)
+            self._add_signature(session, data_for_uploading)
+            session.commit()
+
+    @timed(DB_OPERATION_SECONDS, operation="write_rollup")
+    def write_rollup(
+        self, signature: Signature, period_start: datetime.datetime, granularity: str
+    ) -> None:
+        """
+        Write signature that merges all signatures of the project in the period.
+
+        Args:
+            signature: signature with the merged profile.
+            period_start: start of the period, stored as the upload date.
+            granularity: period length, one of GRANULARITIES except "raw".
+        """
+        signature_item, column_items = self._prepare_signature_for_uploading(signature)
+        signature_item.upload_date = period_start
+        signature_item.granularity = GRANULARITIES[granularity]
+        self._write_signature_to_db((signature_item, column_items))
+
+    @timed(DB_OPERATION_SECONDS, operation="delete_signatures")
+    def delete_signatures(
+        self,
+        project_name: str,
+        start: datetime.datetime,
+        end: datetime.datetime,
+        granularity: str = "raw",
+    ) -> int:
+        """
+        Delete signatures of the project uploaded in the time range, standards are never deleted.
+
+        Args:
+            project_name: A project name of the signatures.
+            start: Start of the time range, inclusive.
+            end: End of the time range, exclusive.
+            granularity: Granularity of the signatures to delete.
+
+        Returns:
+            Number of deleted signatures.
+        """
+        condition = and_(
+            self.SQLSignature.project_name == project_name,
+            self.SQLSignature.upload_date >= start,
+            self.SQLSignature.upload_date < end,
+            func.coalesce(self.SQLSignature.granularity, 0)
+            == GRANULARITIES[granularity],
+            func.coalesce(self.SQLSignature.is_standard, 0) == 0,
+        )
+        con = self._create_connection()
+        with con() as session:
+            signature_ids = session.query(self.SQLSignature.signature_id).filter(
+                condition
+            )
+            (
+                session.query(self.SQLColumnProfile)
+                .filter(self.SQLColumnProfile.signature_id.in_(signature_ids))
+                .delete(synchronize_session=False)
+            )
+            deleted = (
+                session.query(self.SQLSignature)
+                .filter(condition)
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+
+        return deleted
+
+    @timed(DB_OPERATION_SECONDS, operation="write_compare_job")
+    def write_compare_job(
+        self,
+        job_id: str,
+        status: str,
+        report: Optional[str] = None,
+        error: Optional[str] = None,
+    ) -> None:
+        """
+        Insert or replace state of a compare job, see jobs.CompareJobQueue.
+
+        Args:
+            job_id: Id of the job.
+            status: One of jobs.PENDING, jobs.DONE or jobs.FAILED.
+            report: JSON of the ComparingReport of a finished job.
+            error: Error of a failed job.
+        """
+        con = self._create_connection()
+        with con() as session:
+            session.merge(
+                self.SQLCompareJob(
+                    job_id=job_id,
+                    status=status,
+                    report=report,
+                    error=error,
+                    updated_date=datetime.datetime.now(),
+                )
+            )
             session.commit()
-            session.refresh(data_for_uploading)
 
-    def _prepare_signature_for_uploading(self, signature: Signature) -> SQLSignature:
-        proto_signature = signature.profile.to_protobuf().SerializeToString()
+    @timed(DB_OPERATION_SECONDS, operation="delete_compare_jobs")
+    def delete_compare_jobs(self, older_than: datetime.datetime) -> int:
+        """
+        Delete compare jobs last updated before the given date.
+
+        Returns:
+            Number of deleted jobs.
+        """
+        con = self._create_connection()
+        with con() as session:
+            deleted = (
+                session.query(self.SQLCompareJob)
+                .filter(self.SQLCompareJob.updated_date < older_than)
+                .delete(synchronize_session=False)
+            )
+            session.commit()
+
+        return deleted
+
+    def _prepare_signature_for_uploading(
+        self, signature: Signature, upload_date: Optional[datetime.datetime] = None
+    ) -> Tuple[SQLSignature, List[SQLColumnProfile]]:
+        message = profile_to_message(signature.profile)
+        column_items = []
+        if self.split_columns:
+            column_items = [
+                self.SQLColumnProfile(
+                    column_name=colname,
+                    column_binary=compress_blob(column.SerializeToString(), self.codec),
+                )
+                for colname, column in message.columns.items()
+            ]
+        content_hash = message_hash(message, signature.project_name)
+        if self.split_columns:
+            message.ClearField("columns")
+
         signature_item = self.SQLSignature(
             project_name=signature.project_name,
             is_standard=0,
-            signature_binary=proto_signature,
-            upload_date=datetime.datetime.now(),
+            signature_binary=compress_blob(message.SerializeToString(), self.codec),
+            upload_date=upload_date or datetime.datetime.now(),
+            granularity=GRANULARITIES["raw"],
+            content_hash=content_hash,
         )
 
-        return signature_item
+        return signature_item, column_items
 
 
 class SQLReader(SQLConnection, Reader):
-    def read_signature(self, signature_id: int) -> Signature:
+    @timed(DB_OPERATION_SECONDS, operation="read_signature")
+    def read_signature(
+        self, signature_id: int, columns: Optional[Sequence[str]] = None
+    ) -> Signature:
+        """
+        Read signature by its id.
+
+        Args:
+            signature_id: id of the signature in the signatures table.
+            columns: names of the columns to load, all columns are loaded by default.
+        """
         raw_signature = self._get_raw_signature_by_id(signature_id)
-        signature = self._parse_raw_signarture(raw_signature)
+        signature = self._parse_raw_signarture(raw_signature, columns)
         return signature
 
-    def read_project_standard(self, project_name: str) -> Signature:
+    def read_project_standard(
+        self, project_name: str, columns: Optional[Sequence[str]] = None
+    ) -> Signature:
+        return self.read_project_standard_record(project_name, columns).signature
+
+    @timed(DB_OPERATION_SECONDS, operation="read_project_standard_record")
+    def read_project_standard_record(
+        self, project_name: str, columns: Optional[Sequence[str]] = None
+    ) -> SignatureRecord:
+        """
+        Read standard of the project together with its id and content hash.
+
+        Args:
+            project_name: A project name of the standard.
+            columns: names of the columns to load, all columns are loaded by default.
+
+        Raises:
+            HTTPException: The project has no standard.
+        """
         con = self._create_connection()
         with con() as session:
             rawdata = (
@@ -187,7 +758,228 @@ class SQLReader(SQLConnection, Reader):
                     status_code=400,
                     detail=f"Standard for project {project_name} not found in the database",
                 )
-            return self._parse_raw_signarture(rawdata)
+            return self._to_record(rawdata, columns)
+
+    @timed(DB_OPERATION_SECONDS, operation="read_project_standard_id")
+    def read_project_standard_id(self, project_name: str) -> Optional[int]:
+        """
+        Read id of the project standard without loading the signature.
+
+        Args:
+            project_name: A project name of the standard.
+
+        Returns:
+            Id of the standard or None if the project has no standard.
+        """
+        con = self._create_connection()
+        with con() as session:
+            row = (
+                session.query(self.SQLSignature.signature_id)
+                .filter(
+                    self.SQLSignature.project_name == project_name,
+                    self.SQLSignature.is_standard == 1,
+                )
+                .first()
+            )
+        return row.signature_id if row else None
+
+    @timed(DB_OPERATION_SECONDS, operation="read_project_standard_records")
+    def read_project_standard_records(
+        self, project_names: Sequence[str]
+    ) -> Dict[str, SignatureRecord]:
+        """
+        Read standards of many projects in one query.
+
+        Args:
+            project_names: Project names of the standards.
+
+        Returns:
+            Standards by project name, projects without standard are omitted.
+        """
+        con = self._create_connection()
+        with con() as session:
+            rows = session.query(self.SQLSignature).filter(
+                self.SQLSignature.project_name.in_(project_names),
+                self.SQLSignature.is_standard == 1,
+            )
+            return {row.project_name: self._to_record(row) for row in rows}
+
+    @timed(DB_OPERATION_SECONDS, operation="read_project_standard_ids")
+    def read_project_standard_ids(self, project_names: Sequence[str]) -> Dict[str, int]:
+        """
+        Read ids of standards of many projects without loading the signatures.
+
+        Returns:
+            Standard ids by project name, projects without standard are omitted.
+        """
+        con = self._create_connection()
+        with con() as session:
+            rows = session.query(
+                self.SQLSignature.project_name, self.SQLSignature.signature_id
+            ).filter(
+                self.SQLSignature.project_name.in_(project_names),
+                self.SQLSignature.is_standard == 1,
+            )
+            return {project_name: signature_id for project_name, signature_id in rows}
+
+    @timed(DB_OPERATION_SECONDS, operation="read_compare_job")
+    def read_compare_job(self, job_id: str) -> Optional[CompareJobRecord]:
+        """
+        Read state of a compare job written by any server process.
+
+        Returns:
+            The job or None if it's unknown or already deleted.
+        """
+        con = self._create_connection()
+        with con() as session:
+            row = session.get(self.SQLCompareJob, job_id)
+            if row is None:
+                return None
+            return CompareJobRecord(
+                row.job_id, row.status, row.report, row.error, row.updated_date
+            )
+
+    def read_signatures_history(
+        self,
+        project_name: str,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+        columns: Optional[Sequence[str]] = None,
+        granularity: Optional[str] = None,
+        batch_size: int = 100,
+    ) -> Iterator[SignatureRecord]:
+        """
+        Stream all signatures of the project uploaded in the given time range, ordered by upload date.
+
+        Rows are fetched through a server-side cursor in batches, so only one batch of
+        signature blobs is held in memory at a time.
+
+        Args:
+            project_name: A project name of the signatures.
+            start: Start of the time range, inclusive. Unbounded by default.
+            end: End of the time range, exclusive. Unbounded by default.
+            columns: names of the columns to load, all columns are loaded by default.
+            granularity: Read only signatures of this granularity. By default every part of the range
+                is covered by the coarsest roll-ups available for it, and by raw signatures otherwise.
+            batch_size: Number of rows fetched from the database at once.
+
+        Yields:
+            SignatureRecord objects with signature id, upload date and the signature.
+        """
+        con = self._create_connection()
+        with con() as session:
+            range_condition = self._history_range_condition(project_name, start, end)
+            if granularity is None:
+                granularity_condition = self._coarsest_granularity_condition(
+                    session, range_condition
+                )
+            else:
+                granularity_condition = (
+                    func.coalesce(self.SQLSignature.granularity, 0)
+                    == GRANULARITIES[granularity]
+                )
+            query = (
+                session.query(self.SQLSignature)
+                .filter(range_condition, granularity_condition)
+                .order_by(self.SQLSignature.upload_date)
+                .execution_options(stream_results=True)
+                .yield_per(batch_size)
+            )
+            for raw_signature in query:
+                yield self._to_record(raw_signature, columns)
+
+    @timed(DB_OPERATION_SECONDS, operation="read_upload_dates")
+    def read_upload_dates(
+        self,
+        project_name: str,
+        start: Optional[datetime.datetime] = None,
+        end: Optional[datetime.datetime] = None,
+        granularity: str = "raw",
+    ) -> List[datetime.datetime]:
+        """Read upload dates of the project signatures without loading the signatures themselves."""
+        con = self._create_connection()
+        with con() as session:
+            rawdata = (
+                session.query(self.SQLSignature.upload_date)
+                .filter(
+                    self._history_range_condition(project_name, start, end),
+                    func.coalesce(self.SQLSignature.granularity, 0)
+                    == GRANULARITIES[granularity],
+                )
+                .order_by(self.SQLSignature.upload_date)
+                .all()
+            )
+
+        return [row.upload_date for row in rawdata]
+
+    def _history_range_condition(
+        self,
+        project_name: str,
+        start: Optional[datetime.datetime],
+        end: Optional[datetime.datetime],
+    ):
+        conditions = [self.SQLSignature.project_name == project_name]
+        if start is not None:
+            conditions.append(self.SQLSignature.upload_date >= start)
+        if end is not None:
+            conditions.append(self.SQLSignature.upload_date < end)
+        return and_(*conditions)
+
+    def _coarsest_granularity_condition(self, session, range_condition):
+        # Helper for selecting roll-ups from the coarsest to the finest granularity, skipping those
+        # that overlap already selected ones, and raw signatures not covered by any selected roll-up
+        level = func.coalesce(self.SQLSignature.granularity, 0)
+        rollups = (
+            session.query(self.SQLSignature.upload_date, self.SQLSignature.granularity)
+            .filter(range_condition, level > 0)
+            .all()
+        )
+        conditions = []
+        covered: List[Tuple[datetime.datetime, datetime.datetime]] = []
+        for granularity, value in sorted(GRANULARITIES.items(), key=lambda x: -x[1]):
+            # periods of the granularity are aligned, so a period overlaps [start, end)
+            # when it starts less than one period length before the end
+            max_length = _MAX_PERIOD_LENGTH[granularity]
+            not_covered = [
+                not_(
+                    and_(
+                        (
+                            self.SQLSignature.upload_date > start - max_length
+                            if max_length
+                            else self.SQLSignature.upload_date >= start
+                        ),
+                        self.SQLSignature.upload_date < end,
+                    )
+                )
+                for start, end in covered
+            ]
+            conditions.append(and_(level == value, *not_covered))
+
+            selected = [
+                period
+                for period in (
+                    get_period(row.upload_date, granularity)
+                    for row in rollups
+                    if row.granularity == value
+                )
+                if not any(
+                    period[0] < end and start < period[1] for start, end in covered
+                )
+            ]
+            covered = _merge_periods(covered + selected)
+        return or_(*conditions)
+
+    def _to_record(
+        self, raw_signature: SQLSignature, columns: Optional[Sequence[str]] = None
+    ) -> SignatureRecord:
+        return SignatureRecord(
+            raw_signature.signature_id,
+            raw_signature.upload_date,
+            self._parse_raw_signarture(raw_signature, columns),
+            GRANULARITY_NAMES[raw_signature.granularity or 0],
+            bool(raw_signature.is_standard),
+            raw_signature.content_hash,
+        )
 
     def _get_raw_signature_by_id(self, signature_id: int) -> SQLSignature:
         con = self._create_connection()
@@ -200,10 +992,58 @@ class SQLReader(SQLConnection, Reader):
 
         return rawdata
 
-    def _parse_raw_signarture(self, raw_signature: SQLSignature) -> Signature:
-        profile = DatasetProfile.from_protobuf_string(raw_signature.signature_binary)
+    def _get_raw_columns(
+        self, signature_id: int, columns: Optional[Sequence[str]] = None
+    ) -> List[SQLColumnProfile]:
+        con = self._create_connection()
+        with con() as session:
+            query = session.query(self.SQLColumnProfile).filter(
+                self.SQLColumnProfile.signature_id == signature_id
+            )
+            if columns is not None:
+                query = query.filter(self.SQLColumnProfile.column_name.in_(columns))
+            rawdata = query.all()
+
+        return rawdata
+
+    def _parse_raw_signarture(
+        self, raw_signature: SQLSignature, columns: Optional[Sequence[str]] = None
+    ) -> Signature:
+        message = DatasetProfileMessage.FromString(
+            decompress_blob(raw_signature.signature_binary)
+        )
+        if len(message.columns) == 0:
+            # signature was written with split columns, so they are stored in their own rows
+            for raw_column in self._get_raw_columns(
+                raw_signature.signature_id, columns
+            ):
+                message.columns[raw_column.column_name].MergeFromString(
+                    decompress_blob(raw_column.column_binary)
+                )
+        elif columns is not None:
+            for colname in set(message.columns.keys()) - set(columns):
+                del message.columns[colname]
+
+        profile = profile_from_message(message)
         return Signature(profile, raw_signature.project_name)
 
 
-def get_project_standard(project_name: str, reader: Reader) -> Signature:
-    return reader.read_project_standard(project_name)
+class SQLiteWriter(SQLiteConnection, SQLWriter):
+    pass
+
+
+class SQLiteReader(SQLiteConnection, SQLReader):
+    pass
+
+
+# Reader and Writer implementations by storage name, "sqlite" uses the server address as a path
+STORAGE_BACKENDS: Dict[str, Tuple[Type[SQLReader], Type[SQLWriter]]] = {
+    "mssql": (SQLReader, SQLWriter),
+    "sqlite": (SQLiteReader, SQLiteWriter),
+}
+
+
+def get_project_standard(
+    project_name: str, reader: Reader, columns: Optional[Sequence[str]] = None
+) -> Signature:
+    return reader.read_project_standard(project_name, columns)
@@ -6,10 +6,10 @@ from mlops_monitoring.client import (
     save_errors_report,
 )
 from mlops_monitoring.signature import new_signature
-import os
+from mlops_monitoring.credentials import KerberosTicketManager
 import datetime
 
-os.system("kinit -k -t /workspace/michaelle4.keytab michaelle4")
+KerberosTicketManager("kinit -k -t /workspace/michaelle4.keytab michaelle4").start()
 
 
 from sklearn_pandas.pipeline import make_transformer_pipeline
@@ -0,0 +1,179 @@
+import datetime
+import io
+from typing import Any, Dict, Iterator, List, Optional
+import numpy as np
+import pandas as pd
+from whylogs.core.datasetprofile import DatasetProfile, ColumnProfile
+from whylogs.proto import DatasetProfileMessage
+from mlops_monitoring.signature import Signature, profile_to_message
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class StreamingProfiler:
+    """Builds a signature from data that arrives in chunks.
+
+    Values are tracked column by column like in signature.new_signature(). Chunks may be
+    tracked here or profiled elsewhere by profile_chunk() and merged, then only the sketches,
+    e.g. quantiles and frequent items, depend on how the data was split into chunks.
+    """
+
+    def __init__(
+        self, project_name: str, timestamp: Optional[datetime.datetime] = None
+    ):
+        self.project_name = project_name
+        self.timestamp = timestamp or datetime.datetime.now()
+        self.rows = 0
+        self._columns: Dict[str, ColumnProfile] = {}
+
+    def track_dataframe(self, chunk: pd.DataFrame) -> None:
+        for col in chunk.columns:
+            colname = str(col)
+            if colname not in self._columns:
+                self._columns[colname] = ColumnProfile(colname, constraints=None)
+            column = self._columns[colname]
+            values = chunk[col]
+            if isinstance(values.dtype, pd.api.extensions.ExtensionDtype):
+                # missing values of nullable columns are pd.NA, whylogs expects None
+                values = values.astype(object).where(values.notna(), None)
+            for val in values.values:
+                column.track(val)
+        self.rows += len(chunk)
+
+    def merge_message(self, profile_bytes: bytes, rows: int) -> None:
+        """Merge a chunk profiled by profile_chunk().
+
+        Args:
+            profile_bytes: Serialized DatasetProfileMessage of the chunk.
+            rows: Number of rows of the chunk.
+        """
+        message = DatasetProfileMessage.FromString(profile_bytes)
+        for colname, column_message in message.columns.items():
+            column = ColumnProfile.from_protobuf(column_message)
+            if colname in self._columns:
+                column = self._columns[colname].merge(column)
+            self._columns[colname] = column
+        self.rows += rows
+
+    def to_signature(self) -> Signature:
+        profile = DatasetProfile(self.project_name, self.timestamp)
+        profile.columns = dict(self._columns)
+        return Signature(profile, self.project_name)
+
+
+def profile_chunk(chunk: pd.DataFrame, project_name: str) -> bytes:
+    """Profile a chunk of rows for StreamingProfiler.merge_message(), runs in a worker process.
+
+    Returns:
+        Serialized DatasetProfileMessage of the chunk.
+    """
+    profiler = StreamingProfiler(project_name)
+    profiler.track_dataframe(chunk)
+    return profile_to_message(profiler.to_signature().profile).SerializeToString()
+
+
+def _column_dtype(dtype: Any) -> Any:
+    # Helper choosing types that keep integer and boolean columns of later chunks with
+    # missing values from turning into floats and objects
+    if pd.api.types.is_bool_dtype(dtype):
+        return pd.BooleanDtype()
+    if pd.api.types.is_integer_dtype(dtype):
+        return pd.Int64Dtype()
+    return dtype
+
+
+def _widened_dtype(dtype: Any, other: Any) -> Any:
+    # Helper choosing a type that holds values of both types
+    numeric = [
+        pd.api.types.is_numeric_dtype(value) and not pd.api.types.is_bool_dtype(value)
+        for value in (dtype, other)
+    ]
+    return np.dtype(float) if all(numeric) else np.dtype(object)
+
+
+class CSVChunker:
+    """Splits CSV bytes arriving in arbitrary pieces into dataframes of complete rows.
+
+    Every dataframe is parsed from at most chunk_size bytes plus one row, so memory doesn't
+    depend on the size of the whole file. Column types are inferred from the first chunk and
+    used for the following ones, integer and boolean columns become nullable, so missing values
+    in later chunks don't change their types. A column is widened to float or object only when
+    a later chunk has values that don't fit its type. Quoted values must not contain line breaks.
+    """
+
+    def __init__(self, chunk_size: int = 8 * 1024 * 1024, **read_csv_kwargs):
+        """
+        Args:
+            chunk_size: Number of bytes collected before they are parsed.
+            read_csv_kwargs: Arguments passed to pandas.read_csv(), except header related ones.
+        """
+        self.chunk_size = chunk_size
+        self._read_csv_kwargs = read_csv_kwargs
+        self._header: Optional[bytes] = None
+        self._buffer = bytearray()
+        self._dtypes: Optional[Dict[str, Any]] = None
+
+    def feed(self, data: bytes) -> List[pd.DataFrame]:
+        """Add received bytes and return dataframes of the rows that are complete."""
+        self._buffer += data
+        if self._header is None:
+            end = self._buffer.find(b"\n")
+            if end < 0:
+                return []
+            self._header = bytes(self._buffer[: end + 1])
+            del self._buffer[: end + 1]
+
+        chunks = []
+        while len(self._buffer) >= self.chunk_size:
+            end = self._buffer.rfind(b"\n", 0, self.chunk_size)
+            if end < 0:
+                end = self._buffer.find(b"\n", self.chunk_size)
+            if end < 0:
+                break
+            chunks.append(self._parse(self._buffer[: end + 1]))
+            del self._buffer[: end + 1]
+        return chunks
+
+    def close(self) -> Optional[pd.DataFrame]:
+        """Parse the remaining rows, the last row may have no line break."""
+        if self._header is None:
+            self._header, self._buffer = bytes(self._buffer), bytearray()
+        if not self._buffer.strip():
+            return None
+        chunk = self._parse(self._buffer)
+        self._buffer = bytearray()
+        return chunk
+
+    def _parse(self, rows: bytearray) -> pd.DataFrame:
+        data = io.BytesIO(self._header + rows)
+        if self._dtypes is not None:
+            try:
+                return pd.read_csv(data, dtype=self._dtypes, **self._read_csv_kwargs)
+            except (TypeError, ValueError):
+                data.seek(0)
+        chunk = pd.read_csv(data, **self._read_csv_kwargs)
+        dtypes = {col: _column_dtype(dtype) for col, dtype in chunk.dtypes.items()}
+        if self._dtypes is None:
+            self._dtypes = dtypes
+        for col, dtype in dtypes.items():
+            if col in self._dtypes and not pd.api.types.is_dtype_equal(
+                dtype, self._dtypes[col]
+            ):
+                self._dtypes[col] = _widened_dtype(self._dtypes[col], dtype)
+        return chunk.astype(self._dtypes)
+
+
+def iter_parquet_batches(path: str, batch_size: int = 65536) -> Iterator[pd.DataFrame]:
+    """Read parquet file as dataframes of at most batch_size rows.
+
+    Raises:
+        ImportError: pyarrow is not installed.
+    """
+    if pq is None:
+        raise ImportError("Reading parquet requires pyarrow")
+    parquet_file = pq.ParquetFile(path)
+    for batch in parquet_file.iter_batches(batch_size=batch_size):
+        yield batch.to_pandas()
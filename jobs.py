@@ -0,0 +1,285 @@
+import asyncio
+import datetime
+import hashlib
+import json
+import logging
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+from fastapi import HTTPException
+from fastapi.concurrency import run_in_threadpool
+from mlops_monitoring.compare import ComparingReport
+from mlops_monitoring.cache import LRUCache
+from mlops_monitoring.data import CompareJobRecord, SQLReader, SQLWriter
+
+logger = logging.getLogger(__name__)
+
+PENDING = "pending"
+DONE = "done"
+FAILED = "failed"
+# error of jobs that were unfinished when the queue was closed
+CLOSED_ERROR = "Compare job queue was closed"
+# error of stored jobs that stayed pending for too long, e.g. because their process was killed
+ABANDONED_ERROR = "Compare job was abandoned"
+# seconds between reads of a job that runs in another process, while its poll waits
+POLL_INTERVAL = 0.5
+# seconds between deletions of old jobs from the database
+PRUNE_INTERVAL = 600
+
+
+class JobQueueFull(Exception):
+    """Too many jobs are waiting, the request should be retried later."""
+
+
+def compare_job_id(signature_key: str, standard_key: str) -> str:
+    """Return id of the job comparing a signature with a standard, given their content hashes.
+
+    Uploading the same signature again while the standard is unchanged gives the same id,
+    so retries reuse the running or finished job.
+    """
+    return hashlib.sha256(f"{signature_key}:{standard_key}".encode()).hexdigest()[:32]
+
+
+class CompareJob:
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = PENDING
+        self.report: Optional[ComparingReport] = None
+        self.error: Optional[str] = None
+        self._finished = asyncio.Event()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "report": self.report,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_record(cls, record: CompareJobRecord, stale_after: float) -> "CompareJob":
+        # Helper restoring a job stored by any process, jobs pending for more than
+        # stale_after seconds are treated as failed, so they are run again when resubmitted
+        job = cls(record.job_id)
+        job.status, job.error = record.status, record.error
+        if record.report is not None:
+            job.report = ComparingReport(*json.loads(record.report))
+        age = (datetime.datetime.now() - record.updated_date).total_seconds()
+        if job.status == PENDING and age > stale_after:
+            job.status, job.error = FAILED, ABANDONED_ERROR
+        if job.status != PENDING:
+            job._finished.set()
+        return job
+
+
+class CompareJobQueue:
+    """Runs compares in the background, so clients don't keep a request open while they run.
+
+    At most `workers` jobs run at once and at most max_pending jobs wait or run, further
+    submissions raise JobQueueFull. Finished jobs, including failed ones, are kept for
+    max_finished later submissions and polls. A failed job is run again when it's resubmitted.
+
+    With a writer and a reader, state of every job is stored in the jobs table of the database,
+    see data.SQLCompareJob, so polls and retries reaching another server process or a restarted
+    one find the job. Stored jobs are deleted max_age seconds after their last update.
+
+    The workers run in the event loop that calls start(), e.g. in a startup hook of the server.
+    """
+
+    def __init__(
+        self,
+        workers: int = 4,
+        max_pending: int = 1000,
+        max_finished: int = 10000,
+        writer: Optional[SQLWriter] = None,
+        reader: Optional[SQLReader] = None,
+        stale_after: float = 600,
+        max_age: float = 86400,
+    ):
+        """
+        Args:
+            workers: Number of jobs running concurrently.
+            max_pending: Maximal number of jobs that are not finished yet.
+            max_finished: Number of finished jobs kept in memory for polling and retries.
+            writer: Writer storing job state, jobs are kept only in memory without it.
+            reader: Reader of the same database, used for jobs that are not in memory.
+            stale_after: Seconds after which a stored job that is still pending is treated as failed.
+            max_age: Seconds after which stored jobs are deleted.
+        """
+        self.workers = workers
+        self.max_pending = max_pending
+        self.writer = writer
+        self.reader = reader
+        self.stale_after = stale_after
+        self.max_age = max_age
+        self._pending: Dict[str, CompareJob] = {}
+        self._finished = LRUCache(maxsize=max_finished)
+        # queue and workers are created by start() to be bound to the running event loop
+        self._queue: Optional[
+            "asyncio.Queue[Tuple[CompareJob, Callable[[], Awaitable[ComparingReport]]]]"
+        ] = None
+        self._tasks: List["asyncio.Task[None]"] = []
+        self._pruned = time.monotonic()
+
+    @property
+    def depth(self) -> int:
+        """Number of jobs that are waiting or running."""
+        return len(self._pending)
+
+    def get(self, job_id: str) -> Optional[CompareJob]:
+        """Return the job if it was submitted to this queue and is still in memory."""
+        job = self._pending.get(job_id)
+        return job if job is not None else self._finished.get(job_id)
+
+    async def load(self, job_id: str) -> Optional[CompareJob]:
+        """Return the job from memory or, if it's not there, from the database.
+
+        Returns:
+            The job or None if it's unknown.
+        """
+        job = self.get(job_id)
+        if job is not None or self.reader is None:
+            return job
+        record = await run_in_threadpool(self.reader.read_compare_job, job_id)
+        if record is None:
+            return None
+        job = CompareJob.from_record(record, self.stale_after)
+        if job.status == DONE:
+            # reports of finished jobs never change
+            self._finished.put(job_id, job)
+        return job
+
+    async def submit(
+        self, job_id: str, run: Callable[[], Awaitable[ComparingReport]]
+    ) -> CompareJob:
+        """Start a job unless a job with the same id is running or has succeeded.
+
+        Args:
+            job_id: Id of the job, see compare_job_id().
+            run: Coroutine function producing the report.
+
+        Returns:
+            The new job or the existing job with the same id.
+
+        Raises:
+            JobQueueFull: max_pending jobs are not finished yet.
+            RuntimeError: The queue is not started.
+        """
+        job = await self.load(job_id)
+        if job is not None and job.status != FAILED:
+            return job
+        job = self.get(job_id)
+        if job is not None and job.status == PENDING:
+            # submitted by a concurrent request while the job was loaded
+            return job
+        if self._queue is None:
+            raise RuntimeError("Compare job queue is not started")
+        if len(self._pending) >= self.max_pending:
+            raise JobQueueFull(job_id)
+        job = CompareJob(job_id)
+        self._pending[job_id] = job
+        try:
+            await self._store(job)
+        except BaseException:
+            self._pending.pop(job_id, None)
+            raise
+        self._queue.put_nowait((job, run))
+        return job
+
+    async def wait(self, job_id: str, timeout: float) -> Optional[CompareJob]:
+        """Return the job as soon as it's finished or after timeout seconds.
+
+        Jobs running in another process are read from the database every POLL_INTERVAL seconds.
+
+        Returns:
+            The job, possibly still pending, or None if the job is unknown.
+        """
+        deadline = time.monotonic() + timeout
+        job = await self.load(job_id)
+        while job is not None and job.status == PENDING:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            if self.get(job_id) is job:
+                try:
+                    await asyncio.wait_for(job._finished.wait(), remaining)
+                except asyncio.TimeoutError:
+                    pass
+                break
+            await asyncio.sleep(min(POLL_INTERVAL, remaining))
+            job = await self.load(job_id)
+        return job
+
+    def start(self) -> None:
+        """Start the workers in the running event loop."""
+        if self._queue is not None:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._tasks = [loop.create_task(self._work()) for _ in range(self.workers)]
+
+    async def close(self) -> None:
+        """Stop the workers, unfinished jobs fail and are run again when resubmitted."""
+        unfinished = list(self._pending.values())
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+        for job in unfinished:
+            job.status = FAILED
+            job.error = CLOSED_ERROR
+            self._finished.put(job.job_id, job)
+            job._finished.set()
+            await self._store_safely(job)
+        self._pending.clear()
+
+    async def _store(self, job: CompareJob) -> None:
+        # Helper writing job state to the database, if the queue has a writer
+        if self.writer is None:
+            return
+        report = json.dumps(job.report) if job.report is not None else None
+        await run_in_threadpool(
+            self.writer.write_compare_job, job.job_id, job.status, report, job.error
+        )
+
+    async def _store_safely(self, job: CompareJob) -> None:
+        # Helper for finished jobs, their result is still answered from memory if it isn't stored
+        try:
+            await self._store(job)
+        except Exception:
+            logger.exception(f"State of compare job {job.job_id} was not stored")
+
+    async def _prune(self) -> None:
+        # Helper deleting stored jobs older than max_age every PRUNE_INTERVAL seconds
+        if self.writer is None or time.monotonic() - self._pruned < PRUNE_INTERVAL:
+            return
+        self._pruned = time.monotonic()
+        older_than = datetime.datetime.now() - datetime.timedelta(seconds=self.max_age)
+        try:
+            await run_in_threadpool(self.writer.delete_compare_jobs, older_than)
+        except Exception:
+            logger.exception("Old compare jobs were not deleted")
+
+    async def _work(self) -> None:
+        while True:
+            job, run = await self._queue.get()
+            try:
+                job.report = await run()
+                job.status = DONE
+            except HTTPException as e:
+                job.status = FAILED
+                job.error = str(e.detail)
+            except asyncio.CancelledError:
+                # close() marks and stores the job as failed
+                self._queue.task_done()
+                raise
+            except Exception as e:
+                logger.exception(f"Compare job {job.job_id} failed")
+                job.status = FAILED
+                job.error = f"{type(e).__name__}: {e}"
+            self._finished.put(job.job_id, job)
+            self._pending.pop(job.job_id, None)
+            job._finished.set()
+            self._queue.task_done()
+            await self._store_safely(job)
+            await self._prune()
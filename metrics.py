@@ -1,11 +1,18 @@
 import numpy as np
 import pandas as pd
 from dataclasses import dataclass
-from typing import Tuple, NamedTuple, Dict, NewType, Union
+from typing import Any, Tuple, NamedTuple, Dict, NewType, Union
 from scipy.stats.stats import _attempt_exact_2kssamp
 from scipy.stats import distributions
 from math import gcd
 from sklearn.metrics import normalized_mutual_info_score
+from whylogs.core.datasetprofile import (
+    SCALAR_NAME_MAPPING,
+    flatten_dataset_quantiles,
+    flatten_summary,
+    remap,
+)
+from whylogs.proto import DatasetSummary
 
 from mlops_monitoring.signature import Signature
 
@@ -210,8 +217,28 @@ def get_cdfs(
     return bins, cdf_standard, cdf_signature
 
 
+def get_column_flat_summary(signature: Signature, colname: str) -> Dict[str, Any]:
+    """Flat summary of a single column, in the same format as DatasetProfile.flat_summary().
+
+    Summarizing only the needed column avoids building profiles of all other columns.
+    """
+    column_summary = signature.profile.columns[colname].to_summary()
+    summary = DatasetSummary(
+        properties=signature.profile.to_properties(), columns={colname: column_summary}
+    )
+    flat_summary = flatten_summary(summary)
+    # pandas sorts fields of a single column frame, keep the order of flat_summary()
+    fields = [
+        "column",
+        *remap(column_summary, SCALAR_NAME_MAPPING),
+        *flatten_dataset_quantiles(summary).get(colname, {}),
+    ]
+    flat_summary["summary"] = flat_summary["summary"][fields]
+    return flat_summary
+
+
 def get_category_pmf(signature: Signature, colname: str) -> Dict[str, float]:
-    counts = signature.profile.flat_summary()["frequent_strings"][colname]
+    counts = get_column_flat_summary(signature, colname)["frequent_strings"][colname]
     total_sum = sum(counts.values())
     return {k: v / total_sum for k, v in counts.items()}
 
@@ -220,15 +247,15 @@ def get_histogram_bins(
     signature: Signature, standard: Signature, colname: str, n_bins: int
 ) -> np.ndarray:
 
-    standard_summary = standard.profile.flat_summary()["summary"]
-    signature_summary = signature.profile.flat_summary()["summary"]
+    standard_summary = get_column_flat_summary(standard, colname)["summary"]
+    signature_summary = get_column_flat_summary(signature, colname)["summary"]
     min_range = min(
-        standard_summary.query("column == @colname")["min"].values[0],
-        signature_summary.query("column == @colname")["min"].values[0],
+        standard_summary["min"].values[0],
+        signature_summary["min"].values[0],
     )
     max_range = max(
-        standard_summary.query("column == @colname")["max"].values[0],
-        signature_summary.query("column == @colname")["max"].values[0],
+        standard_summary["max"].values[0],
+        signature_summary["max"].values[0],
     )
 
     bins = np.linspace(min_range, max_range, n_bins)
@@ -247,7 +274,7 @@ def create_column_summary_comparison(
 
 def extract_column_summary(signature: Signature, colname: str) -> pd.Series:
     """Extract column summary from the signature and reshape it to the long form."""
-    signature_summary = signature.profile.flat_summary()["summary"].assign(
+    signature_summary = get_column_flat_summary(signature, colname)["summary"].assign(
         null_rate=lambda x: x.type_null_count / x["count"]
     )
     column_summary = (
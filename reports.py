@@ -0,0 +1,294 @@
+import atexit
+import datetime
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, List, NamedTuple, Optional, Sequence
+from urllib.parse import quote
+import pandas as pd
+from mlops_monitoring.compare import ComparingReport
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+# one "Metric Name (value)" entry of the strings in ComparingReport stats
+_METRIC_PATTERN = re.compile(r"([^,()]+?) \(([^()]*)\)")
+
+
+class ReportRow(NamedTuple):
+    report_id: str
+    report_time: datetime.datetime
+    project_name: str
+    message: str
+    column: Optional[str]
+    metric: Optional[str]
+    value: Optional[float]
+    passed: bool
+
+
+def _parse_metrics(stats: Optional[str]) -> Dict[str, Optional[float]]:
+    # Helper parsing a string written by compare.metrics_to_string()
+    metrics = {}
+    for name, value in _METRIC_PATTERN.findall(stats or ""):
+        try:
+            metrics[name.strip()] = float(value)
+        except ValueError:
+            metrics[name.strip()] = None
+    return metrics
+
+
+def report_rows(
+    report: ComparingReport, report_time: Optional[datetime.datetime] = None
+) -> List[ReportRow]:
+    """Split comparing report into one row per column and metric.
+
+    Reports without column stats, e.g. when columns of the signature and the standard differ,
+    give a single failed row without column and metric.
+
+    Args:
+        report: A ComparingReport object.
+        report_time: Time of the report, now by default.
+
+    Returns:
+        Rows of the report, all with the same report_id.
+    """
+    report_id = uuid.uuid4().hex
+    report_time = report_time or datetime.datetime.now()
+    if not report.all_columns_stats:
+        return [
+            ReportRow(
+                report_id,
+                report_time,
+                report.project_name,
+                report.message,
+                None,
+                None,
+                None,
+                False,
+            )
+        ]
+    failed_columns = report.failed_columns_stats or {}
+    rows = []
+    for column, stats in report.all_columns_stats.items():
+        failed = _parse_metrics(failed_columns.get(column))
+        for metric, value in _parse_metrics(stats).items():
+            rows.append(
+                ReportRow(
+                    report_id,
+                    report_time,
+                    report.project_name,
+                    report.message,
+                    column,
+                    metric,
+                    value,
+                    metric not in failed,
+                )
+            )
+    return rows
+
+
+def _report_schema() -> "pa.Schema":
+    return pa.schema(
+        [
+            ("report_id", pa.string()),
+            ("report_time", pa.timestamp("ms")),
+            ("project_name", pa.string()),
+            ("message", pa.string()),
+            ("column", pa.string()),
+            ("metric", pa.string()),
+            ("value", pa.float64()),
+            ("passed", pa.bool_()),
+        ]
+    )
+
+
+def _partition_dir(root: str, project_name: str, date: datetime.date) -> str:
+    return os.path.join(
+        root, f"project={quote(project_name, safe='')}", f"date={date.isoformat()}"
+    )
+
+
+class ParquetReportSink:
+    """Appends comparing reports to a parquet dataset for analysis across projects and months.
+
+    Reports are split by report_rows() and buffered, every flush writes one new file into each
+    project=<name>/date=<YYYY-MM-DD> partition it touches. Files are never rewritten, so the
+    dataset may be read, e.g. by most_failed_columns(), while reports are added. Reports still
+    buffered when the interpreter exits are written unless flush_on_exit is False.
+    """
+
+    def __init__(self, root: str, batch_size: int = 10000, flush_on_exit: bool = True):
+        """
+        Args:
+            root: Root directory of the dataset, created if it doesn't exist.
+            batch_size: Number of buffered rows that triggers a flush.
+            flush_on_exit: Close the sink when the interpreter exits, writing buffered reports.
+
+        Raises:
+            ImportError: pyarrow is not installed.
+        """
+        if pa is None:
+            raise ImportError("Parquet report sink requires pyarrow")
+        self.root = root
+        self.batch_size = batch_size
+        self._rows: List[ReportRow] = []
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+        self._flush_on_exit = flush_on_exit
+        if flush_on_exit:
+            atexit.register(self.close)
+
+    def add(
+        self, report: ComparingReport, report_time: Optional[datetime.datetime] = None
+    ) -> None:
+        """Buffer the report, it's written on the next flush.
+
+        Args:
+            report: A ComparingReport object.
+            report_time: Time of the report, now by default.
+        """
+        rows = report_rows(report, report_time)
+        with self._lock:
+            self._rows.extend(rows)
+            full = len(self._rows) >= self.batch_size
+        if full:
+            self.flush()
+
+    def flush(self) -> None:
+        """Write buffered reports."""
+        with self._lock:
+            rows, self._rows = self._rows, []
+        partitions: Dict[str, List[ReportRow]] = {}
+        for row in rows:
+            path = _partition_dir(self.root, row.project_name, row.report_time.date())
+            partitions.setdefault(path, []).append(row)
+        for path, partition_rows in partitions.items():
+            self._write(path, partition_rows)
+
+    def close(self) -> None:
+        self.flush()
+        if self._flush_on_exit:
+            atexit.unregister(self.close)
+
+    def __enter__(self) -> "ParquetReportSink":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    @staticmethod
+    def _write(path: str, rows: List[ReportRow]) -> None:
+        # Helper writing a new file atomically, readers skip files starting with a dot
+        os.makedirs(path, exist_ok=True)
+        table = pa.Table.from_pydict(
+            {
+                field: [getattr(row, field) for row in rows]
+                for field in ReportRow._fields
+            },
+            schema=_report_schema(),
+        )
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}.parquet"
+        temporary_path = os.path.join(path, f".{name}.tmp")
+        try:
+            pq.write_table(table, temporary_path)
+            os.replace(temporary_path, os.path.join(path, name))
+        except BaseException:
+            # a failed write must not leave the temporary file behind
+            try:
+                os.remove(temporary_path)
+            except OSError:
+                pass
+            raise
+
+
+def _report_files(
+    root: str, since: datetime.date, project_names: Optional[Sequence[str]]
+) -> List[str]:
+    # Helper pruning partitions by directory names before any file is opened
+    if project_names is not None:
+        project_dirs = [f"project={quote(name, safe='')}" for name in project_names]
+    else:
+        project_dirs = [
+            name for name in os.listdir(root) if name.startswith("project=")
+        ]
+    files = []
+    for project_dir in project_dirs:
+        project_path = os.path.join(root, project_dir)
+        if not os.path.isdir(project_path):
+            continue
+        for date_dir in os.listdir(project_path):
+            if date_dir.startswith("date=") and date_dir[5:] >= since.isoformat():
+                date_path = os.path.join(project_path, date_dir)
+                files.extend(
+                    os.path.join(date_path, name)
+                    for name in os.listdir(date_path)
+                    if name.endswith(".parquet") and not name.startswith(".")
+                )
+    return files
+
+
+def most_failed_columns(
+    root: str,
+    days: int = 30,
+    project_names: Optional[Sequence[str]] = None,
+    top: Optional[int] = 20,
+    today: Optional[datetime.date] = None,
+) -> pd.DataFrame:
+    """Find columns that failed in the most reports during the last days.
+
+    Only partitions of the requested projects and days are read, and only the columns needed
+    for counting.
+
+    Args:
+        root: Root directory of a dataset written by ParquetReportSink.
+        days: Number of days to look back, including today.
+        project_names: Projects to include, all projects by default.
+        top: Number of returned columns, all columns if None.
+        today: Last day of the period, today by default.
+
+    Returns:
+        A dataframe with columns project_name, column, failed_reports, reports and failure_rate,
+        sorted by failed_reports in descending order.
+
+    Raises:
+        ImportError: pyarrow is not installed.
+    """
+    if pa is None:
+        raise ImportError("Reading reports requires pyarrow")
+    since = (today or datetime.date.today()) - datetime.timedelta(days=days - 1)
+    result_columns = [
+        "project_name",
+        "column",
+        "failed_reports",
+        "reports",
+        "failure_rate",
+    ]
+    files = _report_files(root, since, project_names)
+    if not files:
+        return pd.DataFrame(columns=result_columns)
+
+    start = datetime.datetime.combine(since, datetime.time())
+    table = ds.dataset(files, schema=_report_schema(), format="parquet").to_table(
+        columns=["report_id", "project_name", "column", "passed"],
+        filter=(ds.field("report_time") >= pa.scalar(start, pa.timestamp("ms")))
+        & ds.field("column").is_valid(),
+    )
+    rows = table.to_pandas()
+    rows["failed"] = ~rows["passed"]
+    # a column fails in a report if any of its metrics failed
+    per_report = rows.groupby(["project_name", "column", "report_id"])["failed"].any()
+    counts = per_report.groupby(["project_name", "column"]).agg(["sum", "count"])
+    counts.columns = ["failed_reports", "reports"]
+    counts = counts.reset_index()
+    counts["failed_reports"] = counts["failed_reports"].astype(int)
+    counts["failure_rate"] = counts["failed_reports"] / counts["reports"]
+    counts = counts[counts["failed_reports"] > 0].sort_values(
+        ["failed_reports", "failure_rate"], ascending=False, ignore_index=True
+    )
+    return counts[result_columns] if top is None else counts[result_columns].head(top)
@@ -0,0 +1,156 @@
+import argparse
+import datetime
+import logging
+import os
+from typing import Dict, Optional
+from dotenv import load_dotenv
+from mlops_monitoring.signature import Signature
+from mlops_monitoring.data import (
+    SQLReader,
+    SQLWriter,
+    STORAGE_BACKENDS,
+    get_period,
+)
+
+logger = logging.getLogger(__name__)
+
+# Roll-ups of each granularity are merged from signatures of these granularities.
+# Weeks cross month boundaries, so months are built from days as well.
+ROLLUP_SOURCES = {"day": "raw", "week": "day", "month": "day"}
+
+# Age after which signatures are compacted into roll-ups of the granularity
+DEFAULT_RETENTION = {
+    "day": datetime.timedelta(days=7),
+    "week": datetime.timedelta(days=35),
+    "month": datetime.timedelta(days=180),
+}
+
+
+def compact_signatures(
+    reader: SQLReader,
+    writer: SQLWriter,
+    project_name: str,
+    granularity: str,
+    older_than: datetime.datetime,
+    delete_sources: bool = False,
+) -> int:
+    """Merge project signatures into roll-ups for every complete period before the given date.
+
+    Periods that already have a roll-up are skipped, so the job can be run repeatedly.
+    Standards are merged like other signatures but never deleted.
+
+    Args:
+        reader: A reader of the signatures table.
+        writer: A writer of the same signatures table.
+        project_name: A project name of the signatures to compact.
+        granularity: Roll-up granularity, one of "day", "week" or "month".
+        older_than: Only periods that end before this date are compacted.
+        delete_sources: Delete the merged signatures after their roll-up is written.
+
+    Returns:
+        Number of written roll-ups.
+    """
+    source = ROLLUP_SOURCES[granularity]
+    cutoff, _ = get_period(older_than, granularity)
+    compacted_periods = set(
+        reader.read_upload_dates(project_name, end=cutoff, granularity=granularity)
+    )
+
+    rollup_periods = []
+    period, merged_profile = None, None
+    for record in reader.read_signatures_history(
+        project_name, end=cutoff, granularity=source
+    ):
+        record_period = get_period(record.upload_date, granularity)
+        if record_period[0] in compacted_periods:
+            continue
+        if record_period != period:
+            if merged_profile is not None:
+                writer.write_rollup(
+                    Signature(merged_profile, project_name), period[0], granularity
+                )
+                rollup_periods.append(period)
+            period, merged_profile = record_period, record.signature.profile
+        else:
+            merged_profile = merged_profile.merge(record.signature.profile)
+
+    if merged_profile is not None:
+        writer.write_rollup(
+            Signature(merged_profile, project_name), period[0], granularity
+        )
+        rollup_periods.append(period)
+
+    # signatures are deleted only after the cursor over them is closed
+    if delete_sources:
+        for start, end in rollup_periods:
+            deleted = writer.delete_signatures(project_name, start, end, source)
+            logger.info(
+                f"{project_name}: {granularity} roll-up for {start} replaced {deleted} signatures"
+            )
+
+    return len(rollup_periods)
+
+
+def compact_project(
+    reader: SQLReader,
+    writer: SQLWriter,
+    project_name: str,
+    now: Optional[datetime.datetime] = None,
+    retention: Dict[str, datetime.timedelta] = DEFAULT_RETENTION,
+    delete_sources: bool = False,
+) -> Dict[str, int]:
+    """Compact project signatures into daily, weekly and monthly roll-ups according to their age.
+
+    With delete_sources raw signatures are deleted once they are merged into days, and days once
+    they are merged into months. Weeks are kept, they're used for ranges that months don't cover.
+
+    Args:
+        reader: A reader of the signatures table.
+        writer: A writer of the same signatures table.
+        project_name: A project name of the signatures to compact.
+        now: Current time, signatures ages are calculated relative to it.
+        retention: Age after which signatures are compacted into roll-ups of each granularity.
+        delete_sources: Delete signatures replaced by roll-ups.
+
+    Returns:
+        Number of written roll-ups per granularity.
+    """
+    now = now or datetime.datetime.now()
+    return {
+        granularity: compact_signatures(
+            reader,
+            writer,
+            project_name,
+            granularity,
+            now - retention[granularity],
+            delete_sources and granularity != "week",
+        )
+        for granularity in ("day", "week", "month")
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Compact old signatures into daily, weekly and monthly roll-ups."
+    )
+    parser.add_argument("projects", nargs="+", help="Project names to compact")
+    parser.add_argument(
+        "--delete", action="store_true", help="Delete signatures replaced by roll-ups"
+    )
+    args = parser.parse_args()
+
+    load_dotenv()
+    reader_class, writer_class = STORAGE_BACKENDS[
+        os.environ.get("SIGNATURES_STORAGE", "mssql")
+    ]
+    reader = reader_class(os.environ["SQL_SERVER"], os.environ["SIGNATURES_TABLE"])
+    writer = writer_class(os.environ["SQL_SERVER"], os.environ["SIGNATURES_TABLE"])
+    for project_name in args.projects:
+        written = compact_project(
+            reader, writer, project_name, delete_sources=args.delete
+        )
+        print(f"{project_name}: {written}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,148 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, HTTPException, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from fastapi.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from mlops_monitoring.signature import Signature, parse_profile, signature_to_dict
-from mlops_monitoring.data import SQLWriter, SQLReader, get_project_standard
-from mlops_monitoring.compare import compare_signatures
+from google.protobuf.message import DecodeError
+from mlops_monitoring.signature import (
+    Signature,
+    message_hash,
+    profile_to_message,
+    signature_to_dict,
+)
+from mlops_monitoring.data import (
+    SQLWriter,
+    SQLReader,
+    STORAGE_BACKENDS,
+    SignatureRecord,
+    Writer,
+    pool_status,
+)
+from mlops_monitoring.compare import STANDARD_NOT_FOUND_MESSAGE, ComparingReport
+from mlops_monitoring.compare_pool import ComparePool, signature_from_bytes
+from mlops_monitoring.archive import iter_records
+from mlops_monitoring.ingest import (
+    CSVChunker,
+    StreamingProfiler,
+    iter_parquet_batches,
+    pq,
+)
+from mlops_monitoring.transport import (
+    NDJSON_MEDIA_TYPE,
+    PROJECT_NAME_HEADER,
+    PROTOBUF_MEDIA_TYPE,
+    body_decoder,
+    choose_encoding,
+    decode_body,
+    encode_body,
+    etag_matches,
+    standard_etag,
+)
+from mlops_monitoring.write_queue import WriteBehindQueue
+from mlops_monitoring.cache import LRUCache, StandardCache
+from mlops_monitoring.credentials import KerberosTicketManager
+from mlops_monitoring.admission import AdmissionControlMiddleware, AdmissionController
+from mlops_monitoring.jobs import (
+    FAILED,
+    PENDING,
+    CompareJob,
+    CompareJobQueue,
+    JobQueueFull,
+    compare_job_id,
+)
+from mlops_monitoring.telemetry import (
+    PROMETHEUS_MEDIA_TYPE,
+    REGISTRY,
+    SIZE_BUCKETS,
+    MetricsMiddleware,
+    counter,
+    gauge,
+    histogram,
+)
 from dotenv import load_dotenv
+from contextlib import contextmanager
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+)
 import uvicorn
+import pandas as pd
+import asyncio
+import json
+import logging
+import tempfile
+import time
 import os
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 SQL_SERVER = os.environ["SQL_SERVER"]
 SIGNATURES_TABLE = os.environ["SIGNATURES_TABLE"]
+# "mssql" for the production database or "sqlite" to use SQL_SERVER as a path to a local file
+SIGNATURES_STORAGE = os.environ.get("SIGNATURES_STORAGE", "mssql")
+SignatureReader, SignatureWriter = STORAGE_BACKENDS[SIGNATURES_STORAGE]
+# add tables, columns and indexes missing in databases created by older versions on startup,
+# see SQLConnection.upgrade_schema(), disable it if the server's account can't run DDL
+UPGRADE_SCHEMA = os.environ.get("UPGRADE_SCHEMA", "1") == "1"
+# store every column profile in its own row, so partial reads don't fetch the whole signature
+SPLIT_SIGNATURE_COLUMNS = os.environ.get("SPLIT_SIGNATURE_COLUMNS", "0") == "1"
+# new signatures are written in background batches, so clients don't wait for the INSERT;
+# clients are answered before their signatures are stored, so it requires WRITE_BEHIND_SPILL_PATH
+WRITE_BEHIND = os.environ.get("WRITE_BEHIND", "0") == "1"
+WRITE_BEHIND_BATCH_SIZE = int(os.environ.get("WRITE_BEHIND_BATCH_SIZE", "100"))
+WRITE_BEHIND_FLUSH_INTERVAL = float(
+    os.environ.get("WRITE_BEHIND_FLUSH_INTERVAL", "1.0")
+)
+# batches that fail to be written are appended to this signature archive
+WRITE_BEHIND_SPILL_PATH = os.environ.get("WRITE_BEHIND_SPILL_PATH", "") or None
+# number of comparing reports kept for repeated uploads of identical signatures
+REPORT_CACHE_SIZE = int(os.environ.get("REPORT_CACHE_SIZE", "1024"))
+# parsed standards are reused, their ids are checked against the DB every STANDARD_CACHE_TTL seconds
+STANDARD_CACHE_SIZE = int(os.environ.get("STANDARD_CACHE_SIZE", "128"))
+STANDARD_CACHE_TTL = float(os.environ.get("STANDARD_CACHE_TTL", "60"))
+# raw uploads of /profile_and_compare/ are profiled in chunks of this many bytes (CSV) or rows (parquet)
+PROFILE_CHUNK_SIZE = int(os.environ.get("PROFILE_CHUNK_SIZE", str(8 * 1024 * 1024)))
+PROFILE_PARQUET_BATCH_SIZE = int(os.environ.get("PROFILE_PARQUET_BATCH_SIZE", "65536"))
+# profiles are parsed and compared by COMPARE_WORKERS processes (number of CPUs by default,
+# 0 for threads), at most COMPARE_CONCURRENCY tasks are submitted at once
+COMPARE_WORKERS = (
+    int(os.environ["COMPARE_WORKERS"]) if "COMPARE_WORKERS" in os.environ else None
+)
+COMPARE_CONCURRENCY = int(os.environ.get("COMPARE_CONCURRENCY", "0"))
+# compares of /jobs/ endpoints run in the background, COMPARE_JOB_WORKERS at once; at most
+# COMPARE_JOB_QUEUE_SIZE jobs may be unfinished and COMPARE_JOB_RESULTS finished jobs are kept
+COMPARE_JOB_WORKERS = int(os.environ.get("COMPARE_JOB_WORKERS", "4"))
+COMPARE_JOB_QUEUE_SIZE = int(os.environ.get("COMPARE_JOB_QUEUE_SIZE", "1000"))
+COMPARE_JOB_RESULTS = int(os.environ.get("COMPARE_JOB_RESULTS", "10000"))
+# job state is stored in the jobs table, so any server process answers polls, and deleted
+# COMPARE_JOB_RETENTION seconds after the last update; jobs pending for COMPARE_JOB_STALE_AFTER
+# seconds, e.g. of a killed process, are run again when resubmitted
+COMPARE_JOB_RETENTION = float(os.environ.get("COMPARE_JOB_RETENTION", "86400"))
+COMPARE_JOB_STALE_AFTER = float(os.environ.get("COMPARE_JOB_STALE_AFTER", "600"))
+# long polls of a job are answered after at most this many seconds, keep it below proxy timeouts
+COMPARE_JOB_MAX_WAIT = float(os.environ.get("COMPARE_JOB_MAX_WAIT", "20"))
+# every endpoint processes at most ADMISSION_*_CONCURRENCY requests at once and queues at most
+# ADMISSION_*_QUEUE more for ADMISSION_QUEUE_TIMEOUT seconds, the rest is rejected with 429/503;
+# HEAVY limits apply to uploads and compares, LIGHT limits to the other endpoints
+ADMISSION_HEAVY_CONCURRENCY = int(os.environ.get("ADMISSION_HEAVY_CONCURRENCY", "16"))
+ADMISSION_HEAVY_QUEUE = int(os.environ.get("ADMISSION_HEAVY_QUEUE", "32"))
+ADMISSION_LIGHT_CONCURRENCY = int(os.environ.get("ADMISSION_LIGHT_CONCURRENCY", "64"))
+ADMISSION_LIGHT_QUEUE = int(os.environ.get("ADMISSION_LIGHT_QUEUE", "256"))
+# all heavy endpoints together process at most ADMISSION_HEAVY_TOTAL_CONCURRENCY requests and
+# queue at most ADMISSION_HEAVY_TOTAL_QUEUE, so light endpoints are not starved, 0 disables it
+ADMISSION_HEAVY_TOTAL_CONCURRENCY = int(
+    os.environ.get("ADMISSION_HEAVY_TOTAL_CONCURRENCY", "32")
+)
+ADMISSION_HEAVY_TOTAL_QUEUE = int(os.environ.get("ADMISSION_HEAVY_TOTAL_QUEUE", "64"))
+ADMISSION_QUEUE_TIMEOUT = float(os.environ.get("ADMISSION_QUEUE_TIMEOUT", "5"))
+ADMISSION_RETRY_AFTER = int(os.environ.get("ADMISSION_RETRY_AFTER", "5"))
 
 
 class SignatureMessage(BaseModel):
@@ -20,39 +152,764 @@ class SignatureMessage(BaseModel):
 
 app = FastAPI()
 
+HEAVY_ENDPOINTS = {
+    "/save_signature/",
+    "/proto/save_signature/",
+    "/save_and_compare_signature/",
+    "/update_project_standard/",
+    "/jobs/save_and_compare_signature/",
+    "/proto/save_and_compare_signature/",
+    "/proto/update_project_standard/",
+    "/proto/jobs/save_and_compare_signature/",
+    "/proto/save_and_compare_signatures/",
+    "/profile_and_compare/{project_name}",
+}
+admission = AdmissionController(
+    app.router,
+    HEAVY_ENDPOINTS,
+    heavy=(ADMISSION_HEAVY_CONCURRENCY, ADMISSION_HEAVY_QUEUE),
+    light=(ADMISSION_LIGHT_CONCURRENCY, ADMISSION_LIGHT_QUEUE),
+    heavy_total=(
+        (ADMISSION_HEAVY_TOTAL_CONCURRENCY, ADMISSION_HEAVY_TOTAL_QUEUE)
+        if ADMISSION_HEAVY_TOTAL_CONCURRENCY
+        else None
+    ),
+    queue_timeout=ADMISSION_QUEUE_TIMEOUT,
+    retry_after=ADMISSION_RETRY_AFTER,
+)
+
+REQUEST_SECONDS = histogram(
+    "mlops_http_request_seconds",
+    "Duration of HTTP requests until the response is sent.",
+    ["endpoint", "status"],
+)
+REQUEST_SIZE_BYTES = histogram(
+    "mlops_http_request_size_bytes",
+    "Size of received request bodies, before decompression.",
+    ["endpoint"],
+    buckets=SIZE_BUCKETS,
+)
+RESPONSE_SIZE_BYTES = histogram(
+    "mlops_http_response_size_bytes",
+    "Size of sent response bodies.",
+    ["endpoint"],
+    buckets=SIZE_BUCKETS,
+)
+STAGE_SECONDS = histogram(
+    "mlops_stage_seconds",
+    "Duration of request processing stages, as reported in the Server-Timing header.",
+    ["stage"],
+)
+ADMISSION_REJECTED = counter(
+    "mlops_admission_rejected_total",
+    "Requests rejected by admission control.",
+    ["endpoint", "status"],
+)
+# middleware added last is the outermost one, so rejected requests are measured too
+app.add_middleware(
+    AdmissionControlMiddleware, controller=admission, rejected=ADMISSION_REJECTED
+)
+app.add_middleware(
+    MetricsMiddleware,
+    latency=REQUEST_SECONDS,
+    request_size=REQUEST_SIZE_BYTES,
+    response_size=RESPONSE_SIZE_BYTES,
+)
+
+
+def _get_reader() -> SQLReader:
+    return SignatureReader(SQL_SERVER, SIGNATURES_TABLE)
+
+
+def _get_writer() -> SQLWriter:
+    return SignatureWriter(
+        SQL_SERVER, SIGNATURES_TABLE, split_columns=SPLIT_SIGNATURE_COLUMNS
+    )
+
+
+# created on startup, so importing the module doesn't start the writing thread
+write_queue: Optional[WriteBehindQueue] = None
+
+
+def _get_signatures_writer() -> Writer:
+    # Helper returning writer for new signatures, standards are always written synchronously
+    return write_queue if write_queue is not None else _get_writer()
+
+
+# reports keyed by (signature hash, standard hash), see signature.message_hash()
+report_cache = LRUCache(maxsize=REPORT_CACHE_SIZE)
+standard_cache = StandardCache(
+    _get_reader(), maxsize=STANDARD_CACHE_SIZE, check_interval=STANDARD_CACHE_TTL
+)
+compare_pool = ComparePool(COMPARE_WORKERS, COMPARE_CONCURRENCY)
+compare_jobs = CompareJobQueue(
+    COMPARE_JOB_WORKERS,
+    COMPARE_JOB_QUEUE_SIZE,
+    COMPARE_JOB_RESULTS,
+    writer=_get_writer(),
+    reader=_get_reader(),
+    stale_after=COMPARE_JOB_STALE_AFTER,
+    max_age=COMPARE_JOB_RETENTION,
+)
+
+
+# tickets are renewed in the background, so request handlers never run kinit
+credentials = KerberosTicketManager.from_env()
+
+
+gauge(
+    "mlops_write_queue_depth",
+    "Signatures waiting to be written by the write-behind queue.",
+    callback=lambda: write_queue.depth if write_queue is not None else 0,
+)
+gauge(
+    "mlops_write_queue_dropped_signatures",
+    "Signatures the write-behind queue could neither write nor spill since startup.",
+    callback=lambda: write_queue.dropped_signatures if write_queue is not None else 0,
+)
+gauge(
+    "mlops_compare_jobs_pending",
+    "Compare jobs that are waiting or running.",
+    callback=lambda: compare_jobs.depth,
+)
+gauge(
+    "mlops_admission_requests",
+    "Requests processed or waiting by endpoint, see admission.AdmissionLimit.",
+    ["endpoint", "state"],
+    callback=lambda: {
+        key: value
+        for path, limit in admission.all_limits().items()
+        for key, value in (
+            ((path, "in_flight"), limit.in_flight),
+            ((path, "queued"), limit.queued),
+        )
+    },
+)
+gauge(
+    "mlops_cache_entries",
+    "Number of entries in the server caches.",
+    ["cache"],
+    callback=lambda: {
+        ("report",): len(report_cache),
+        ("standard",): len(standard_cache),
+    },
+)
+gauge(
+    "mlops_cache_hit_rate",
+    "Share of cache lookups that found a fresh entry since the server start.",
+    ["cache"],
+    callback=lambda: {
+        ("report",): report_cache.hit_rate,
+        ("standard",): standard_cache.hit_rate,
+    },
+)
+gauge(
+    "mlops_db_pool_connections",
+    "Connections of the database pools by state, see data.pool_status().",
+    ["table", "state"],
+    callback=lambda: {
+        (table, state): count
+        for (_, table), stats in pool_status().items()
+        for state, count in stats.items()
+    },
+)
+
+
+@app.on_event("startup")
+def _start_credentials_renewal():
+    credentials.start()
+
+
+@app.on_event("shutdown")
+def _stop_credentials_renewal():
+    credentials.stop()
+
+
+@app.on_event("startup")
+def _upgrade_schema():
+    # runs before anything reads or writes signatures, queries select every mapped column
+    if UPGRADE_SCHEMA:
+        _get_writer().upgrade_schema()
+
+
+@app.on_event("startup")
+def _start_write_queue():
+    global write_queue
+    if WRITE_BEHIND and write_queue is None:
+        if WRITE_BEHIND_SPILL_PATH is None:
+            raise RuntimeError(
+                "WRITE_BEHIND requires WRITE_BEHIND_SPILL_PATH, "
+                "otherwise signatures that fail to be written are lost"
+            )
+        write_queue = WriteBehindQueue(
+            _get_writer(),
+            batch_size=WRITE_BEHIND_BATCH_SIZE,
+            flush_interval=WRITE_BEHIND_FLUSH_INTERVAL,
+            spill_path=WRITE_BEHIND_SPILL_PATH,
+        )
+
+
+@app.on_event("shutdown")
+def _drain_write_queue():
+    global write_queue
+    if write_queue is not None:
+        write_queue.close()
+        write_queue = None
 
-def _parse_message(msg: SignatureMessage) -> Signature:
-    # Helper to parse json messages
-    profile = parse_profile(msg.profile)
-    return Signature(profile, msg.project_name)
+
+@app.on_event("startup")
+async def _start_compare_jobs():
+    compare_jobs.start()
+
+
+@app.on_event("shutdown")
+async def _stop_compare_pool():
+    await compare_jobs.close()
+    compare_pool.shutdown()
+
+
+class StageTimings:
+    """Wall time of request processing stages, reported in the Server-Timing header."""
+
+    def __init__(self):
+        self.durations: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = time.perf_counter() - start
+            STAGE_SECONDS.observe(self.durations[name], stage=name)
+
+    def header(self) -> str:
+        return ", ".join(
+            f"{name};dur={duration * 1000:.1f}"
+            for name, duration in self.durations.items()
+        )
+
+
+async def _parse_message(
+    msg: SignatureMessage, timings: StageTimings
+) -> Tuple[Signature, bytes, str]:
+    # Helper to parse json messages in the compare pool,
+    # returns signature with its serialized profile and content hash
+    with timings.stage("parse"):
+        profile_bytes, content_hash = await compare_pool.parse_signature(
+            msg.profile, msg.project_name
+        )
+        signature = await run_in_threadpool(
+            signature_from_bytes, profile_bytes, msg.project_name
+        )
+    return signature, profile_bytes, content_hash
+
+
+async def _parse_protobuf(
+    request: Request, project_name: str, timings: StageTimings
+) -> Tuple[Signature, bytes, str]:
+    # Helper to parse binary messages, same as _parse_message()
+    with timings.stage("parse"):
+        body = await request.body()
+        try:
+            profile_bytes = await run_in_threadpool(
+                decode_body, body, request.headers.get("Content-Encoding")
+            )
+        except ValueError as e:
+            raise HTTPException(status_code=415, detail=str(e))
+        try:
+            content_hash = await compare_pool.hash_signature(
+                profile_bytes, project_name
+            )
+        except DecodeError:
+            raise HTTPException(
+                status_code=400, detail="Body is not a serialized dataset profile"
+            )
+        signature = await run_in_threadpool(
+            signature_from_bytes, profile_bytes, project_name
+        )
+    return signature, profile_bytes, content_hash
+
+
+async def _save(signature: Signature, timings: StageTimings) -> None:
+    with timings.stage("write"):
+        await run_in_threadpool(_get_signatures_writer().write_signature, signature)
+
+
+async def _save_and_compare(
+    signature: Signature,
+    signature_bytes: bytes,
+    signature_key: str,
+    timings: StageTimings,
+) -> ComparingReport:
+    # Helper storing parsed signature and comparing it with the project standard
+    with timings.stage("standard"):
+        standard_record = await run_in_threadpool(
+            standard_cache.get, signature.project_name
+        )
+    await _save(signature, timings)
+    return await _compare(
+        signature, signature_bytes, signature_key, standard_record, timings
+    )
+
+
+async def _compare(
+    signature: Signature,
+    signature_bytes: bytes,
+    signature_key: str,
+    standard_record: SignatureRecord,
+    timings: StageTimings,
+) -> ComparingReport:
+    # Helper comparing parsed signature with the standard, reports are cached
+    key = (signature_key, standard_record.content_hash)
+    result = report_cache.get(key)
+    if result is None:
+        with timings.stage("compare"):
+            result = await compare_pool.compare(
+                signature_bytes,
+                signature.project_name,
+                standard_record.content_hash,
+                lambda: profile_to_message(
+                    standard_record.signature.profile
+                ).SerializeToString(),
+            )
+        report_cache.put(key, result)
+    return result
+
+
+async def _update_standard(new_standard: Signature, timings: StageTimings) -> None:
+    with timings.stage("write"):
+        await run_in_threadpool(_get_writer().update_standard, new_standard)
+    standard_cache.invalidate(new_standard.project_name)
 
 
 @app.post("/save_and_compare_signature/")
-def save_and_compare_signature(msg: SignatureMessage):
-    os.system(os.environ["DEV_KEYTAB_COMMAND"])
-    signature = _parse_message(msg)
-    reader = SQLReader(SQL_SERVER, SIGNATURES_TABLE)
-    standard = get_project_standard(signature.project_name, reader)
-    SQLWriter(SQL_SERVER, SIGNATURES_TABLE).write_signature(signature)
-    result = compare_signatures(signature, standard)
+async def save_and_compare_signature(msg: SignatureMessage, response: Response):
+    timings = StageTimings()
+    parsed = await _parse_message(msg, timings)
+    result = await _save_and_compare(*parsed, timings)
+    response.headers["Server-Timing"] = timings.header()
     return result
 
 
+@app.post("/save_signature/")
+async def save_signature(msg: SignatureMessage, response: Response):
+    """Store signature without comparing it, for clients comparing signatures themselves."""
+    timings = StageTimings()
+    signature, _, _ = await _parse_message(msg, timings)
+    await _save(signature, timings)
+    response.headers["Server-Timing"] = timings.header()
+
+
 @app.post("/update_project_standard/")
-def update_project_standard(msg: SignatureMessage):
-    os.system(os.environ["DEV_KEYTAB_COMMAND"])
-    new_standard = _parse_message(msg)
-    SQLWriter(SQL_SERVER, SIGNATURES_TABLE).update_standard(new_standard)
+async def update_project_standard(msg: SignatureMessage, response: Response):
+    timings = StageTimings()
+    new_standard, _, _ = await _parse_message(msg, timings)
+    await _update_standard(new_standard, timings)
+    response.headers["Server-Timing"] = timings.header()
+
+
+async def _get_standard_or_304(
+    request: Request, project_name: str
+) -> Tuple[SignatureRecord, Dict[str, str], Optional[Response]]:
+    # Helper returning the standard with its cache headers, and the 304 response
+    # if the client already has this standard
+    record = await run_in_threadpool(standard_cache.get, project_name)
+    headers = {
+        "ETag": standard_etag(record.content_hash),
+        "Cache-Control": "no-cache",
+        PROJECT_NAME_HEADER: project_name,
+    }
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        return record, headers, Response(status_code=304, headers=headers)
+    return record, headers, None
 
 
 @app.get("/get_project_standard/{project_name}")
-def project_standard(project_name: str):
-    os.system(os.environ["DEV_KEYTAB_COMMAND"])
-    reader = SQLReader(SQL_SERVER, SIGNATURES_TABLE)
-    standard = get_project_standard(project_name, reader)
-    jsoned_standard = signature_to_dict(standard)
+async def project_standard(request: Request, response: Response, project_name: str):
+    """Return the project standard as JSON, or 304 if If-None-Match has its ETag."""
+    record, headers, not_modified = await _get_standard_or_304(request, project_name)
+    if not_modified is not None:
+        return not_modified
+    response.headers.update(headers)
+    jsoned_standard = await run_in_threadpool(signature_to_dict, record.signature)
     return jsoned_standard
 
 
+def _job_response(
+    job: CompareJob, timings: Optional[StageTimings] = None
+) -> JSONResponse:
+    # Helper returning job state, 202 means that the report is not ready yet
+    headers = {"Location": f"/jobs/{job.job_id}"}
+    if job.status == PENDING:
+        headers["Retry-After"] = "1"
+    if timings is not None:
+        headers["Server-Timing"] = timings.header()
+    return JSONResponse(
+        job.to_dict(),
+        status_code=202 if job.status == PENDING else 200,
+        headers=headers,
+    )
+
+
+async def _submit_compare_job(
+    signature: Signature,
+    signature_bytes: bytes,
+    signature_key: str,
+    timings: StageTimings,
+) -> JSONResponse:
+    # Helper storing parsed signature and comparing it in the background,
+    # an identical upload gets the existing job without being written again
+    with timings.stage("standard"):
+        standard_record = await run_in_threadpool(
+            standard_cache.get, signature.project_name
+        )
+    job_id = compare_job_id(signature_key, standard_record.content_hash)
+    job = await compare_jobs.load(job_id)
+    if job is None or job.status == FAILED:
+        await _save(signature, timings)
+        try:
+            job = await compare_jobs.submit(
+                job_id,
+                lambda: _compare(
+                    signature,
+                    signature_bytes,
+                    signature_key,
+                    standard_record,
+                    StageTimings(),
+                ),
+            )
+        except JobQueueFull:
+            raise HTTPException(
+                status_code=503,
+                detail="Too many compare jobs are waiting",
+                headers={"Retry-After": "5"},
+            )
+    return _job_response(job, timings)
+
+
+@app.post("/jobs/save_and_compare_signature/", status_code=202)
+async def submit_compare_job(msg: SignatureMessage):
+    """Store signature and compare it in the background, the report is polled at /jobs/{job_id}."""
+    timings = StageTimings()
+    parsed = await _parse_message(msg, timings)
+    return await _submit_compare_job(*parsed, timings)
+
+
+@app.get("/jobs/{job_id}")
+async def get_compare_job(job_id: str, wait: float = 0.0):
+    """Return state of a compare job, with status 202 while it's not finished.
+
+    Args:
+        job_id: Id returned when the job was submitted.
+        wait: Seconds to wait for the job to finish before answering, at most COMPARE_JOB_MAX_WAIT.
+    """
+    job = await compare_jobs.wait(job_id, min(wait, COMPARE_JOB_MAX_WAIT))
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Compare job {job_id} not found")
+    return _job_response(job)
+
+
+# Binary endpoints take serialized DatasetProfileMessage optionally compressed with gzip or zstd
+# (Content-Encoding header), the project name is a query parameter, see transport.py
+
+
+@app.post("/proto/save_and_compare_signature/")
+async def save_and_compare_signature_protobuf(
+    request: Request, response: Response, project_name: str
+):
+    timings = StageTimings()
+    parsed = await _parse_protobuf(request, project_name, timings)
+    result = await _save_and_compare(*parsed, timings)
+    response.headers["Server-Timing"] = timings.header()
+    return result
+
+
+@app.post("/proto/save_signature/")
+async def save_signature_protobuf(
+    request: Request, response: Response, project_name: str
+):
+    """Binary version of /save_signature/."""
+    timings = StageTimings()
+    signature, _, _ = await _parse_protobuf(request, project_name, timings)
+    await _save(signature, timings)
+    response.headers["Server-Timing"] = timings.header()
+
+
+@app.post("/proto/jobs/save_and_compare_signature/", status_code=202)
+async def submit_compare_job_protobuf(request: Request, project_name: str):
+    """Binary version of /jobs/save_and_compare_signature/."""
+    timings = StageTimings()
+    parsed = await _parse_protobuf(request, project_name, timings)
+    return await _submit_compare_job(*parsed, timings)
+
+
+@app.post("/proto/update_project_standard/")
+async def update_project_standard_protobuf(
+    request: Request, response: Response, project_name: str
+):
+    timings = StageTimings()
+    new_standard, _, _ = await _parse_protobuf(request, project_name, timings)
+    await _update_standard(new_standard, timings)
+    response.headers["Server-Timing"] = timings.header()
+
+
+def _standard_to_protobuf(standard: Signature, encoding: str) -> bytes:
+    return encode_body(
+        profile_to_message(standard.profile).SerializeToString(), encoding
+    )
+
+
+@app.get("/proto/get_project_standard/{project_name}")
+async def project_standard_protobuf(request: Request, project_name: str):
+    """Binary version of /get_project_standard/{project_name}."""
+    record, headers, not_modified = await _get_standard_or_304(request, project_name)
+    if not_modified is not None:
+        return not_modified
+    encoding = choose_encoding(request.headers.get("Accept-Encoding"))
+    body = await run_in_threadpool(_standard_to_protobuf, record.signature, encoding)
+    return Response(
+        content=body,
+        media_type=PROTOBUF_MEDIA_TYPE,
+        headers={**headers, "Content-Encoding": encoding},
+    )
+
+
+async def _compare_batch_item(
+    index: int,
+    signature: Signature,
+    signature_bytes: bytes,
+    signature_key: str,
+    standard_record: Optional[SignatureRecord],
+) -> Tuple[int, ComparingReport]:
+    # Helper comparing one signature of a batch, reports missing standards and failed
+    # compares instead of raising, so the other reports of the batch are still streamed
+    if standard_record is None:
+        return index, ComparingReport(
+            signature.project_name,
+            message=STANDARD_NOT_FOUND_MESSAGE.format(signature.project_name),
+            all_columns_stats=None,
+            failed_columns_stats=None,
+        )
+
+    key = (signature_key, standard_record.content_hash)
+    result = report_cache.get(key)
+    if result is None:
+        try:
+            result = await compare_pool.compare(
+                signature_bytes,
+                signature.project_name,
+                standard_record.content_hash,
+                lambda: profile_to_message(
+                    standard_record.signature.profile
+                ).SerializeToString(),
+            )
+        except Exception as e:
+            logger.exception(f"Compare of batch signature {index} failed")
+            return index, ComparingReport(
+                signature.project_name,
+                message=f"Error: compare failed, {type(e).__name__}: {e}",
+                all_columns_stats=None,
+                failed_columns_stats=None,
+            )
+        report_cache.put(key, result)
+    return index, result
+
+
+@app.post("/proto/save_and_compare_signatures/")
+async def save_and_compare_signatures(request: Request):
+    """Store and compare many signatures, possibly of different projects.
+
+    The body is a sequence of records written by archive.encode_record(), optionally compressed
+    as declared in Content-Encoding. All standards are loaded at once and all signatures are
+    written in one transaction. Reports are streamed as NDJSON lines {"index": ..., "report": ...}
+    in the order compares finish, index is the position of the signature in the batch.
+    Signatures of projects without a standard are not written, like in the single signature
+    endpoints, and get an error report.
+    """
+    try:
+        body = await run_in_threadpool(
+            decode_body, await request.body(), request.headers.get("Content-Encoding")
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+    records = list(iter_records(body))
+    if (records[-1].end if records else 0) != len(body):
+        raise HTTPException(status_code=400, detail="Body has a truncated record")
+
+    profiles = [body[record.data_offset : record.end] for record in records]
+    try:
+        hashes = await asyncio.gather(
+            *(
+                compare_pool.hash_signature(profile_bytes, record.project_name)
+                for record, profile_bytes in zip(records, profiles)
+            )
+        )
+    except DecodeError:
+        raise HTTPException(
+            status_code=400, detail="Body has a record that is not a dataset profile"
+        )
+    parsed = list(zip(profiles, hashes))
+    # profiles are decoded in a thread, like in the single signature endpoints
+    signatures = await run_in_threadpool(
+        lambda: [
+            signature_from_bytes(signature_bytes, record.project_name)
+            for record, (signature_bytes, _) in zip(records, parsed)
+        ]
+    )
+
+    standards = await run_in_threadpool(
+        standard_cache.get_many, [record.project_name for record in records]
+    )
+    await run_in_threadpool(
+        _get_writer().write_signatures,
+        [signature for signature in signatures if signature.project_name in standards],
+    )
+
+    async def stream_reports() -> AsyncIterator[str]:
+        tasks = [
+            _compare_batch_item(
+                index,
+                signature,
+                signature_bytes,
+                signature_key,
+                standards.get(signature.project_name),
+            )
+            for index, (signature, (signature_bytes, signature_key)) in enumerate(
+                zip(signatures, parsed)
+            )
+        ]
+        for task in asyncio.as_completed(tasks):
+            index, report = await task
+            yield json.dumps({"index": index, "report": report}) + "\n"
+
+    return StreamingResponse(stream_reports(), media_type=NDJSON_MEDIA_TYPE)
+
+
+CSV_MEDIA_TYPES = {"text/csv", "application/csv"}
+PARQUET_MEDIA_TYPES = {"application/vnd.apache.parquet", "application/x-parquet"}
+
+
+def _parse_csv(
+    chunker: CSVChunker, decode: Callable[[bytes], bytes], data: Optional[bytes]
+) -> List[pd.DataFrame]:
+    # Helper parsing complete rows of the received piece, None marks the end of the body
+    chunks = chunker.feed(decode(data)) if data is not None else [chunker.close()]
+    return [chunk for chunk in chunks if chunk is not None]
+
+
+async def _profile_chunks(
+    chunks: List[pd.DataFrame], profiler: StreamingProfiler
+) -> None:
+    # Helper profiling chunks in the compare pool and merging them in a thread
+    profiles = await asyncio.gather(
+        *(compare_pool.profile_chunk(chunk, profiler.project_name) for chunk in chunks)
+    )
+    for chunk, profile_bytes in zip(chunks, profiles):
+        await run_in_threadpool(profiler.merge_message, profile_bytes, len(chunk))
+
+
+def _serialize_signature(signature: Signature) -> Tuple[bytes, str]:
+    message = profile_to_message(signature.profile)
+    return message.SerializeToString(), message_hash(message, signature.project_name)
+
+
+@app.post("/profile_and_compare/{project_name}")
+async def profile_and_compare(
+    request: Request,
+    response: Response,
+    project_name: str,
+    data_format: Optional[str] = None,
+):
+    """Profile raw CSV or parquet upload, then store and compare it like /save_and_compare_signature/.
+
+    The format is taken from data_format query parameter ("csv" or "parquet") or Content-Type.
+    CSV is profiled while it's received, PROFILE_CHUNK_SIZE bytes at a time, with column types
+    fixed by the first chunk, see CSVChunker. Parquet metadata is at the end of the file, so
+    parquet uploads are spooled to a temporary file first and then read in batches of
+    PROFILE_PARQUET_BATCH_SIZE rows. Chunks and batches are profiled by the compare pool and
+    merged. The body may be gzip or zstd encoded.
+    """
+    content_type = request.headers.get("Content-Type", "").split(";")[0].strip()
+    if data_format is None:
+        data_format = (
+            "csv"
+            if content_type in CSV_MEDIA_TYPES
+            else "parquet" if content_type in PARQUET_MEDIA_TYPES else None
+        )
+    if data_format not in ("csv", "parquet"):
+        raise HTTPException(
+            status_code=415, detail="Expected CSV or parquet body, see data_format"
+        )
+    if data_format == "parquet" and pq is None:
+        raise HTTPException(status_code=415, detail="Server can't read parquet")
+    try:
+        decode = body_decoder(request.headers.get("Content-Encoding"))
+    except ValueError as e:
+        raise HTTPException(status_code=415, detail=str(e))
+
+    timings = StageTimings()
+    profiler = StreamingProfiler(project_name)
+    try:
+        with timings.stage("profile"):
+            if data_format == "csv":
+                chunker = CSVChunker(PROFILE_CHUNK_SIZE)
+                async for data in request.stream():
+                    chunks = await run_in_threadpool(_parse_csv, chunker, decode, data)
+                    await _profile_chunks(chunks, profiler)
+                chunks = await run_in_threadpool(_parse_csv, chunker, decode, None)
+                await _profile_chunks(chunks, profiler)
+            else:
+                with tempfile.NamedTemporaryFile(suffix=".parquet") as spool:
+                    async for data in request.stream():
+                        await run_in_threadpool(lambda: spool.write(decode(data)))
+                    await run_in_threadpool(spool.flush)
+                    batches = iter_parquet_batches(
+                        spool.name, PROFILE_PARQUET_BATCH_SIZE
+                    )
+                    while True:
+                        batch = await run_in_threadpool(next, batches, None)
+                        if batch is None:
+                            break
+                        await _profile_chunks([batch], profiler)
+    except (ValueError, OSError) as e:
+        # pandas and pyarrow parsing errors are subclasses of these
+        raise HTTPException(status_code=400, detail=f"Can't read {data_format}: {e}")
+    if profiler.rows == 0:
+        raise HTTPException(status_code=400, detail="Upload has no rows")
+
+    signature = profiler.to_signature()
+    with timings.stage("parse"):
+        signature_bytes, signature_key = await run_in_threadpool(
+            _serialize_signature, signature
+        )
+    result = await _save_and_compare(signature, signature_bytes, signature_key, timings)
+    response.headers["Server-Timing"] = timings.header()
+    return result
+
+
+@app.get("/server_stats/")
+async def server_stats():
+    stats = {}
+    if write_queue is not None:
+        stats["write_queue_depth"] = write_queue.depth
+        stats["written_signatures"] = write_queue.written_signatures
+        stats["spilled_signatures"] = write_queue.spilled_signatures
+        stats["dropped_signatures"] = write_queue.dropped_signatures
+    stats["compare_jobs_pending"] = compare_jobs.depth
+    stats["report_cache_size"] = len(report_cache)
+    stats["report_cache_hit_rate"] = report_cache.hit_rate
+    stats["standard_cache_size"] = len(standard_cache)
+    stats["standard_cache_hits"] = standard_cache.hits
+    stats["standard_cache_misses"] = standard_cache.misses
+    return stats
+
+
+@app.get("/metrics")
+async def metrics():
+    """Expose server metrics in the Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type=PROMETHEUS_MEDIA_TYPE)
+
+
 if __name__ == "__main__":
     uvicorn.run(app, host="0.0.0.0", port=4200)
@@ -1,7 +1,9 @@
 import json
-from typing import Dict, Any, Tuple
+from collections.abc import MutableMapping
+import hashlib
+from typing import Dict, Any, Tuple, Iterator, Mapping, Optional
 from whylogs.util.protobuf import message_to_json
-from whylogs.proto import DatasetProfileMessage, ColumnMessage
+from whylogs.proto import DatasetProfileMessage, DatasetProperties, ColumnMessage
 from google.protobuf.json_format import Parse
 from whylogs.core.datasetprofile import DatasetProfile, ColumnProfile
 import datetime
@@ -16,6 +18,61 @@ class Signature(NamedTuple):
     project_name: str
 
 
+class LazyColumns(MutableMapping):
+    """Column profiles of a DatasetProfile that are built from protobuf messages on first access.
+
+    Building a ColumnProfile decodes all of its sketches, which dominates parsing time of wide
+    profiles, while usually only a part of the columns is used. Decoded columns are cached.
+    Original messages are kept for serialization, so columns should be replaced rather than
+    tracked in place to change the profile.
+    """
+
+    def __init__(self, messages: Mapping[str, ColumnMessage]):
+        self._messages: Dict[str, ColumnMessage] = dict(messages)
+        self._columns: Dict[str, Optional[ColumnProfile]] = dict.fromkeys(
+            self._messages
+        )
+
+    def __getitem__(self, colname: str) -> ColumnProfile:
+        column = self._columns[colname]
+        if column is None:
+            column = ColumnProfile.from_protobuf(self._messages[colname])
+            self._columns[colname] = column
+        return column
+
+    def __setitem__(self, colname: str, column: ColumnProfile) -> None:
+        self._messages.pop(colname, None)
+        self._columns[colname] = column
+
+    def __delitem__(self, colname: str) -> None:
+        self._messages.pop(colname, None)
+        del self._columns[colname]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self._columns)
+
+    def __len__(self) -> int:
+        return len(self._columns)
+
+    def is_decoded(self, colname: str) -> bool:
+        return self._columns[colname] is not None
+
+    def get_message(self, colname: str) -> Optional[ColumnMessage]:
+        """Get original protobuf message of the column, None if the column was replaced."""
+        return self._messages.get(colname)
+
+    def to_messages(self) -> Dict[str, ColumnMessage]:
+        """Get protobuf messages of all columns without encoding them again."""
+        return {
+            colname: (
+                self._messages[colname]
+                if colname in self._messages
+                else column.to_protobuf()
+            )
+            for colname, column in self._columns.items()
+        }
+
+
 def new_signature(data: pd.DataFrame, project_name: str) -> Signature:
     timestamp = datetime.datetime.now()
     profile = profile_dataframe_parallel(data, project_name, timestamp, 15)
@@ -24,13 +81,76 @@ def new_signature(data: pd.DataFrame, project_name: str) -> Signature:
 
 
 def signature_to_dict(signature: Signature) -> Dict[str, Any]:
-    proto_signature = message_to_json(signature.profile.to_protobuf())
+    proto_signature = message_to_json(profile_to_message(signature.profile))
     sign_dict = {"profile": proto_signature, "project_name": signature.project_name}
     return sign_dict
 
 
+def signature_hash(signature: Signature) -> str:
+    return message_hash(profile_to_message(signature.profile), signature.project_name)
+
+
+def message_hash(message: DatasetProfileMessage, project_name: str) -> str:
+    """Hash of the profile content that is the same for repeated uploads of the same profile.
+
+    Timestamps and session id are ignored, as they change every time a profile is created.
+
+    Args:
+        message: A protobuf message with dataset profile.
+        project_name: A project name of the signature, signatures of different projects never match.
+
+    Returns:
+        SHA-256 hex digest.
+    """
+    properties = DatasetProperties()
+    properties.CopyFrom(message.properties)
+    for field in ("session_id", "session_timestamp", "data_timestamp"):
+        properties.ClearField(field)
+
+    digest = hashlib.sha256(project_name.encode())
+    digest.update(properties.SerializeToString(deterministic=True))
+    digest.update(message.modeProfile.SerializeToString(deterministic=True))
+    for colname in sorted(message.columns.keys()):
+        digest.update(colname.encode())
+        digest.update(message.columns[colname].SerializeToString(deterministic=True))
+    return digest.hexdigest()
+
+
 def parse_profile(profile_string: str) -> DatasetProfile:
-    return DatasetProfile.from_protobuf(Parse(profile_string, DatasetProfileMessage()))
+    return profile_from_message(Parse(profile_string, DatasetProfileMessage()))
+
+
+def profile_from_message(message: DatasetProfileMessage) -> DatasetProfile:
+    """Create DatasetProfile from protobuf message, column profiles are decoded lazily.
+
+    Args:
+        message: A protobuf message with dataset profile.
+
+    Returns:
+        A DatasetProfile object with LazyColumns as columns.
+    """
+    properties_message = DatasetProfileMessage(properties=message.properties)
+    if message.HasField("modeProfile"):
+        properties_message.modeProfile.CopyFrom(message.modeProfile)
+    profile = DatasetProfile.from_protobuf(properties_message)
+    if not message.HasField("modeProfile"):
+        # from_protobuf() always creates a model profile, which would change the message hash
+        profile.model_profile = None
+    profile.columns = LazyColumns(message.columns)
+    return profile
+
+
+def profile_to_message(profile: DatasetProfile) -> DatasetProfileMessage:
+    """Serialize DatasetProfile to protobuf message without decoding its lazy columns."""
+    if not isinstance(profile.columns, LazyColumns):
+        return profile.to_protobuf()
+
+    message = DatasetProfileMessage(
+        properties=profile.to_properties(), columns=profile.columns.to_messages()
+    )
+    if profile.model_profile is not None:
+        message.modeProfile.CopyFrom(profile.model_profile.to_protobuf())
+    return message
 
 
 def parse_column_profile(profile_string: str) -> ColumnProfile:
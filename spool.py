@@ -0,0 +1,429 @@
+import atexit
+import collections
+import datetime
+import logging
+import os
+import tempfile
+import threading
+import time
+import uuid
+from typing import Callable, Deque, Dict, List, Optional, Set, Tuple
+import requests
+from mlops_monitoring.archive import encode_record
+from mlops_monitoring.client import MonitoringClient
+from mlops_monitoring.compare import STANDARD_NOT_FOUND_MESSAGE, ComparingReport
+from mlops_monitoring.signature import Signature, profile_to_message
+
+logger = logging.getLogger(__name__)
+
+SPOOL_SUFFIX = ".sig"
+# suffix of spooled signatures the server refused to parse or that failed too many times,
+# they are kept for inspection
+REJECTED_SUFFIX = ".rejected"
+# statuses of an unavailable or overloaded server, they don't count as failed attempts
+UNAVAILABLE_STATUSES = (429, 502, 503, 504)
+
+
+class SignatureSpool:
+    """Client-side buffer storing signatures on disk and sending them to the server in the background.
+
+    put() only writes the signature into the spool directory, so neither a slow nor an unavailable
+    server delays the caller. A background thread sends spooled signatures in batches to
+    /proto/save_and_compare_signatures/, or one by one to /proto/save_signature/ if they aren't
+    compared or their project has no standard, and removes every signature as soon as the server
+    stored it. The rest of a failed batch is retried with exponential backoff. A signature that
+    failed max_attempts times while the server was available is renamed with REJECTED_SUFFIX,
+    so it doesn't block the spool. Rejected signatures count toward max_bytes, the oldest ones
+    are deleted when a new signature doesn't fit.
+    Every signature is written to its own file atomically, so signatures left by a crashed or
+    closed process are sent when a spool is opened again on the same directory. Resent signatures
+    are deduplicated by the server.
+
+    Only one spool may use a directory at a time.
+    """
+
+    def __init__(
+        self,
+        client: MonitoringClient,
+        directory: str,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_bytes: int = 1 << 30,
+        backoff_factor: float = 1.0,
+        max_backoff: float = 300.0,
+        max_attempts: int = 10,
+        flush_on_exit: bool = True,
+        compare: bool = True,
+        on_report: Optional[Callable[[ComparingReport], None]] = None,
+    ):
+        """
+        Args:
+            client: A client of the monitoring server.
+            directory: Directory of spooled signatures, created if it doesn't exist.
+            batch_size: Maximal number of signatures sent in one request.
+            flush_interval: Maximal time in seconds spooled signatures wait for a full batch.
+            max_bytes: Maximal total size of spooled and rejected signatures, put() deletes the
+                oldest rejected signatures to make room and drops signatures that still don't fit.
+            backoff_factor: After n consecutive failed batches, sending waits backoff_factor * 2 ** (n - 1) seconds.
+            max_backoff: Maximal time in seconds between retries of a failed batch.
+            max_attempts: Number of failed attempts after which a signature is rejected, attempts
+                failed because the server is unreachable, overloaded or times out aren't counted.
+            flush_on_exit: Close the spool when the interpreter exits, trying to send remaining signatures.
+            compare: Compare signatures with project standards, otherwise they are only stored.
+                Signatures of projects without a standard are stored with their error report.
+            on_report: Function called in the background thread with the report of every sent signature.
+        """
+        self.client = client
+        self.directory = directory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.max_bytes = max_bytes
+        self.backoff_factor = backoff_factor
+        self.max_backoff = max_backoff
+        self.max_attempts = max_attempts
+        self.compare = compare
+        self.on_report = on_report
+        self.sent_signatures = 0
+        self.dropped_signatures = 0
+        self.rejected_signatures = 0
+        # failed attempts of spooled signatures by path, only the background thread uses it
+        self._attempts: Dict[str, int] = {}
+        self._condition = threading.Condition()
+        self._closed = False
+        self._flush_requested = False
+        os.makedirs(directory, exist_ok=True)
+        spooled, rejected = self._recover()
+        self._files: Deque[Tuple[str, int]] = collections.deque(spooled)
+        self.spooled_bytes = sum(size for _, size in self._files)
+        # rejected signatures kept for inspection, oldest first
+        self._rejected: Deque[Tuple[str, int]] = collections.deque(rejected)
+        self.rejected_bytes = sum(size for _, size in self._rejected)
+        if self._files:
+            logger.info(
+                f"Resuming {len(self._files)} spooled signatures in {directory}"
+            )
+        self._thread = threading.Thread(
+            target=self._run, name="signatures-spool", daemon=True
+        )
+        self._thread.start()
+        self._flush_on_exit = flush_on_exit
+        if flush_on_exit:
+            atexit.register(self.close)
+
+    @property
+    def depth(self) -> int:
+        """Number of signatures waiting to be sent."""
+        return len(self._files)
+
+    def put(self, signature: Signature) -> bool:
+        """Store signature in the spool, it's sent to the server in the background.
+
+        Returns:
+            False if the signature was dropped because the spool is full.
+
+        Raises:
+            RuntimeError: The spool is closed.
+        """
+        record = encode_record(
+            signature.project_name,
+            datetime.datetime.now(),
+            profile_to_message(signature.profile).SerializeToString(),
+        )
+        with self._condition:
+            if self._closed:
+                raise RuntimeError("Can't spool signature, the spool is closed")
+            pruned = self._pop_rejected(len(record))
+            if self.spooled_bytes + self.rejected_bytes + len(record) > self.max_bytes:
+                self.dropped_signatures += 1
+                logger.error(
+                    f"Spool {self.directory} is full, signature of {signature.project_name} is dropped"
+                )
+                return False
+            # the space is reserved before writing, so concurrent puts don't exceed max_bytes
+            self.spooled_bytes += len(record)
+        for path, _ in pruned:
+            try:
+                os.remove(path)
+            except OSError:
+                logger.exception(f"Failed to remove rejected signature {path}")
+        if pruned:
+            logger.warning(
+                f"Spool {self.directory} is full, deleted {len(pruned)} rejected signatures"
+            )
+        try:
+            path = self._write(record)
+        except OSError:
+            with self._condition:
+                self.spooled_bytes -= len(record)
+            raise
+        with self._condition:
+            self._files.append((path, len(record)))
+            if len(self._files) >= self.batch_size:
+                self._condition.notify_all()
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Send spooled signatures without waiting for a full batch and wait until they are sent.
+
+        Args:
+            timeout: Maximal time to wait in seconds, wait until everything is sent by default.
+
+        Returns:
+            True if the spool is empty.
+        """
+        with self._condition:
+            self._flush_requested = True
+            self._condition.notify_all()
+            return (
+                self._condition.wait_for(
+                    lambda: not self._files or not self._thread.is_alive(), timeout
+                )
+                and not self._files
+            )
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting signatures and try to send the remaining ones.
+
+        Signatures that couldn't be sent stay in the directory for the next spool.
+
+        Args:
+            timeout: Maximal time to wait in seconds, wait until sending is finished or fails by default.
+        """
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        if self._flush_on_exit:
+            atexit.unregister(self.close)
+        if self.depth:
+            logger.warning(
+                f"Spool {self.directory} closed with {self.depth} unsent signatures"
+            )
+
+    def __enter__(self) -> "SignatureSpool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _recover(self) -> Tuple[List[Tuple[str, int]], List[Tuple[str, int]]]:
+        # Helper listing signatures left by a previous spool and rejected ones, files are named
+        # by spooling time
+        spooled, rejected = [], []
+        for name in sorted(os.listdir(self.directory)):
+            path = os.path.join(self.directory, name)
+            if name.endswith(".tmp"):
+                # a put() interrupted before the file was complete
+                os.remove(path)
+            elif name.endswith(SPOOL_SUFFIX):
+                spooled.append((path, os.path.getsize(path)))
+            elif name.endswith(REJECTED_SUFFIX):
+                rejected.append((path, os.path.getsize(path)))
+        return spooled, rejected
+
+    def _pop_rejected(self, size: int) -> List[Tuple[str, int]]:
+        # Helper choosing the oldest rejected signatures to delete, so a new signature of the
+        # given size fits into max_bytes, called with the condition held; nothing is chosen
+        # if the signature doesn't fit even without rejected signatures
+        popped: List[Tuple[str, int]] = []
+        if self.spooled_bytes + size > self.max_bytes:
+            return popped
+        while (
+            self._rejected
+            and self.spooled_bytes + self.rejected_bytes + size > self.max_bytes
+        ):
+            path, rejected_size = self._rejected.popleft()
+            self.rejected_bytes -= rejected_size
+            popped.append((path, rejected_size))
+        return popped
+
+    def _write(self, record: bytes) -> str:
+        # Helper writing the record atomically, a crash never leaves a partial signature
+        name = f"{time.time_ns():020d}-{uuid.uuid4().hex[:8]}{SPOOL_SUFFIX}"
+        path = os.path.join(self.directory, name)
+        file = tempfile.NamedTemporaryFile(
+            dir=self.directory, suffix=".tmp", delete=False
+        )
+        try:
+            with file:
+                file.write(record)
+                file.flush()
+                os.fsync(file.fileno())
+            os.replace(file.name, path)
+        except BaseException:
+            # a full disk must not leave the temporary file behind
+            try:
+                os.remove(file.name)
+            except OSError:
+                pass
+            raise
+        return path
+
+    def _run(self) -> None:
+        failures = 0
+        while True:
+            with self._condition:
+                self._condition.wait_for(
+                    lambda: self._closed
+                    or self._flush_requested
+                    or len(self._files) >= self.batch_size,
+                    self.flush_interval,
+                )
+                batch = list(self._files)[: self.batch_size]
+                if not batch:
+                    self._flush_requested = False
+                    self._condition.notify_all()
+                    if self._closed:
+                        return
+                    continue
+                closed = self._closed
+
+            if self._send(batch):
+                failures = 0
+                continue
+            if closed:
+                # the remaining signatures are sent by the next spool
+                with self._condition:
+                    self._condition.notify_all()
+                return
+            failures += 1
+            delay = min(self.backoff_factor * 2 ** (failures - 1), self.max_backoff)
+            with self._condition:
+                self._condition.wait_for(lambda: self._closed, delay)
+
+    def _send(self, batch: List[Tuple[str, int]]) -> bool:
+        # Helper sending a batch of spooled signatures, returns False if a part of it should be
+        # retried; signatures are settled by the indexes the server reported, so a broken
+        # response doesn't resend signatures that were already stored
+        records = []
+        for path, _ in batch:
+            with open(path, "rb") as file:
+                records.append(file.read())
+        delivered: Set[int] = set()
+        rejected: Set[int] = set()
+        counted = True
+        try:
+            if self.compare:
+                unstored: List[Tuple[int, ComparingReport]] = []
+                reports = self.client.save_and_compare_records(b"".join(records))
+                for index, report in reports:
+                    if report.message == STANDARD_NOT_FOUND_MESSAGE.format(
+                        report.project_name
+                    ):
+                        # the server doesn't store signatures of projects without a standard
+                        unstored.append((index, report))
+                    else:
+                        delivered.add(index)
+                        self._report(report)
+                for index, report in unstored:
+                    if self._save_record(records[index]):
+                        delivered.add(index)
+                        self._report(report)
+                    else:
+                        rejected.add(index)
+            else:
+                for index, record in enumerate(records):
+                    if self._save_record(record):
+                        delivered.add(index)
+                    else:
+                        rejected.add(index)
+        except Exception as e:
+            if _rejected_by_server(e):
+                # the server can't parse the batch, retrying won't help
+                logger.error(f"Server rejected {len(batch)} spooled signatures: {e}")
+                rejected.update(range(len(batch)))
+            else:
+                logger.warning(
+                    f"Failed to send {len(batch) - len(delivered)} spooled signatures: {e}"
+                )
+                counted = not _server_unavailable(e)
+        return self._settle(batch, delivered, rejected, counted)
+
+    def _save_record(self, record: bytes) -> bool:
+        # Helper storing one signature without comparing it, returns False if the server
+        # rejected it and raises on other errors
+        try:
+            self.client.save_record(record)
+        except requests.HTTPError as e:
+            if not _rejected_by_server(e):
+                raise
+            logger.error(f"Server rejected spooled signature: {e}")
+            return False
+        return True
+
+    def _report(self, report: ComparingReport) -> None:
+        if self.on_report is not None:
+            try:
+                self.on_report(report)
+            except Exception:
+                logger.exception("Report callback of the spool failed")
+
+    def _settle(
+        self,
+        batch: List[Tuple[str, int]],
+        delivered: Set[int],
+        rejected: Set[int],
+        counted: bool,
+    ) -> bool:
+        # Helper removing delivered and rejected signatures of the batch, the rest is kept
+        # for a retry unless it failed max_attempts times; returns True if nothing is kept
+        rejected = rejected - delivered
+        for index in range(len(batch)):
+            path = batch[index][0]
+            if index in delivered or index in rejected:
+                self._attempts.pop(path, None)
+            elif counted:
+                self._attempts[path] = self._attempts.get(path, 0) + 1
+                if self._attempts[path] >= self.max_attempts:
+                    logger.error(
+                        f"Spooled signature {path} failed {self.max_attempts} times, it's rejected"
+                    )
+                    self._attempts.pop(path)
+                    rejected.add(index)
+        self._remove([batch[index] for index in delivered])
+        self._remove([batch[index] for index in rejected], rejected=True)
+        self.sent_signatures += len(delivered)
+        self.rejected_signatures += len(rejected)
+        return len(delivered) + len(rejected) == len(batch)
+
+    def _remove(self, batch: List[Tuple[str, int]], rejected: bool = False) -> None:
+        kept = []
+        for path, size in batch:
+            try:
+                if rejected:
+                    os.replace(path, path + REJECTED_SUFFIX)
+                    kept.append((path + REJECTED_SUFFIX, size))
+                else:
+                    os.remove(path)
+            except OSError:
+                logger.exception(f"Failed to remove spooled signature {path}")
+        removed = {path for path, _ in batch}
+        with self._condition:
+            self._files = collections.deque(
+                entry for entry in self._files if entry[0] not in removed
+            )
+            self.spooled_bytes -= sum(size for _, size in batch)
+            # rejected signatures keep occupying the spool until put() needs their space
+            self._rejected.extend(kept)
+            self.rejected_bytes += sum(size for _, size in kept)
+            self._condition.notify_all()
+
+
+def _rejected_by_server(error: Exception) -> bool:
+    # the server couldn't parse the signatures
+    return (
+        isinstance(error, requests.HTTPError)
+        and error.response is not None
+        and error.response.status_code in (400, 415)
+    )
+
+
+def _server_unavailable(error: Exception) -> bool:
+    # the server couldn't be reached or refused to process the request for now
+    if isinstance(error, (requests.ConnectionError, requests.Timeout)):
+        return True
+    return (
+        isinstance(error, requests.HTTPError)
+        and error.response is not None
+        and error.response.status_code in UNAVAILABLE_STATUSES
+    )
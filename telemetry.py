@@ -0,0 +1,349 @@
+import bisect
+import copy
+import threading
+import time
+from contextlib import ContextDecorator, contextmanager
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond cache hits to slow compares of wide signatures
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+    60.0,
+)
+# Size buckets in bytes, from 1 KB to 256 MB
+SIZE_BUCKETS = tuple(1024 * 4**power for power in range(10))
+
+LabelValues = Tuple[str, ...]
+# (histogram name, labels, value) of a histogram observation
+Observation = Tuple[str, Dict[str, str], float]
+
+# observations of a thread inside captured_observations() are collected instead of recorded
+_capture = threading.local()
+
+
+class Metric:
+    """Base class of metrics with optional labels, all methods are thread-safe."""
+
+    type_name = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _label_values(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(
+                f"Metric {self.name} expects labels {self.labelnames}, got {tuple(labels)}"
+            )
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        """Yield (sample name, labels, value) for the text format."""
+        raise NotImplementedError
+
+    def _labels(self, values: LabelValues) -> Dict[str, str]:
+        return dict(zip(self.labelnames, values))
+
+
+class Counter(Metric):
+    type_name = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = list(self._values.items())
+        for key, value in values:
+            yield self.name, self._labels(key), value
+
+
+class Gauge(Metric):
+    """Gauge that is either set explicitly or read from a callback when metrics are collected.
+
+    The callback returns a single value for gauges without labels, or values by label values.
+    """
+
+    type_name = "gauge"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        callback: Optional[Callable[[], object]] = None,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+        self._callback = callback
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        if self._callback is not None:
+            values = self._callback()
+            if not isinstance(values, dict):
+                values = {(): values}
+        else:
+            with self._lock:
+                values = dict(self._values)
+        for key, value in values.items():
+            yield self.name, self._labels(key), float(value)
+
+
+class Histogram(Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+    ):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # per label values: counts per bucket (the last one is +Inf), sum
+        self._values: Dict[LabelValues, Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._label_values(labels)
+        observations = getattr(_capture, "observations", None)
+        if observations is not None:
+            observations.append((self.name, labels, value))
+            return
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            if key not in self._values:
+                self._values[key] = ([0] * (len(self.buckets) + 1), [0.0])
+            counts, total = self._values[key]
+            counts[index] += 1
+            total[0] += value
+
+    def time(self, **labels: str) -> "timed":
+        return timed(self, **labels)
+
+    def samples(self) -> Iterable[Tuple[str, Dict[str, str], float]]:
+        with self._lock:
+            values = [
+                (key, list(counts), total[0])
+                for key, (counts, total) in self._values.items()
+            ]
+        for key, counts, total in values:
+            labels = self._labels(key)
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield f"{self.name}_bucket", {
+                    **labels,
+                    "le": _format_value(bound),
+                }, cumulative
+            yield f"{self.name}_sum", labels, total
+            yield f"{self.name}_count", labels, cumulative
+
+
+class timed(ContextDecorator):
+    """Observe duration of a block or of every call of a decorated function in a histogram."""
+
+    def __init__(self, histogram: Histogram, **labels: str):
+        self.histogram = histogram
+        self.labels = labels
+        self._start = 0.0
+
+    def _recreate_cm(self) -> "timed":
+        # decorated functions may run concurrently, so every call gets its own timer
+        return copy.copy(self)
+
+    def __enter__(self) -> "timed":
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.histogram.observe(time.perf_counter() - self._start, **self.labels)
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: Metric) -> Metric:
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError(f"Metric {metric.name} is already registered")
+            self._metrics[metric.name] = metric
+        return metric
+
+    def record(self, observations: Iterable[Observation]) -> None:
+        """Record histogram observations captured by captured_observations()."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name, labels, value in observations:
+            metrics[name].observe(value, **labels)
+
+    def render(self) -> str:
+        """Render all metrics in the Prometheus text exposition format."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.append(f"# HELP {metric.name} {_escape_help(metric.documentation)}")
+            lines.append(f"# TYPE {metric.name} {metric.type_name}")
+            for name, labels, value in metric.samples():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+
+@contextmanager
+def captured_observations() -> Iterator[List[Observation]]:
+    """Collect histogram observations of the current thread instead of recording them.
+
+    Registries of worker processes are never rendered, so workers return the collected
+    observations and the server records them with REGISTRY.record().
+    """
+    observations: List[Observation] = []
+    previous = getattr(_capture, "observations", None)
+    _capture.observations = observations
+    try:
+        yield observations
+    finally:
+        _capture.observations = previous
+
+
+PROMETHEUS_MEDIA_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def counter(name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+    return REGISTRY.register(Counter(name, documentation, labelnames))
+
+
+def gauge(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    callback: Optional[Callable[[], object]] = None,
+) -> Gauge:
+    return REGISTRY.register(Gauge(name, documentation, labelnames, callback))
+
+
+def histogram(
+    name: str,
+    documentation: str,
+    labelnames: Sequence[str] = (),
+    buckets: Sequence[float] = DEFAULT_BUCKETS,
+) -> Histogram:
+    return REGISTRY.register(Histogram(name, documentation, labelnames, buckets))
+
+
+class MetricsMiddleware:
+    """ASGI middleware observing latency, request and response sizes of every HTTP request.
+
+    Requests are labelled by the name of the endpoint function rather than by the path,
+    so path parameters like project names don't multiply the number of series. Latency is
+    measured until the response is fully sent, which includes streamed responses.
+    """
+
+    def __init__(
+        self,
+        app,
+        latency: Histogram,
+        request_size: Histogram,
+        response_size: Histogram,
+    ):
+        """
+        Args:
+            app: The wrapped ASGI application.
+            latency: Histogram with labels "endpoint" and "status".
+            request_size: Histogram of received body bytes with label "endpoint".
+            response_size: Histogram of sent body bytes with label "endpoint".
+        """
+        self.app = app
+        self.latency = latency
+        self.request_size = request_size
+        self.response_size = response_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        received = sent = 0
+        status = 500
+
+        async def counting_receive():
+            nonlocal received
+            message = await receive()
+            received += len(message.get("body", b""))
+            return message
+
+        async def counting_send(message):
+            nonlocal sent, status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                sent += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            # the router stores the matched endpoint in the scope
+            endpoint = getattr(scope.get("endpoint"), "__name__", "unmatched")
+            self.latency.observe(
+                time.perf_counter() - start, endpoint=endpoint, status=str(status)
+            )
+            self.request_size.observe(received, endpoint=endpoint)
+            self.response_size.observe(sent, endpoint=endpoint)
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value))
+
+
+def _escape_help(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("\n", "\\n")
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    return (
+        "{"
+        + ",".join(f'{name}="{_escape_label(value)}"' for name, value in labels.items())
+        + "}"
+    )
+
+
+def _escape_label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -1,3 +1,4 @@
+import asyncio
 import numpy as np
 import pytest
 import os
@@ -5,11 +6,11 @@ from fastapi.testclient import TestClient
 from mlops_monitoring.server import app
 import pandas as pd
 from mlops_monitoring.signature import new_signature
+from mlops_monitoring.credentials import KerberosTicketManager
 from dotenv import load_dotenv
 
-
 load_dotenv()
-os.system(os.environ["DEV_KEYTAB_COMMAND"])
+KerberosTicketManager.from_env().renew()
 
 
 @pytest.fixture(scope="module")
@@ -32,7 +33,11 @@ def signature():
 
 @pytest.fixture(scope="module")
 def test_app():
-    return TestClient(app)
+    # startup and shutdown hooks run only when the client is used as a context manager,
+    # which needs a current event loop, asyncio.run() in other tests leaves none
+    asyncio.set_event_loop(asyncio.new_event_loop())
+    with TestClient(app) as client:
+        yield client
 
 
 @pytest.fixture()
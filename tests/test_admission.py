@@ -0,0 +1,110 @@
+import asyncio
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from mlops_monitoring.admission import (
+    HEAVY_TOTAL,
+    AdmissionControlMiddleware,
+    AdmissionController,
+    AdmissionLimit,
+    AdmissionRejected,
+)
+
+
+class TestAdmissionLimit:
+    def test_queue_and_reject(self):
+        async def run():
+            limit = AdmissionLimit(max_in_flight=1, max_queued=1, queue_timeout=1)
+            await limit.acquire()
+            waiting = asyncio.ensure_future(limit.acquire())
+            await asyncio.sleep(0)
+            assert (limit.in_flight, limit.queued) == (1, 1)
+
+            with pytest.raises(AdmissionRejected) as rejected:
+                await limit.acquire()
+            assert rejected.value.status_code == 429
+
+            limit.release()
+            await waiting
+            assert (limit.in_flight, limit.queued) == (1, 0)
+            limit.release()
+            assert limit.in_flight == 0
+
+        asyncio.run(run())
+
+    def test_queue_timeout(self):
+        async def run():
+            limit = AdmissionLimit(max_in_flight=1, max_queued=1, queue_timeout=0.01)
+            await limit.acquire()
+            with pytest.raises(AdmissionRejected) as rejected:
+                await limit.acquire()
+            assert rejected.value.status_code == 503
+            assert limit.queued == 0
+            limit.release()
+            assert limit.in_flight == 0
+
+        asyncio.run(run())
+
+
+class TestAdmissionControlMiddleware:
+    def test_heavy_endpoints_are_limited(self):
+        app = FastAPI()
+
+        @app.post("/compare/{project_name}")
+        async def compare(project_name: str):
+            return project_name
+
+        @app.get("/standard/{project_name}")
+        async def standard(project_name: str):
+            return project_name
+
+        controller = AdmissionController(
+            app.router, {"/compare/{project_name}"}, heavy=(0, 0), retry_after=3
+        )
+        app.add_middleware(AdmissionControlMiddleware, controller=controller)
+        client = TestClient(app)
+
+        response = client.post("/compare/test")
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "3"
+        assert client.get("/standard/test").json() == "test"
+        assert client.get("/unknown").status_code == 404
+
+    def test_heavy_routes_share_total_limit(self):
+        app = FastAPI()
+
+        @app.post("/compare/{project_name}")
+        async def compare(project_name: str):
+            return project_name
+
+        @app.post("/profile/{project_name}")
+        async def profile(project_name: str):
+            return project_name
+
+        @app.get("/standard/{project_name}")
+        async def standard(project_name: str):
+            return project_name
+
+        controller = AdmissionController(
+            app.router,
+            {"/compare/{project_name}", "/profile/{project_name}"},
+            heavy_total=(1, 0),
+        )
+
+        def limits_for(method, path):
+            return controller.limits_for(
+                {"type": "http", "method": method, "path": path}
+            )
+
+        async def run():
+            for limit in limits_for("POST", "/compare/test")[1]:
+                await limit.acquire()
+            route_limit, total_limit = limits_for("POST", "/profile/test")[1]
+            await route_limit.acquire()
+            with pytest.raises(AdmissionRejected):
+                await total_limit.acquire()
+            (light_limit,) = limits_for("GET", "/standard/test")[1]
+            await light_limit.acquire()
+
+        asyncio.run(run())
+        assert controller.all_limits()[HEAVY_TOTAL].in_flight == 1
@@ -0,0 +1,107 @@
+import pytest
+import datetime
+from mlops_monitoring.archive import (
+    SignatureArchive,
+    SignatureArchiveWriter,
+    encode_record,
+    export_signatures,
+    import_signatures,
+)
+from mlops_monitoring.data import SQLiteWriter, SQLiteReader, Writer
+
+
+class TestSignatureArchive:
+    @pytest.fixture
+    def start(self):
+        return datetime.datetime(2021, 6, 1)
+
+    @pytest.fixture
+    def archive_path(self, df_signatures, start, tmp_path):
+        path = str(tmp_path / "signatures.mlsa")
+        with SignatureArchiveWriter(path) as archive:
+            for day, signature in enumerate(df_signatures):
+                archive.append(signature, start + datetime.timedelta(days=day))
+                archive.append(
+                    signature._replace(project_name="other_project"),
+                    start + datetime.timedelta(days=day),
+                )
+        return path
+
+    def test_read_archive(self, archive_path, df_signatures, start):
+        with SignatureArchive(archive_path) as archive:
+            assert len(archive) == 2 * len(df_signatures)
+            assert archive.project_names == ["other_project", "test"]
+            assert set(archive[4].profile.columns.keys()) == set(
+                df_signatures[2].profile.columns.keys()
+            )
+
+            records = archive.records(
+                "test",
+                start + datetime.timedelta(days=1),
+                start + datetime.timedelta(days=3),
+            )
+            assert [record.upload_date.day for record in records] == [2, 3]
+            signatures = [signature for _, signature in archive.iter_signatures("test")]
+            assert len(signatures) == len(df_signatures)
+            assert all(signature.project_name == "test" for signature in signatures)
+
+    def test_recover_interrupted_writer(self, archive_path, signature, start):
+        with open(archive_path, "ab") as file:
+            file.write(encode_record("test", start, b"0" * 100)[:50])
+
+        with SignatureArchive(archive_path) as archive:
+            size = len(archive)
+        with SignatureArchiveWriter(archive_path) as archive:
+            archive.append(signature, start)
+        with SignatureArchive(archive_path) as archive:
+            assert len(archive) == size + 1
+            assert archive[size].project_name == "project"
+
+    def test_export_and_import(self, archive_path, start, tmp_path):
+        sqlite_db = str(tmp_path / "signatures.db")
+        imported = import_signatures(
+            archive_path, SQLiteWriter(sqlite_db, "signatures"), "test", batch_size=2
+        )
+        assert imported == 5
+        # identical signatures are skipped, only signatures of other_project are new
+        assert (
+            import_signatures(archive_path, SQLiteWriter(sqlite_db, "signatures")) == 5
+        )
+
+        # roll-ups can't be restored from an archive, so only raw signatures are exported
+        with SignatureArchive(archive_path) as archive:
+            SQLiteWriter(sqlite_db, "signatures").write_rollup(
+                archive[0], start, "month"
+            )
+
+        exported_path = str(tmp_path / "exported.mlsa")
+        reader = SQLiteReader(sqlite_db, "signatures")
+        assert export_signatures(reader, exported_path, ["test"]) == 5
+        with SignatureArchive(exported_path) as archive:
+            assert archive.project_names == ["test"]
+            assert sorted(
+                record.upload_date for record, _ in archive.iter_signatures()
+            ) == [start + datetime.timedelta(days=day) for day in range(5)]
+
+    def test_import_without_upload_dates(self, archive_path):
+        class ListWriter(Writer):
+            def __init__(self):
+                self.signatures = []
+
+            def write_signature(self, signature):
+                self.signatures.append(signature)
+
+        writer = ListWriter()
+        with pytest.raises(TypeError):
+            import_signatures(archive_path, writer)
+        assert import_signatures(archive_path, writer, keep_upload_dates=False) == 10
+        assert len(writer.signatures) == 10
+
+    def test_empty_archive(self, tmp_path):
+        path = tmp_path / "empty.mlsa"
+        path.touch()
+        with SignatureArchive(str(path)) as archive:
+            assert len(archive) == 0
+        assert (
+            import_signatures(str(path), SQLiteWriter(str(tmp_path / "db"), "s")) == 0
+        )
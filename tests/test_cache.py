@@ -0,0 +1,80 @@
+import pytest
+import time
+from fastapi import HTTPException
+from mlops_monitoring.cache import LRUCache, StandardCache
+from mlops_monitoring.data import SQLiteWriter, SQLiteReader
+
+
+class TestLRUCache:
+    def test_evicts_least_recently_used(self):
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        assert cache.get("a") == 1
+        cache.put("c", 3)
+
+        assert "b" not in cache
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+
+    def test_expired_entries(self):
+        cache = LRUCache(ttl=0.05)
+        cache.put("a", 1)
+        assert cache.get("a") == 1
+        time.sleep(0.1)
+        assert cache.get("a", "missing") == "missing"
+
+    def test_hit_rate(self):
+        cache = LRUCache()
+        assert cache.hit_rate == 0.0
+        cache.put("a", 1)
+        cache.get("a")
+        cache.get("b")
+        assert (cache.hits, cache.misses) == (1, 1)
+        assert cache.hit_rate == pytest.approx(0.5)
+        assert cache.pop("a") == 1
+        assert cache.pop("a") is None
+
+
+class TestStandardCache:
+    @pytest.fixture
+    def sqlite_db(self, tmp_path):
+        return str(tmp_path / "signatures.db")
+
+    def test_reload_replaced_standard(self, df_signatures, sqlite_db):
+        writer = SQLiteWriter(sqlite_db, "signatures")
+        writer.update_standard(df_signatures[0])
+        cache = StandardCache(SQLiteReader(sqlite_db, "signatures"), check_interval=0)
+
+        record = cache.get("test")
+        assert cache.get("test").signature_id == record.signature_id
+        assert (cache.hits, cache.misses) == (1, 1)
+
+        writer.update_standard(df_signatures[1])
+        assert cache.get("test").signature_id != record.signature_id
+        assert (cache.hits, cache.misses) == (1, 2)
+
+    def test_invalidate(self, signature, sqlite_db):
+        SQLiteWriter(sqlite_db, "signatures").update_standard(signature)
+        cache = StandardCache(SQLiteReader(sqlite_db, "signatures"))
+        cache.get("project")
+        cache.get("project")
+        cache.invalidate("project")
+        cache.get("project")
+
+        assert (cache.hits, cache.misses) == (1, 2)
+        with pytest.raises(HTTPException):
+            cache.get("other_project")
+
+    def test_get_many(self, df_signatures, sqlite_db):
+        writer = SQLiteWriter(sqlite_db, "signatures")
+        writer.update_standard(df_signatures[0])
+        writer.update_standard(df_signatures[1]._replace(project_name="other_project"))
+        cache = StandardCache(SQLiteReader(sqlite_db, "signatures"), check_interval=0)
+
+        cache.get("test")
+        standards = cache.get_many(["test", "other_project", "missing", "test"])
+        assert set(standards) == {"test", "other_project"}
+        assert standards["other_project"].signature.project_name == "other_project"
+        assert (cache.hits, cache.misses) == (1, 3)
@@ -0,0 +1,214 @@
+import asyncio
+import datetime
+import http.server
+import httpx
+import json
+import os
+import threading
+import time
+import pytest
+import requests
+from mlops_monitoring import client as client_module
+from mlops_monitoring.archive import encode_record
+from mlops_monitoring.client import AsyncMonitoringClient, MonitoringClient
+from mlops_monitoring.compare import ComparingReport
+from mlops_monitoring.server import app
+from mlops_monitoring.signature import profile_to_message, signature_to_dict
+
+REPORT = ComparingReport("project", "All fine!", {}, None)
+
+
+class StubHandler(http.server.BaseHTTPRequestHandler):
+    # every request is answered by the next function in server.responses
+
+    def do_GET(self):
+        self._respond()
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._respond()
+
+    def _respond(self):
+        self.server.requests.append((self.command, self.path, dict(self.headers)))
+        self.server.responses.pop(0)(self)
+
+    def log_message(self, *args):
+        pass
+
+
+def reply(status, body=b"", headers=()):
+    def respond(handler):
+        handler.send_response(status)
+        for name, value in headers:
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    return respond
+
+
+def disconnect(handler):
+    # the request was received, but the connection is closed before the response
+    handler.close_connection = True
+
+
+def run_with_app(test, **kwargs):
+    # runs test(client) in a new event loop, the client sends requests to the app
+    # in the same loop, paths and statuses of the responses are collected in client.responses
+    async def run():
+        await app.router.startup()
+        client = AsyncMonitoringClient("http://testserver", **kwargs)
+        client.responses = []
+
+        async def record_response(response):
+            client.responses.append((response.request.url.path, response.status_code))
+
+        client._client = httpx.AsyncClient(
+            app=app,
+            base_url=client.server_address,
+            event_hooks={"response": [record_response]},
+        )
+        try:
+            return await test(client)
+        finally:
+            await client.aclose()
+            await app.router.shutdown()
+
+    return asyncio.run(run())
+
+
+@pytest.fixture
+def stub_server():
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+    server.requests, server.responses = [], []
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def stub_client(stub_server):
+    client = MonitoringClient(
+        f"http://127.0.0.1:{stub_server.server_port}",
+        cache_dir=None,
+        backoff_factor=0.01,
+    )
+    yield client
+    client.close()
+
+
+class TestMonitoringClient:
+    def test_upload_is_not_repeated_after_read_error(
+        self, stub_server, stub_client, signature
+    ):
+        stub_server.responses += [disconnect, reply(200, json.dumps(REPORT).encode())]
+        with pytest.raises(requests.ConnectionError):
+            stub_client.save_and_compare_signature(signature, transport="json")
+        assert len(stub_server.requests) == 1
+
+    def test_upload_obeys_retry_after(self, stub_server, stub_client, signature):
+        stub_server.responses += [
+            reply(503, headers=[("Retry-After", "1")]),
+            reply(200, json.dumps(REPORT).encode()),
+        ]
+        start = time.monotonic()
+        report = stub_client.save_and_compare_signature(signature, transport="json")
+        assert time.monotonic() - start >= 1
+        assert report == REPORT
+        assert len(stub_server.requests) == 2
+
+    def test_retry_after_is_capped(
+        self, stub_server, stub_client, signature, monkeypatch
+    ):
+        monkeypatch.setattr(client_module, "MAX_RETRY_AFTER", 0.01)
+        stub_server.responses += [
+            reply(429, headers=[("Retry-After", "3600")]),
+            reply(200, json.dumps(REPORT).encode()),
+        ]
+        start = time.monotonic()
+        assert stub_client.save_and_compare_signature(signature, transport="json")
+        assert time.monotonic() - start < 60
+
+    def test_save_record(self, stub_server, stub_client, signature):
+        stub_server.responses.append(reply(200, b"null"))
+        record = encode_record(
+            "project",
+            datetime.datetime.now(),
+            profile_to_message(signature.profile).SerializeToString(),
+        )
+        stub_client.save_record(record)
+        assert stub_server.requests[0][:2] == (
+            "POST",
+            "/proto/save_signature/?project_name=project",
+        )
+
+    def test_cached_json_standard(self, stub_server, signature, tmp_path):
+        standard = json.dumps(signature_to_dict(signature)).encode()
+        stub_server.responses += [
+            reply(200, standard, headers=[("ETag", '"abc"')]),
+            reply(304, headers=[("ETag", '"abc"')]),
+        ]
+        client = MonitoringClient(
+            f"http://127.0.0.1:{stub_server.server_port}", cache_dir=str(tmp_path)
+        )
+        downloaded = client.get_project_standard("project", transport="json")
+        cached = client.get_project_standard("project", transport="json")
+        client.close()
+
+        assert stub_server.requests[1][2]["If-None-Match"] == '"abc"'
+        assert set(cached.profile.columns) == set(downloaded.profile.columns)
+
+    def test_failed_cache_write_leaves_no_file(self, signature, tmp_path, monkeypatch):
+        def fail(*args):
+            raise OSError("No space left on device")
+
+        monkeypatch.setattr(os, "replace", fail)
+        client_module._write_cached_standard(
+            str(tmp_path / "project.pb"), '"abc"', profile_to_message(signature.profile)
+        )
+        assert os.listdir(tmp_path) == []
+
+
+class TestAsyncMonitoringClient:
+    def test_sync_and_job_modes(self, signature):
+        async def test(client):
+            return [
+                await client.save_and_compare_signature(signature, mode=mode)
+                for mode in ("sync", "job")
+            ]
+
+        sync_report, job_report = run_with_app(test, cache_dir=None)
+        assert sync_report.project_name == "project"
+        assert job_report == sync_report
+
+    def test_cached_standard(self, signature, tmp_path):
+        async def test(client):
+            downloaded = await client.get_project_standard("project")
+            cached = await client.get_project_standard("project")
+            return downloaded, cached, client.responses
+
+        downloaded, cached, responses = run_with_app(test, cache_dir=str(tmp_path))
+        assert [status for _, status in responses] == [200, 304]
+        assert set(cached.profile.columns) == set(downloaded.profile.columns)
+
+    def test_local_mode(self, signature):
+        async def test(client):
+            server_report = await client.save_and_compare_signature(signature)
+            local_reports = [
+                await client.save_and_compare_signature(signature, mode="local")
+                for _ in range(2)
+            ]
+            await client.flush()
+            return server_report, local_reports, client.responses
+
+        server_report, local_reports, responses = run_with_app(
+            test, cache_dir=None, standard_ttl=60
+        )
+        assert local_reports == [server_report, server_report]
+        # the standard is downloaded once and reused, both signatures are uploaded
+        paths = [path for path, _ in responses]
+        assert paths.count("/proto/get_project_standard/project") == 1
+        assert paths.count("/proto/save_signature/") == 2
@@ -1,7 +1,9 @@
+import json
 import pytest
 import pandas as pd
 import numpy as np
 from mlops_monitoring.compare import *
+from mlops_monitoring.signature import json_to_signature, signature_to_dict
 
 
 class TestCompare:
@@ -103,3 +105,11 @@ class TestCompare:
 
         assert get_categorical_cols(rand_sig) == set()
         assert get_categorical_cols(mixed_sig) == {"C"}
+
+    def test_get_cols_of_parsed_signature(self, df_signatures):
+        _, _, mixed_sig, _, _ = df_signatures
+        parsed = json_to_signature(json.dumps(signature_to_dict(mixed_sig)))
+
+        assert get_numeric_cols(parsed) == {"A", "B"}
+        assert get_categorical_cols(parsed) == {"C"}
+        assert not any(parsed.profile.columns.is_decoded(col) for col in "ABCD")
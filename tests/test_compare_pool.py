@@ -0,0 +1,86 @@
+import pytest
+import asyncio
+import json
+from mlops_monitoring.signature import (
+    signature_hash,
+    signature_to_dict,
+    profile_to_message,
+)
+from mlops_monitoring.compare import COMPARE_SECONDS, compare_signatures
+from mlops_monitoring.compare_pool import (
+    ComparePool,
+    StandardNotCached,
+    compare_serialized,
+)
+
+
+class TestComparePool:
+    def test_compare_serialized(self, df_signatures):
+        signature, standard = df_signatures[:2]
+        signature_bytes = profile_to_message(signature.profile).SerializeToString()
+        standard_bytes = profile_to_message(standard.profile).SerializeToString()
+
+        with pytest.raises(StandardNotCached):
+            compare_serialized(signature_bytes, "test", "not_cached")
+        report = compare_serialized(signature_bytes, "test", "standard", standard_bytes)
+        assert report == compare_signatures(signature, standard)
+        assert compare_serialized(signature_bytes, "test", "standard") == report
+
+    @pytest.mark.parametrize("max_workers", [0, 1])
+    def test_pool(self, df_signatures, max_workers):
+        signature, standard = df_signatures[:2]
+        profile_json = signature_to_dict(signature)["profile"]
+        standard_requests = []
+
+        def get_standard_bytes():
+            standard_requests.append(1)
+            return profile_to_message(standard.profile).SerializeToString()
+
+        async def parse_and_compare(pool):
+            signature_bytes, content_hash = await pool.parse_signature(
+                profile_json, "test"
+            )
+            reports = [
+                await pool.compare(
+                    signature_bytes,
+                    "test",
+                    signature_hash(standard),
+                    get_standard_bytes,
+                )
+                for _ in range(3)
+            ]
+            return content_hash, reports
+
+        def compares_count():
+            samples = {name: value for name, _, value in COMPARE_SECONDS.samples()}
+            return samples.get("mlops_compare_seconds_count", 0)
+
+        compares_before = compares_count()
+        pool = ComparePool(max_workers)
+        content_hash, reports = asyncio.run(parse_and_compare(pool))
+        pool.shutdown()
+        # compares in worker processes are observed in this process
+        assert compares_count() == compares_before + 3
+
+        assert content_hash == signature_hash(signature)
+        assert all(
+            report == compare_signatures(signature, standard) for report in reports
+        )
+        assert len(standard_requests) <= 1
+
+    def test_pool_in_many_event_loops(self, signature):
+        profile_json = signature_to_dict(signature)["profile"]
+        pool = ComparePool(0, max_concurrency=1)
+
+        async def parse_concurrently():
+            return await asyncio.gather(
+                *(pool.parse_signature(profile_json, "project") for _ in range(3))
+            )
+
+        # every asyncio.run() creates a new event loop
+        for _ in range(2):
+            results = asyncio.run(parse_concurrently())
+            assert {content_hash for _, content_hash in results} == {
+                signature_hash(signature)
+            }
+        pool.shutdown()
@@ -0,0 +1,29 @@
+import pytest
+from mlops_monitoring.compression import *
+
+
+class TestCompression:
+    @pytest.fixture
+    def proto_signature(self, signature):
+        return signature.profile.to_protobuf().SerializeToString()
+
+    @pytest.mark.parametrize("codec", available_codecs())
+    def test_compress_blob_roundtrip(self, proto_signature, codec):
+        blob = compress_blob(proto_signature, codec)
+        assert is_compressed(blob)
+        assert decompress_blob(blob) == proto_signature
+
+    def test_compress_blob_is_smaller(self, proto_signature):
+        assert len(compress_blob(proto_signature)) < len(proto_signature)
+
+    def test_decompress_legacy_blob(self, proto_signature):
+        assert not is_compressed(proto_signature)
+        assert decompress_blob(proto_signature) == proto_signature
+
+    def test_unknown_codec(self, proto_signature):
+        with pytest.raises(ValueError):
+            compress_blob(proto_signature, "brotli")
+
+        blob = MAGIC + bytes([FORMAT_VERSION, 42]) + proto_signature
+        with pytest.raises(ValueError):
+            decompress_blob(blob)
@@ -0,0 +1,38 @@
+import time
+from mlops_monitoring.credentials import KerberosTicketManager
+
+
+class TestKerberosTicketManager:
+    def test_renew(self):
+        commands = []
+        manager = KerberosTicketManager(
+            "kinit", runner=lambda c: commands.append(c) or 0
+        )
+        assert manager.renew()
+        assert commands == ["kinit"]
+        assert manager.last_renewal is not None
+
+    def test_failed_renewal(self):
+        manager = KerberosTicketManager("kinit", runner=lambda command: 1)
+        assert not manager.renew()
+        assert manager.failed_renewals == 1
+        assert manager.last_renewal is None
+
+    def test_background_renewal(self):
+        commands = []
+        manager = KerberosTicketManager(
+            "kinit", renew_interval=0.01, runner=lambda c: commands.append(c) or 0
+        )
+        manager.start()
+        time.sleep(0.1)
+        manager.stop()
+        renewals = len(commands)
+        assert renewals > 1
+        time.sleep(0.05)
+        assert len(commands) == renewals
+
+    def test_without_command(self):
+        manager = KerberosTicketManager(None, runner=lambda command: 1 / 0)
+        assert manager.renew()
+        manager.start()
+        manager.stop()
@@ -1,6 +1,16 @@
 import pytest
-from mlops_monitoring.data import SQLWriter, SQLReader
+from fastapi import HTTPException
+from mlops_monitoring.data import (
+    Reader,
+    SQLWriter,
+    SQLReader,
+    SQLiteWriter,
+    SQLiteReader,
+)
+from mlops_monitoring.signature import signature_hash
 import pandas as pd
+from sqlalchemy import inspect
+import datetime
 
 
 class TestSQLWriter:
@@ -37,3 +47,146 @@ class TestSQLReader:
     def test_sql_read_project_standard(self, sql_reader):
         result = sql_reader.read_project_standard("project")
         assert result.project_name == "project"
+
+
+class TestSQLiteStorage:
+    @pytest.fixture
+    def sqlite_db(self, tmp_path):
+        return str(tmp_path / "signatures.db")
+
+    def test_sqlite_write_and_read_signature(self, signature, sqlite_db):
+        SQLiteWriter(sqlite_db, "signatures").write_signature(signature)
+        sig = SQLiteReader(sqlite_db, "signatures").read_signature(1)
+        assert sig.project_name == "project"
+        assert set(sig.profile.columns.keys()) == set(signature.profile.columns.keys())
+
+    def test_sqlite_write_signatures(self, df_signatures, sqlite_db):
+        SQLiteWriter(sqlite_db, "signatures").write_signatures(df_signatures[:3])
+        sig = SQLiteReader(sqlite_db, "signatures").read_signature(3)
+        assert sig.project_name == "test"
+
+    def test_sqlite_write_duplicate_signature(self, signature, sqlite_db):
+        writer = SQLiteWriter(sqlite_db, "signatures")
+        signature_id = writer.write_signature(signature)
+        assert writer.write_signature(signature) == signature_id
+        assert (
+            writer.write_signature(signature._replace(project_name="other_project"))
+            != signature_id
+        )
+
+        writer.write_signatures([signature, signature])
+        history = list(
+            SQLiteReader(sqlite_db, "signatures").read_signatures_history("project")
+        )
+        assert [record.signature_id for record in history] == [signature_id]
+        assert history[0].content_hash == signature_hash(signature)
+
+    def test_sqlite_write_signatures_skips_duplicates(self, df_signatures, sqlite_db):
+        writer = SQLiteWriter(sqlite_db, "signatures")
+        writer.write_signature(df_signatures[0])
+        writer.write_signatures(df_signatures[:2] + df_signatures[1:2])
+        history = SQLiteReader(sqlite_db, "signatures").read_signatures_history("test")
+        assert [record.signature_id for record in history] == [1, 2]
+
+    def test_sqlite_update_standard(self, signature, sqlite_db):
+        writer = SQLiteWriter(sqlite_db, "signatures")
+        reader = SQLiteReader(sqlite_db, "signatures")
+        with pytest.raises(HTTPException):
+            reader.read_project_standard("project")
+
+        writer.write_signature(signature)
+        writer.update_standard(signature)
+        writer.update_standard(signature)
+        result = reader.read_project_standard("project")
+        assert result.project_name == "project"
+
+        record = reader.read_project_standard_record("project")
+        assert record.is_standard
+        assert record.content_hash == signature_hash(signature)
+
+    def test_sqlite_split_columns(self, signature, sqlite_db):
+        SQLiteWriter(sqlite_db, "signatures", split_columns=True).write_signature(
+            signature
+        )
+        reader = SQLiteReader(sqlite_db, "signatures")
+
+        sig = reader.read_signature(1)
+        assert set(sig.profile.columns.keys()) == set(signature.profile.columns.keys())
+        assert (
+            sig.profile.flat_summary()["summary"]
+            .sort_values("column")
+            .reset_index(drop=True)
+            .equals(
+                signature.profile.flat_summary()["summary"]
+                .sort_values("column")
+                .reset_index(drop=True)
+            )
+        )
+
+        partial = reader.read_signature(1, columns=["A", "C"])
+        assert set(partial.profile.columns.keys()) == {"A", "C"}
+
+    def test_sqlite_writer_creates_columns_table(self, signature, sqlite_db):
+        writer = SQLiteWriter(sqlite_db, "signatures")
+        columns_table = writer.SQLColumnProfile.__table__
+        columns_table.drop(bind=writer._get_engine())
+        # writers of whole signatures don't run DDL
+        writer.write_signature(signature)
+        assert not inspect(writer._get_engine()).has_table(columns_table.name)
+
+        SQLiteWriter(sqlite_db, "signatures", split_columns=True).write_signature(
+            signature
+        )
+        partial = SQLiteReader(sqlite_db, "signatures").read_signature(1, ["A"])
+        assert set(partial.profile.columns.keys()) == {"A"}
+
+    def test_sqlite_read_columns_of_whole_signature(self, signature, sqlite_db):
+        SQLiteWriter(sqlite_db, "signatures").write_signature(signature)
+        partial = SQLiteReader(sqlite_db, "signatures").read_signature(1, ["B"])
+        assert set(partial.profile.columns.keys()) == {"B"}
+
+    def test_sqlite_read_signatures_history(self, signature, df_signatures, sqlite_db):
+        writer = SQLiteWriter(sqlite_db, "signatures")
+        writer.write_signatures(
+            [sig._replace(project_name="project") for sig in df_signatures[:3]]
+        )
+        writer.write_signature(signature._replace(project_name="other_project"))
+        reader = SQLiteReader(sqlite_db, "signatures")
+
+        now = datetime.datetime.now()
+        history = list(
+            reader.read_signatures_history(
+                "project",
+                now - datetime.timedelta(hours=1),
+                now + datetime.timedelta(hours=1),
+                columns=["A"],
+                batch_size=2,
+            )
+        )
+        assert [record.signature_id for record in history] == [1, 2, 3]
+        assert all(record.signature.project_name == "project" for record in history)
+        assert set(history[0].signature.profile.columns.keys()) == {"A"}
+        assert history == sorted(history, key=lambda record: record.upload_date)
+
+        assert not list(
+            reader.read_signatures_history(
+                "project",
+                now - datetime.timedelta(days=2),
+                now - datetime.timedelta(days=1),
+            )
+        )
+
+
+class TestReader:
+    def test_reader_without_history(self, signature):
+        class StandardReader(Reader):
+            def read_signature(self, signature_id, columns=None):
+                return signature
+
+            def read_project_standard(self, project_name, columns=None):
+                return signature
+
+        reader = StandardReader()
+        assert reader.read_project_standard("project") is signature
+        with pytest.raises(NotImplementedError):
+            next(reader.read_signatures_history("project"))
@@ -0,0 +1,91 @@
+import pytest
+import io
+import numpy as np
+import pandas as pd
+from whylogs.proto import InferredType
+from mlops_monitoring.ingest import (
+    CSVChunker,
+    StreamingProfiler,
+    iter_parquet_batches,
+    profile_chunk,
+)
+
+
+class TestIngest:
+    @pytest.fixture
+    def csv_bytes(self):
+        np.random.seed(42)
+        return pd.util.testing.makeMixedDataFrame().to_csv(index=False).encode()
+
+    def test_csv_chunker(self, csv_bytes):
+        chunker = CSVChunker(chunk_size=20)
+        chunks = []
+        for start in range(0, len(csv_bytes), 7):
+            chunks.extend(chunker.feed(csv_bytes[start : start + 7]))
+        last_chunk = chunker.close()
+        if last_chunk is not None:
+            chunks.append(last_chunk)
+
+        assert len(chunks) > 1
+        data = pd.concat(chunks, ignore_index=True)
+        assert data.equals(pd.read_csv(io.BytesIO(csv_bytes)))
+        assert chunker.close() is None
+
+    def test_streaming_profiler(self, csv_bytes):
+        profiler = StreamingProfiler("project")
+        chunker = CSVChunker(chunk_size=20)
+        for chunk in chunker.feed(csv_bytes) + [chunker.close()]:
+            if chunk is not None:
+                profiler.track_dataframe(chunk)
+
+        signature = profiler.to_signature()
+        assert profiler.rows == 5
+        assert signature.project_name == "project"
+        assert set(signature.profile.columns.keys()) == {"A", "B", "C", "D"}
+        assert signature.profile.columns["A"].counters.count == 5
+
+    def test_csv_chunker_keeps_types(self):
+        csv_bytes = b"A,B\n1,True\n2,False\n,\n4,True\n"
+        chunker = CSVChunker(chunk_size=8)
+        chunks = chunker.feed(csv_bytes) + [chunker.close()]
+        assert len(chunks) > 2
+        assert {str(chunk.dtypes["A"]) for chunk in chunks} == {"Int64"}
+        assert {str(chunk.dtypes["B"]) for chunk in chunks} == {"boolean"}
+
+        # a missing value in a later chunk doesn't turn integers into fractions
+        profiler = StreamingProfiler("project")
+        for chunk in chunks:
+            if chunk is not None:
+                profiler.track_dataframe(chunk)
+        column = profiler.to_signature().profile.columns["A"].to_summary()
+        assert column.schema.inferred_type.type == InferredType.INTEGRAL
+        assert column.counters.null_count.value == 1
+
+    def test_csv_chunker_widens_types(self):
+        chunker = CSVChunker(chunk_size=4)
+        chunks = chunker.feed(b"A\n1\n2\n2.5\nx\n") + [chunker.close()]
+        assert [str(chunk.dtypes["A"]) for chunk in chunks] == [
+            "Int64",
+            "float64",
+            "object",
+        ]
+
+    def test_merge_profiled_chunks(self, csv_bytes):
+        data = pd.read_csv(io.BytesIO(csv_bytes))
+        tracked = StreamingProfiler("project")
+        tracked.track_dataframe(data)
+        merged = StreamingProfiler("project")
+        for chunk in (data[:2], data[2:]):
+            merged.merge_message(profile_chunk(chunk, "project"), len(chunk))
+
+        assert merged.rows == tracked.rows == 5
+        for colname, column in tracked.to_signature().profile.columns.items():
+            merged_column = merged.to_signature().profile.columns[colname]
+            assert merged_column.counters.count == column.counters.count
+
+    def test_parquet_batches(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        path = str(tmp_path / "data.parquet")
+        pd.DataFrame({"A": range(10)}).to_parquet(path)
+        batches = list(iter_parquet_batches(path, batch_size=4))
+        assert [len(batch) for batch in batches] == [4, 4, 2]
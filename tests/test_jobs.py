@@ -0,0 +1,164 @@
+import asyncio
+import datetime
+import pytest
+from fastapi import HTTPException
+from mlops_monitoring.compare import ComparingReport
+from mlops_monitoring.data import SQLiteReader, SQLiteWriter
+from mlops_monitoring.jobs import (
+    ABANDONED_ERROR,
+    CLOSED_ERROR,
+    DONE,
+    FAILED,
+    PENDING,
+    CompareJobQueue,
+    JobQueueFull,
+    compare_job_id,
+)
+
+
+def _report(project_name):
+    return ComparingReport(project_name, "All fine!", {}, None)
+
+
+class TestCompareJobQueue:
+    def test_job_id(self):
+        assert compare_job_id("a", "b") == compare_job_id("a", "b")
+        assert compare_job_id("a", "b") != compare_job_id("a", "c")
+
+    def test_retries_reuse_job(self):
+        calls = []
+
+        async def compare():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return _report("test")
+
+        async def run():
+            jobs = CompareJobQueue(workers=2)
+            jobs.start()
+            job = await jobs.submit("job", compare)
+            assert job.status == PENDING
+            assert await jobs.submit("job", compare) is job
+            finished = await jobs.wait("job", timeout=1)
+            assert await jobs.submit("job", compare) is job
+            await jobs.close()
+            return finished
+
+        job = asyncio.run(run())
+        assert job.status == DONE
+        assert job.report == _report("test")
+        assert len(calls) == 1
+
+    def test_failed_job_is_rerun(self):
+        async def fail():
+            raise HTTPException(status_code=400, detail="Standard not found")
+
+        async def run():
+            jobs = CompareJobQueue()
+            jobs.start()
+            await jobs.submit("job", fail)
+            failed = await jobs.wait("job", timeout=1)
+            assert (failed.status, failed.error) == (FAILED, "Standard not found")
+            await jobs.submit("job", lambda: asyncio.sleep(0, _report("test")))
+            job = await jobs.wait("job", timeout=1)
+            await jobs.close()
+            return job
+
+        assert asyncio.run(run()).status == DONE
+
+    def test_submit_before_start(self):
+        with pytest.raises(RuntimeError):
+            asyncio.run(
+                CompareJobQueue().submit(
+                    "job", lambda: asyncio.sleep(0, _report("test"))
+                )
+            )
+
+    def test_bounded_queue(self):
+        async def run():
+            jobs = CompareJobQueue(workers=1, max_pending=1)
+            jobs.start()
+            await jobs.submit("first", lambda: asyncio.sleep(1, _report("test")))
+            with pytest.raises(JobQueueFull):
+                await jobs.submit("second", lambda: asyncio.sleep(1, _report("test")))
+            assert (await jobs.wait("first", timeout=0.01)).status == PENDING
+            assert await jobs.wait("unknown", timeout=0.01) is None
+            await jobs.close()
+            assert jobs.get("first").status == FAILED
+
+        asyncio.run(run())
+
+
+class TestStoredCompareJobs:
+    @pytest.fixture
+    def store(self, tmp_path):
+        sqlite_db = str(tmp_path / "signatures.db")
+        return {
+            "writer": SQLiteWriter(sqlite_db, "signatures"),
+            "reader": SQLiteReader(sqlite_db, "signatures"),
+        }
+
+    def test_job_is_shared_by_queues(self, store):
+        calls = []
+
+        async def compare():
+            calls.append(1)
+            await asyncio.sleep(0.1)
+            return _report("test")
+
+        async def run():
+            first, second = CompareJobQueue(**store), CompareJobQueue(**store)
+            first.start()
+            second.start()
+            await first.submit("job", compare)
+            # the second queue only polls the database, the job isn't run twice
+            assert (await second.submit("job", compare)).status == PENDING
+            job = await second.wait("job", timeout=5)
+            assert (await second.submit("job", compare)).status == DONE
+            await first.close()
+            await second.close()
+            return job
+
+        job = asyncio.run(run())
+        assert job.status == DONE
+        assert job.report == _report("test")
+        assert len(calls) == 1
+
+    def test_restarted_queue_keeps_reports(self, store):
+        async def run():
+            jobs = CompareJobQueue(**store)
+            jobs.start()
+            await jobs.submit("done", lambda: asyncio.sleep(0, _report("test")))
+            await jobs.submit("closed", lambda: asyncio.sleep(1, _report("test")))
+            await jobs.wait("done", timeout=1)
+            await jobs.close()
+            return [
+                await CompareJobQueue(**store).load(job_id)
+                for job_id in ("done", "closed")
+            ]
+
+        done, closed = asyncio.run(run())
+        assert (done.status, done.report) == (DONE, _report("test"))
+        assert (closed.status, closed.error) == (FAILED, CLOSED_ERROR)
+
+    def test_abandoned_job_is_rerun(self, store):
+        store["writer"].write_compare_job("job", PENDING)
+
+        async def run():
+            jobs = CompareJobQueue(stale_after=0, **store)
+            jobs.start()
+            abandoned = await jobs.load("job")
+            await jobs.submit("job", lambda: asyncio.sleep(0, _report("test")))
+            job = await jobs.wait("job", timeout=1)
+            await jobs.close()
+            return abandoned, job
+
+        abandoned, job = asyncio.run(run())
+        assert (abandoned.status, abandoned.error) == (FAILED, ABANDONED_ERROR)
+        assert job.status == DONE
+
+    def test_old_jobs_are_deleted(self, store):
+        store["writer"].write_compare_job("job", DONE, "null")
+        tomorrow = datetime.datetime.now() + datetime.timedelta(days=1)
+        assert store["writer"].delete_compare_jobs(tomorrow) == 1
+        assert store["reader"].read_compare_job("job") is None
@@ -230,3 +230,17 @@ class TestMetrcis:
         assert nrd_signature_less_nulls.passed
         assert nrd_same.passed
         assert nrd_same.value == 0
+
+    def test_get_column_flat_summary(self, df_signatures):
+        rand_sig, rand_sig2, mixed_sig, missing_sig, difnamed_sig = df_signatures
+        column_summary = get_column_flat_summary(rand_sig, "A")["summary"]
+        full_summary = rand_sig.profile.flat_summary()["summary"]
+
+        assert column_summary["column"].to_list() == ["A"]
+        assert column_summary.iloc[0].equals(
+            full_summary.query("column == 'A'").iloc[0]
+        )
+        assert (
+            get_column_flat_summary(mixed_sig, "C")["frequent_strings"]["C"]
+            == mixed_sig.profile.flat_summary()["frequent_strings"]["C"]
+        )
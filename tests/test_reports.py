@@ -0,0 +1,83 @@
+import datetime
+import os
+import subprocess
+import sys
+import pytest
+from mlops_monitoring.compare import ComparingReport
+from mlops_monitoring.reports import ParquetReportSink, most_failed_columns, report_rows
+
+FAILED_REPORT = ComparingReport(
+    "project",
+    "Some columns are not OK!",
+    {
+        "A": "Histogram Intersection (0.35), Null Rate Discrepancy (0.0)",
+        "B": "Category Histogram Intersection (0.9)",
+    },
+    {"A": "Histogram Intersection (0.35)"},
+)
+FINE_REPORT = ComparingReport(
+    "project",
+    "All fine!",
+    {"A": "Histogram Intersection (0.8)", "B": "Category Histogram Intersection (0.9)"},
+    None,
+)
+
+
+class TestReports:
+    def test_report_rows(self):
+        rows = report_rows(FAILED_REPORT)
+        assert [(row.column, row.metric, row.value, row.passed) for row in rows] == [
+            ("A", "Histogram Intersection", 0.35, False),
+            ("A", "Null Rate Discrepancy", 0.0, True),
+            ("B", "Category Histogram Intersection", 0.9, True),
+        ]
+        assert len({row.report_id for row in rows}) == 1
+
+        error = ComparingReport("project", "Error: columns differ", None, None)
+        assert report_rows(error)[0][4:] == (None, None, None, False)
+
+    def test_most_failed_columns(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        today = datetime.date(2021, 6, 30)
+        now = datetime.datetime.combine(today, datetime.time(12))
+        with ParquetReportSink(str(tmp_path), batch_size=2) as sink:
+            sink.add(FAILED_REPORT, now)
+            sink.add(FAILED_REPORT, now - datetime.timedelta(days=1))
+            sink.add(FINE_REPORT, now)
+            sink.add(FAILED_REPORT._replace(project_name="other/project"), now)
+            # out of the queried period
+            sink.add(FAILED_REPORT, now - datetime.timedelta(days=10))
+
+        failed = most_failed_columns(str(tmp_path), days=7, today=today)
+        assert failed.values.tolist() == [
+            ["project", "A", 2, 3, 2 / 3],
+            ["other/project", "A", 1, 1, 1.0],
+        ]
+        failed = most_failed_columns(
+            str(tmp_path), days=30, project_names=["project"], today=today
+        )
+        assert failed.values.tolist() == [["project", "A", 3, 4, 0.75]]
+        assert most_failed_columns(str(tmp_path), project_names=["unknown"]).empty
+
+    def test_sink_is_flushed_on_exit(self, tmp_path):
+        pytest.importorskip("pyarrow")
+        script = (
+            "from mlops_monitoring.client import save_errors_report\n"
+            "from mlops_monitoring.compare import ComparingReport\n"
+            "from mlops_monitoring.reports import ParquetReportSink\n"
+            f"sink = ParquetReportSink({str(tmp_path)!r})\n"
+            "save_errors_report(ComparingReport('project', 'All fine!', {}, None), sink)\n"
+        )
+        subprocess.run([sys.executable, "-c", script], check=True)
+        assert os.listdir(tmp_path) == ["project=project"]
+
+    def test_failed_write_leaves_no_file(self, tmp_path, monkeypatch):
+        pytest.importorskip("pyarrow")
+
+        def fail(*args):
+            raise OSError("No space left on device")
+
+        monkeypatch.setattr(os, "replace", fail)
+        with pytest.raises(OSError):
+            ParquetReportSink._write(str(tmp_path), report_rows(FINE_REPORT))
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,92 @@
+import pytest
+import datetime
+import sqlite3
+from mlops_monitoring.data import SQLiteWriter, SQLiteReader, get_period
+from mlops_monitoring.retention import compact_signatures, compact_project
+
+
+class TestRetention:
+    @pytest.fixture
+    def sqlite_db(self, tmp_path):
+        return str(tmp_path / "signatures.db")
+
+    @pytest.fixture
+    def now(self):
+        return datetime.datetime(2021, 6, 15, 12)
+
+    @pytest.fixture
+    def old_signatures(self, signature, sqlite_db, now):
+        # two signatures per day during 60 days before now,
+        # copied in SQL as the writer stores identical signatures once
+        SQLiteWriter(sqlite_db, "signatures").write_signature(signature)
+        with sqlite3.connect(sqlite_db) as con:
+            for _ in range(119):
+                con.execute(
+                    "INSERT INTO signatures (project_name, is_standard, signature_binary, granularity) "
+                    "SELECT project_name, is_standard, signature_binary, granularity "
+                    "FROM signatures WHERE signature_id = 1"
+                )
+            for signature_id in range(1, 121):
+                upload_date = now - datetime.timedelta(
+                    days=60 - (signature_id - 1) // 2, hours=signature_id % 2
+                )
+                con.execute(
+                    "UPDATE signatures SET upload_date = ? WHERE signature_id = ?",
+                    (upload_date.isoformat(" "), signature_id),
+                )
+        return sqlite_db
+
+    def test_get_period(self):
+        date = datetime.datetime(2021, 6, 16, 13, 30)
+        assert get_period(date, "day") == (
+            datetime.datetime(2021, 6, 16),
+            datetime.datetime(2021, 6, 17),
+        )
+        assert get_period(date, "week") == (
+            datetime.datetime(2021, 6, 14),
+            datetime.datetime(2021, 6, 21),
+        )
+        assert get_period(date, "month") == (
+            datetime.datetime(2021, 6, 1),
+            datetime.datetime(2021, 7, 1),
+        )
+
+    def test_compact_signatures(self, old_signatures, now):
+        reader = SQLiteReader(old_signatures, "signatures")
+        writer = SQLiteWriter(old_signatures, "signatures")
+        older_than = now - datetime.timedelta(days=10)
+
+        written = compact_signatures(reader, writer, "project", "day", older_than)
+        assert written == 50
+        assert compact_signatures(reader, writer, "project", "day", older_than) == 0
+
+        days = list(reader.read_signatures_history("project", granularity="day"))
+        assert len(days) == 50
+        assert all(record.granularity == "day" for record in days)
+        assert len(list(reader.read_signatures_history("project"))) == 50 + 20
+
+    def test_compact_project(self, old_signatures, now):
+        reader = SQLiteReader(old_signatures, "signatures")
+        writer = SQLiteWriter(old_signatures, "signatures")
+        retention = {
+            "day": datetime.timedelta(days=7),
+            "week": datetime.timedelta(days=14),
+            "month": datetime.timedelta(days=30),
+        }
+        compact_project(reader, writer, "project", now, retention, delete_sources=True)
+
+        history = list(reader.read_signatures_history("project"))
+        granularities = {record.granularity for record in history}
+        assert granularities == {"raw", "day", "week", "month"}
+        assert history[0].granularity == "month"
+        assert history[-1].granularity == "raw"
+
+        # selected roll-ups don't overlap each other
+        periods = sorted(
+            get_period(record.upload_date, record.granularity)
+            for record in history
+            if record.granularity != "raw"
+        )
+        assert all(
+            previous[1] <= current[0] for previous, current in zip(periods, periods[1:])
+        )
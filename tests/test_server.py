@@ -1,6 +1,23 @@
 import pytest
-from mlops_monitoring.signature import signature_to_dict, json_to_signature
+from mlops_monitoring.signature import (
+    signature_to_dict,
+    json_to_signature,
+    profile_to_message,
+)
+from mlops_monitoring.archive import encode_record
+from mlops_monitoring import server
+from mlops_monitoring.server import _get_reader
+from mlops_monitoring.transport import (
+    BATCH_MEDIA_TYPE,
+    PROJECT_NAME_HEADER,
+    PROTOBUF_MEDIA_TYPE,
+    encode_body,
+)
+from whylogs.proto import DatasetProfileMessage
 import json
+import datetime
+import gzip
+import pandas as pd
 import whylogs as wl
 
 
@@ -9,6 +26,7 @@ class TestServerAPI:
         json_to_save = json.dumps(signature_to_dict(signature))
         response = test_app.post("/save_and_compare_signature/", data=json_to_save)
         assert response.status_code == 200
+        assert "parse;dur=" in response.headers["Server-Timing"]
 
     def test_get_project_standard(self, test_app):
         project_name = "project"
@@ -17,3 +35,182 @@ class TestServerAPI:
         assert response.status_code == 200
         assert sig.project_name == project_name
         assert isinstance(sig.profile, wl.DatasetProfile)
+
+    def test_save_and_compare_signature_protobuf(self, test_app, signature):
+        body = encode_body(
+            profile_to_message(signature.profile).SerializeToString(), "gzip"
+        )
+        response = test_app.post(
+            "/proto/save_and_compare_signature/",
+            params={"project_name": signature.project_name},
+            data=body,
+            headers={"Content-Type": PROTOBUF_MEDIA_TYPE, "Content-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.json()[0] == signature.project_name
+
+    def test_save_signature(self, test_app, signature):
+        body = profile_to_message(signature.profile).SerializeToString()
+        response = test_app.post(
+            "/proto/save_signature/",
+            params={"project_name": signature.project_name},
+            data=body,
+            headers={"Content-Type": PROTOBUF_MEDIA_TYPE},
+        )
+        assert response.status_code == 200
+        assert response.json() is None
+
+    def test_protobuf_bad_body(self, test_app):
+        response = test_app.post(
+            "/proto/save_and_compare_signature/",
+            params={"project_name": "project"},
+            data=b"not a profile",
+            headers={"Content-Type": PROTOBUF_MEDIA_TYPE, "Content-Encoding": "br"},
+        )
+        assert response.status_code == 415
+
+        response = test_app.post(
+            "/proto/save_and_compare_signature/",
+            params={"project_name": "project"},
+            data=b"not a profile",
+            headers={"Content-Type": PROTOBUF_MEDIA_TYPE},
+        )
+        assert response.status_code == 400
+        assert response.json()["detail"] == "Body is not a serialized dataset profile"
+
+    def test_get_project_standard_protobuf(self, test_app):
+        response = test_app.get(
+            "/proto/get_project_standard/project",
+            headers={"Accept-Encoding": "identity"},
+        )
+        assert response.status_code == 200
+        assert response.headers[PROJECT_NAME_HEADER] == "project"
+        profile = DatasetProfileMessage.FromString(response.content)
+        assert len(profile.columns) > 0
+
+    @pytest.mark.parametrize(
+        "uri", ["/get_project_standard/project", "/proto/get_project_standard/project"]
+    )
+    def test_get_project_standard_not_modified(self, test_app, uri):
+        response = test_app.get(uri)
+        assert response.status_code == 200
+        etag = response.headers["ETag"]
+
+        response = test_app.get(uri, headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.headers["ETag"] == etag
+        assert not response.content
+
+        response = test_app.get(uri, headers={"If-None-Match": 'W/"outdated"'})
+        assert response.status_code == 200
+
+    def test_save_and_compare_signatures(self, test_app, signature):
+        upload_date = datetime.datetime.now()
+        message = profile_to_message(signature.profile)
+        profile_bytes = message.SerializeToString()
+        # decodes as a profile, but its histogram sketch fails in compare
+        message.columns["A"].numbers.histogram = b"garbage"
+        body = b"".join(
+            encode_record(project_name, upload_date, profile_bytes)
+            for project_name in ("project", "project_without_standard", "project")
+        ) + encode_record("project", upload_date, message.SerializeToString())
+        response = test_app.post(
+            "/proto/save_and_compare_signatures/",
+            data=body,
+            headers={"Content-Type": BATCH_MEDIA_TYPE},
+        )
+        assert response.status_code == 200
+        results = [json.loads(line) for line in response.text.splitlines()]
+        assert sorted(result["index"] for result in results) == [0, 1, 2, 3]
+        reports = {result["index"]: result["report"] for result in results}
+        assert reports[1][1].startswith("Error")
+        assert reports[3][1].startswith("Error: compare failed")
+        assert reports[0] == reports[2]
+        assert not list(
+            _get_reader().read_signatures_history("project_without_standard")
+        )
+
+        response = test_app.post("/proto/save_and_compare_signatures/", data=body[:-1])
+        assert response.status_code == 400
+
+    def test_profile_and_compare(self, test_app):
+        data = pd.util.testing.makeDataFrame().to_csv(index=False).encode()
+        response = test_app.post(
+            "/profile_and_compare/project",
+            data=gzip.compress(data),
+            headers={"Content-Type": "text/csv", "Content-Encoding": "gzip"},
+        )
+        assert response.status_code == 200
+        assert response.json()[0] == "project"
+
+        response = test_app.post(
+            "/profile_and_compare/project",
+            data=data,
+            headers={"Content-Type": "text/plain"},
+        )
+        assert response.status_code == 415
+
+    def test_profile_and_compare_parquet(self, test_app, tmp_path):
+        pytest.importorskip("pyarrow")
+        path = tmp_path / "data.parquet"
+        pd.util.testing.makeDataFrame().to_parquet(str(path))
+        response = test_app.post(
+            "/profile_and_compare/project",
+            params={"data_format": "parquet"},
+            data=path.read_bytes(),
+        )
+        assert response.status_code == 200
+        assert response.json()[0] == "project"
+
+    def test_metrics(self, test_app, signature):
+        json_to_save = json.dumps(signature_to_dict(signature))
+        test_app.post("/save_and_compare_signature/", data=json_to_save)
+
+        response = test_app.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["Content-Type"].startswith("text/plain")
+        assert (
+            'mlops_http_request_seconds_count{endpoint="save_and_compare_signature",status="200"}'
+            in response.text
+        )
+        assert 'mlops_stage_seconds_count{stage="parse"}' in response.text
+        assert 'mlops_cache_hit_rate{cache="report"}' in response.text
+
+    def test_compare_job(self, test_app, signature):
+        json_to_save = json.dumps(signature_to_dict(signature))
+        response = test_app.post("/jobs/save_and_compare_signature/", data=json_to_save)
+        assert response.status_code in (200, 202)
+        job_id = response.json()["job_id"]
+        assert response.headers["Location"] == f"/jobs/{job_id}"
+
+        response = test_app.get(f"/jobs/{job_id}", params={"wait": 10})
+        assert response.status_code == 200
+        assert response.json()["status"] == "done"
+        assert response.json()["report"][0] == signature.project_name
+
+        # identical upload gets the finished job
+        response = test_app.post("/jobs/save_and_compare_signature/", data=json_to_save)
+        assert response.status_code == 200
+        assert response.json()["job_id"] == job_id
+
+        assert test_app.get("/jobs/unknown").status_code == 404
+
+    def test_write_behind_requires_spill_path(self, monkeypatch):
+        monkeypatch.setattr(server, "WRITE_BEHIND", True)
+        monkeypatch.setattr(server, "WRITE_BEHIND_SPILL_PATH", None)
+        with pytest.raises(RuntimeError):
+            server._start_write_queue()
+        assert server.write_queue is None
+
+    def test_upgrade_schema_on_startup(self, monkeypatch):
+        upgraded = []
+
+        class UpgradedWriter:
+            def upgrade_schema(self):
+                upgraded.append(True)
+
+        monkeypatch.setattr(server, "_get_writer", UpgradedWriter)
+        server._upgrade_schema()
+        monkeypatch.setattr(server, "UPGRADE_SCHEMA", False)
+        server._upgrade_schema()
+        assert upgraded == [True]
@@ -55,3 +55,35 @@ class TestSignature:
         assert {"max", "min", "count", "stddev", "mean", "quantile_0.5000"}.issubset(
             set(result.columns.to_list())
         )
+
+    def test_lazy_columns(self, signature):
+        jsoned = json.dumps(signature_to_dict(signature))
+        lazy_signature = json_to_signature(jsoned)
+        columns = lazy_signature.profile.columns
+
+        assert isinstance(columns, LazyColumns)
+        assert set(columns.keys()) == set(signature.profile.columns.keys())
+        assert not any(columns.is_decoded(col) for col in columns)
+
+        column = columns["A"]
+        assert isinstance(column, wl.core.ColumnProfile)
+        assert columns.is_decoded("A")
+        assert not columns.is_decoded("B")
+        assert columns["A"] is column
+
+    def test_profile_to_message(self, signature):
+        message = profile_to_message(signature.profile)
+        lazy_profile = profile_from_message(message)
+        lazy_profile.columns["A"]
+
+        assert profile_to_message(lazy_profile) == message
+
+    def test_signature_hash(self, signature, df_signatures):
+        jsoned = json.dumps(signature_to_dict(signature))
+        assert signature_hash(json_to_signature(jsoned)) == signature_hash(signature)
+
+        message = profile_to_message(signature.profile)
+        message.properties.session_timestamp += 1000
+        assert message_hash(message, "project") == signature_hash(signature)
+        assert message_hash(message, "other_project") != signature_hash(signature)
+        assert signature_hash(df_signatures[0]) != signature_hash(df_signatures[1])
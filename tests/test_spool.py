@@ -0,0 +1,176 @@
+import os
+import pytest
+import requests
+from mlops_monitoring.archive import iter_records
+from mlops_monitoring.compare import STANDARD_NOT_FOUND_MESSAGE, ComparingReport
+from mlops_monitoring.spool import REJECTED_SUFFIX, SPOOL_SUFFIX, SignatureSpool
+
+
+class FakeClient:
+    def __init__(self, available=True, broken_after=None, without_standard=()):
+        self.available = available
+        # number of reports after which the response breaks
+        self.broken_after = broken_after
+        # projects whose signatures get an error report and aren't stored
+        self.without_standard = without_standard
+        self.batches = []
+        self.saved = []
+
+    def save_and_compare_records(self, records):
+        if not self.available:
+            raise requests.ConnectionError("Server is down")
+        projects = [record.project_name for record in iter_records(records)]
+        self.batches.append(projects)
+        for index, project_name in enumerate(projects):
+            if index == self.broken_after:
+                raise requests.exceptions.ChunkedEncodingError("Response is broken")
+            if project_name in self.without_standard:
+                message = STANDARD_NOT_FOUND_MESSAGE.format(project_name)
+                yield index, ComparingReport(project_name, message, None, None)
+            else:
+                yield index, ComparingReport(project_name, "All fine!", {}, None)
+
+    def save_record(self, record):
+        if not self.available:
+            raise requests.ConnectionError("Server is down")
+        self.saved.extend(record.project_name for record in iter_records(record))
+
+
+class TestSignatureSpool:
+    def test_sends_batches(self, tmp_path, signature):
+        client = FakeClient()
+        reports = []
+        spool = SignatureSpool(
+            client,
+            str(tmp_path),
+            batch_size=2,
+            flush_interval=60,
+            on_report=reports.append,
+        )
+        for _ in range(3):
+            assert spool.put(signature)
+        assert spool.flush(timeout=10)
+        spool.close()
+
+        assert client.batches == [["project", "project"], ["project"]]
+        assert len(reports) == 3
+        assert spool.sent_signatures == 3
+        assert os.listdir(tmp_path) == []
+
+    def test_resumes_unsent_signatures(self, tmp_path, signature):
+        client = FakeClient(available=False)
+        spool = SignatureSpool(
+            client, str(tmp_path), flush_interval=0.01, max_attempts=1
+        )
+        spool.put(signature)
+        assert not spool.flush(timeout=0.1)
+        spool.close()
+        assert [name.endswith(SPOOL_SUFFIX) for name in os.listdir(tmp_path)] == [True]
+
+        client.available = True
+        with SignatureSpool(client, str(tmp_path)) as spool:
+            assert spool.depth == 1
+            assert spool.flush(timeout=10)
+        assert client.batches == [["project"]]
+
+    def test_bounded_size(self, tmp_path, signature):
+        spool = SignatureSpool(
+            FakeClient(available=False), str(tmp_path), max_bytes=1, flush_on_exit=False
+        )
+        assert not spool.put(signature)
+        assert spool.dropped_signatures == 1
+        spool.close()
+        assert os.listdir(tmp_path) == []
+
+    def test_partially_delivered_batch(self, tmp_path, signature):
+        client = FakeClient(broken_after=1)
+        spool = SignatureSpool(
+            client, str(tmp_path), batch_size=3, flush_interval=60, backoff_factor=0.01
+        )
+        for _ in range(3):
+            spool.put(signature)
+        assert spool.flush(timeout=10)
+        spool.close()
+
+        # every response breaks after the first report, delivered signatures aren't resent
+        assert [len(projects) for projects in client.batches] == [3, 2, 1]
+        assert spool.sent_signatures == 3
+        assert os.listdir(tmp_path) == []
+
+    def test_rejects_after_max_attempts(self, tmp_path, signature):
+        client = FakeClient(broken_after=0)
+        spool = SignatureSpool(
+            client, str(tmp_path), backoff_factor=0.01, max_attempts=2
+        )
+        spool.put(signature)
+        assert spool.flush(timeout=10)
+        spool.close()
+
+        assert len(client.batches) == 2
+        assert spool.rejected_signatures == 1
+        assert [name.endswith(REJECTED_SUFFIX) for name in os.listdir(tmp_path)] == [
+            True
+        ]
+
+    def test_store_only(self, tmp_path, signature):
+        client = FakeClient()
+        reports = []
+        with SignatureSpool(
+            client, str(tmp_path), compare=False, on_report=reports.append
+        ) as spool:
+            spool.put(signature)
+            spool.put(signature)
+            assert spool.flush(timeout=10)
+
+        assert client.saved == ["project", "project"]
+        assert client.batches == reports == []
+
+    def test_failed_write_leaves_no_file(self, tmp_path, signature, monkeypatch):
+        def fail(*args):
+            raise OSError("No space left on device")
+
+        spool = SignatureSpool(FakeClient(), str(tmp_path), flush_on_exit=False)
+        monkeypatch.setattr(os, "replace", fail)
+        with pytest.raises(OSError):
+            spool.put(signature)
+        monkeypatch.undo()
+        spool.close()
+        assert os.listdir(tmp_path) == []
+        assert spool.spooled_bytes == 0
+
+    def test_rejected_signatures_are_pruned(self, tmp_path, signature):
+        client = FakeClient(broken_after=0)
+        spool = SignatureSpool(
+            client, str(tmp_path), backoff_factor=0.01, max_attempts=1
+        )
+        for _ in range(2):
+            spool.put(signature)
+            assert spool.flush(timeout=10)
+        size = spool.rejected_bytes // 2
+        oldest, newest = sorted(os.listdir(tmp_path))
+
+        # the next signature fits only if the oldest rejected signature is deleted
+        client.available = False
+        spool.max_bytes = 2 * size + size // 2
+        assert spool.put(signature)
+        spool.close()
+        assert oldest not in os.listdir(tmp_path)
+        assert newest in os.listdir(tmp_path)
+        assert spool.rejected_bytes == size
+
+        with SignatureSpool(client, str(tmp_path), flush_on_exit=False) as spool:
+            assert (spool.depth, spool.rejected_bytes) == (1, size)
+
+    def test_signatures_without_standard_are_stored(self, tmp_path, signature):
+        client = FakeClient(without_standard={"project"})
+        reports = []
+        with SignatureSpool(client, str(tmp_path), on_report=reports.append) as spool:
+            spool.put(signature)
+            assert spool.flush(timeout=10)
+
+        assert client.saved == ["project"]
+        assert [report.message for report in reports] == [
+            STANDARD_NOT_FOUND_MESSAGE.format("project")
+        ]
+        assert spool.sent_signatures == 1
+        assert os.listdir(tmp_path) == []
@@ -0,0 +1,78 @@
+import pytest
+from mlops_monitoring.telemetry import (
+    Counter,
+    Gauge,
+    Histogram,
+    Registry,
+    captured_observations,
+    timed,
+)
+
+
+class TestTelemetry:
+    def test_histogram_buckets_are_cumulative(self):
+        latency = Histogram("latency_seconds", "Latency.", ["endpoint"], [0.1, 1.0])
+        for value in (0.05, 0.5, 0.5, 5.0):
+            latency.observe(value, endpoint="compare")
+
+        samples = {
+            (name, labels.get("le")): value for name, labels, value in latency.samples()
+        }
+        assert samples[("latency_seconds_bucket", "0.1")] == 1
+        assert samples[("latency_seconds_bucket", "1.0")] == 3
+        assert samples[("latency_seconds_bucket", "+Inf")] == 4
+        assert samples[("latency_seconds_count", None)] == 4
+        assert samples[("latency_seconds_sum", None)] == pytest.approx(6.05)
+
+    def test_wrong_labels(self):
+        requests = Counter("requests_total", "Requests.", ["endpoint"])
+        with pytest.raises(ValueError):
+            requests.inc(status="200")
+
+    def test_timed_decorator(self):
+        duration = Histogram("duration_seconds", "Duration.", ["operation"])
+
+        @timed(duration, operation="read")
+        def read():
+            return 42
+
+        assert read() == 42
+        assert read() == 42
+        count = [
+            value
+            for name, _, value in duration.samples()
+            if name == "duration_seconds_count"
+        ]
+        assert count == [2]
+
+    def test_captured_observations(self):
+        registry = Registry()
+        latency = registry.register(
+            Histogram("latency_seconds", "Latency.", ["endpoint"], [1.0])
+        )
+        with captured_observations() as observations:
+            latency.observe(0.5, endpoint="compare")
+        assert observations == [("latency_seconds", {"endpoint": "compare"}, 0.5)]
+        assert list(latency.samples()) == []
+
+        registry.record(observations)
+        samples = {name: value for name, _, value in latency.samples()}
+        assert samples["latency_seconds_count"] == 1
+        assert samples["latency_seconds_sum"] == 0.5
+
+    def test_render(self):
+        registry = Registry()
+        requests = registry.register(
+            Counter("requests_total", "Requests.", ["endpoint"])
+        )
+        registry.register(
+            Gauge("cache_hit_rate", "Hit rate.", ["cache"], lambda: {("report",): 0.5})
+        )
+        requests.inc(endpoint='say "hi"')
+
+        text = registry.render()
+        assert "# TYPE requests_total counter" in text
+        assert 'requests_total{endpoint="say \\"hi\\""} 1.0' in text
+        assert 'cache_hit_rate{cache="report"} 0.5' in text
+        with pytest.raises(ValueError):
+            registry.register(Counter("requests_total", "Requests again."))
@@ -0,0 +1,46 @@
+import pytest
+from mlops_monitoring.transport import (
+    available_encodings,
+    body_encoder,
+    choose_encoding,
+    decode_body,
+    encode_body,
+    etag_matches,
+    standard_etag,
+)
+
+
+class TestTransport:
+    @pytest.mark.parametrize("encoding", available_encodings())
+    def test_encode_decode(self, encoding):
+        data = b"signature" * 100
+        assert decode_body(encode_body(data, encoding), encoding) == data
+
+    @pytest.mark.parametrize("encoding", available_encodings())
+    def test_streamed_encoding(self, encoding):
+        compress, flush = body_encoder(encoding)
+        body = b"".join(compress(b"signature" * 100) for _ in range(10)) + flush()
+        assert decode_body(body, encoding) == b"signature" * 1000
+
+    def test_unknown_encoding(self):
+        with pytest.raises(ValueError):
+            encode_body(b"signature", "br")
+        with pytest.raises(ValueError):
+            decode_body(b"not gzip", "gzip")
+        assert decode_body(b"signature", None) == b"signature"
+
+    def test_choose_encoding(self):
+        assert choose_encoding("gzip, deflate") == "gzip"
+        assert choose_encoding("deflate") == "identity"
+        assert choose_encoding(None) == "identity"
+        if "zstd" in available_encodings():
+            assert choose_encoding("gzip, zstd;q=0.9") == "zstd"
+
+    def test_etag_matches(self):
+        etag = standard_etag("abc")
+        assert etag_matches(etag, etag)
+        assert etag_matches('"abc"', etag)
+        assert etag_matches('W/"xyz", W/"abc"', etag)
+        assert etag_matches("*", etag)
+        assert not etag_matches('W/"xyz"', etag)
+        assert not etag_matches(None, etag)
@@ -0,0 +1,73 @@
+import pytest
+from mlops_monitoring.archive import SignatureArchive
+from mlops_monitoring.data import Writer
+from mlops_monitoring.write_queue import WriteBehindQueue
+
+
+class ListWriter(Writer):
+    def __init__(self):
+        self.batches = []
+
+    def write_signature(self, signature):
+        self.batches.append([signature])
+
+    def write_signatures(self, signatures):
+        self.batches.append(list(signatures))
+
+
+class FailingWriter(Writer):
+    def write_signature(self, signature):
+        raise ConnectionError("Database is down")
+
+    def write_signatures(self, signatures):
+        raise ConnectionError("Database is down")
+
+
+class TestWriteBehindQueue:
+    def test_write_signatures_in_batches(self, signature):
+        writer = ListWriter()
+        write_queue = WriteBehindQueue(writer, batch_size=2, flush_interval=0.1)
+        for _ in range(5):
+            write_queue.write_signature(signature)
+        write_queue.flush()
+
+        assert write_queue.depth == 0
+        assert sum(len(batch) for batch in writer.batches) == 5
+        assert max(len(batch) for batch in writer.batches) <= 2
+        write_queue.close()
+
+    def test_close_drains_queue(self, signature):
+        writer = ListWriter()
+        write_queue = WriteBehindQueue(writer, batch_size=100, flush_interval=10)
+        for _ in range(3):
+            write_queue.write_signature(signature)
+        write_queue.close()
+
+        assert write_queue.written_signatures == 3
+        with pytest.raises(RuntimeError):
+            write_queue.write_signature(signature)
+
+    def test_spill_failed_batch(self, signature, tmp_path):
+        spill_path = str(tmp_path / "spilled.mlsa")
+        write_queue = WriteBehindQueue(
+            FailingWriter(), flush_interval=0.1, max_retries=1, spill_path=spill_path
+        )
+        for _ in range(2):
+            write_queue.write_signature(signature)
+        write_queue.close()
+
+        assert write_queue.spilled_signatures == 2
+        assert write_queue.dropped_signatures == 0
+        with SignatureArchive(spill_path) as archive:
+            assert [
+                spilled.project_name for _, spilled in archive.iter_signatures()
+            ] == ["project", "project"]
+
+    def test_drop_failed_batch(self, signature):
+        write_queue = WriteBehindQueue(
+            FailingWriter(), flush_interval=0.1, max_retries=1
+        )
+        write_queue.write_signature(signature)
+        write_queue.close()
+
+        assert write_queue.dropped_signatures == 1
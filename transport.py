@@ -0,0 +1,154 @@
+import gzip
+import zlib
+from typing import Callable, Optional, Tuple
+from mlops_monitoring.compression import zstandard
+
+# Signatures are sent as serialized DatasetProfileMessage with this content type,
+# the project name is passed as a query parameter and returned in PROJECT_NAME_HEADER
+PROTOBUF_MEDIA_TYPE = "application/x-protobuf"
+PROJECT_NAME_HEADER = "X-Project-Name"
+# Batches of signatures are sent as consecutive records of archive.encode_record(),
+# reports are streamed back as one JSON object per line
+BATCH_MEDIA_TYPE = "application/x-signature-records"
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+CONTENT_ENCODINGS = ("identity", "gzip", "zstd")
+DEFAULT_CONTENT_ENCODING = "zstd" if zstandard is not None else "gzip"
+
+_DECODE_ERRORS = (OSError, EOFError, zlib.error) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+def available_encodings() -> Tuple[str, ...]:
+    """Return content encodings that can be used in the current environment."""
+    return tuple(
+        encoding
+        for encoding in CONTENT_ENCODINGS
+        if encoding != "zstd" or zstandard is not None
+    )
+
+
+def encode_body(data: bytes, encoding: Optional[str]) -> bytes:
+    """Compress request or response body.
+
+    Args:
+        data: Body to compress.
+        encoding: One of "identity", "gzip" or "zstd", None means "identity".
+
+    Raises:
+        ValueError: Encoding is unknown or its package is not installed.
+    """
+    encoding = _check_encoding(encoding)
+    if encoding == "gzip":
+        return gzip.compress(data, compresslevel=6)
+    if encoding == "zstd":
+        return zstandard.ZstdCompressor(level=3).compress(data)
+    return data
+
+
+def decode_body(data: bytes, encoding: Optional[str]) -> bytes:
+    """Decompress body encoded by encode_body().
+
+    Raises:
+        ValueError: Encoding is unknown, its package is not installed or the body is corrupted.
+    """
+    encoding = _check_encoding(encoding)
+    try:
+        if encoding == "gzip":
+            return gzip.decompress(data)
+        if encoding == "zstd":
+            # frames written by streaming compressors don't have the content size
+            return zstandard.ZstdDecompressor().decompressobj().decompress(data)
+    except _DECODE_ERRORS as e:
+        raise ValueError(f"Can't decode {encoding} body: {e}") from e
+    return data
+
+
+def body_encoder(
+    encoding: Optional[str],
+) -> Tuple[Callable[[bytes], bytes], Callable[[], bytes]]:
+    """Return functions compressing consecutive pieces of a streamed body and finishing it.
+
+    The concatenated output can be decoded by decode_body() and body_decoder().
+
+    Raises:
+        ValueError: Encoding is unknown or its package is not installed.
+    """
+    encoding = _check_encoding(encoding)
+    if encoding == "gzip":
+        compressor = zlib.compressobj(6, wbits=16 + zlib.MAX_WBITS)
+        return compressor.compress, compressor.flush
+    if encoding == "zstd":
+        compressor = zstandard.ZstdCompressor(level=3).compressobj()
+        return compressor.compress, compressor.flush
+    return bytes, bytes
+
+
+def body_decoder(encoding: Optional[str]) -> Callable[[bytes], bytes]:
+    """Return function decompressing consecutive pieces of a streamed body.
+
+    Raises:
+        ValueError: Encoding is unknown or its package is not installed. The returned function
+            raises it if the body is corrupted.
+    """
+    encoding = _check_encoding(encoding)
+    if encoding == "gzip":
+        decompress = zlib.decompressobj(wbits=16 + zlib.MAX_WBITS).decompress
+    elif encoding == "zstd":
+        decompress = zstandard.ZstdDecompressor().decompressobj().decompress
+    else:
+        return bytes
+
+    def decode(data: bytes) -> bytes:
+        try:
+            return decompress(data)
+        except _DECODE_ERRORS as e:
+            raise ValueError(f"Can't decode {encoding} body: {e}") from e
+
+    return decode
+
+
+def choose_encoding(accept_encoding: Optional[str]) -> str:
+    """Choose the best supported encoding listed in the Accept-Encoding header."""
+    accepted = {
+        value.split(";")[0].strip().lower()
+        for value in (accept_encoding or "").split(",")
+    }
+    for encoding in ("zstd", "gzip"):
+        if encoding in accepted and encoding in available_encodings():
+            return encoding
+    return "identity"
+
+
+def standard_etag(content_hash: str) -> str:
+    """Return ETag of a standard given its content hash, see signature.message_hash().
+
+    The tag is weak, because the same standard is sent in different formats and encodings.
+    """
+    return f'W/"{content_hash}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check the If-None-Match header against an ETag using the weak comparison."""
+    if not if_none_match:
+        return False
+    for value in if_none_match.split(","):
+        value = value.strip()
+        if value == "*" or _opaque_tag(value) == _opaque_tag(etag):
+            return True
+    return False
+
+
+def _opaque_tag(etag: str) -> str:
+    # weak comparison ignores the W/ prefix of weak validators
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def _check_encoding(encoding: Optional[str]) -> str:
+    encoding = (encoding or "identity").lower()
+    if encoding not in available_encodings():
+        raise ValueError(
+            f"Unsupported content encoding {encoding}, expected one of {available_encodings()}"
+        )
+    return encoding
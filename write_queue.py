@@ -0,0 +1,147 @@
+import logging
+import queue
+import threading
+import time
+from typing import List, Optional
+from mlops_monitoring.archive import SignatureArchiveWriter
+from mlops_monitoring.signature import Signature
+from mlops_monitoring.data import Writer
+
+logger = logging.getLogger(__name__)
+
+# put into the queue on close to wake up the writing thread
+_CLOSE = object()
+
+
+class WriteBehindQueue(Writer):
+    """Writer that returns immediately and writes signatures to the wrapped writer in the background.
+
+    Signatures are collected into batches that are flushed when the batch is full or when
+    flush_interval seconds have passed since the first signature in the batch. Every batch is
+    written by Writer.write_signatures(), so SQL writers store it in a single transaction.
+
+    A batch that can't be written after max_retries attempts is appended to the spill archive,
+    which can be written to the database later by archive.import_signatures(). Without the spill
+    archive, or if appending fails, the batch is dropped and counted in dropped_signatures.
+    """
+
+    def __init__(
+        self,
+        writer: Writer,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_size: int = 10000,
+        max_retries: int = 3,
+        spill_path: Optional[str] = None,
+    ):
+        """
+        Args:
+            writer: A writer used to store batches of signatures.
+            batch_size: Maximal number of signatures written in one transaction.
+            flush_interval: Maximal time in seconds a signature waits in the queue before being written.
+            max_size: Maximal queue depth, write_signature() blocks when the queue is full.
+            max_retries: Number of attempts to write a batch before it's spilled or dropped.
+            spill_path: Path to a signature archive for batches that failed to be written.
+        """
+        self._writer = writer
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._max_retries = max_retries
+        self._spill_path = spill_path
+        self._queue: "queue.Queue[Signature]" = queue.Queue(maxsize=max_size)
+        self._closed = threading.Event()
+        self.written_signatures = 0
+        self.spilled_signatures = 0
+        self.dropped_signatures = 0
+        self._thread = threading.Thread(
+            target=self._run, name="signatures-write-behind", daemon=True
+        )
+        self._thread.start()
+
+    @property
+    def depth(self) -> int:
+        """Number of signatures waiting to be written."""
+        return self._queue.qsize()
+
+    def write_signature(self, signature: Signature) -> None:
+        if self._closed.is_set():
+            raise RuntimeError("Can't write signature, the write queue is closed")
+        self._queue.put(signature)
+
+    def flush(self) -> None:
+        """Block until all signatures accepted so far are written."""
+        self._queue.join()
+
+    def close(self, timeout: Optional[float] = None) -> None:
+        """Stop accepting signatures and wait until the queue is drained.
+
+        Args:
+            timeout: Maximal time to wait in seconds, wait until everything is written by default.
+        """
+        self._closed.set()
+        self._queue.put(_CLOSE)
+        self._thread.join(timeout)
+        if self.depth:
+            logger.error(f"Write queue closed with {self.depth} unwritten signatures")
+
+    def _run(self) -> None:
+        while not (self._closed.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if batch:
+                self._write_batch(batch)
+
+    def _next_batch(self) -> List[Signature]:
+        # Helper for collecting signatures until batch is full or flush interval is over
+        batch = []
+        deadline = time.monotonic() + self._flush_interval
+        while len(batch) < self._batch_size:
+            timeout = deadline - time.monotonic() if batch else self._flush_interval
+            if timeout <= 0:
+                break
+            try:
+                signature = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if signature is _CLOSE:
+                self._queue.task_done()
+                break
+            if not batch:
+                deadline = time.monotonic() + self._flush_interval
+            batch.append(signature)
+        return batch
+
+    def _write_batch(self, batch: List[Signature]) -> None:
+        try:
+            self._write_or_spill(batch)
+        finally:
+            for _ in batch:
+                self._queue.task_done()
+
+    def _write_or_spill(self, batch: List[Signature]) -> None:
+        for attempt in range(1, self._max_retries + 1):
+            try:
+                self._writer.write_signatures(batch)
+                self.written_signatures += len(batch)
+                return
+            except Exception:
+                logger.exception(
+                    f"Failed to write {len(batch)} signatures, attempt {attempt}"
+                )
+                if attempt < self._max_retries:
+                    time.sleep(min(2**attempt, 30))
+        self._spill(batch)
+
+    def _spill(self, batch: List[Signature]) -> None:
+        # Helper for keeping a batch that wasn't written in the spill archive
+        if self._spill_path is not None:
+            try:
+                with SignatureArchiveWriter(self._spill_path) as archive:
+                    for signature in batch:
+                        archive.append(signature)
+                self.spilled_signatures += len(batch)
+                logger.warning(f"Spilled {len(batch)} signatures to {self._spill_path}")
+                return
+            except Exception:
+                logger.exception(f"Failed to spill {len(batch)} signatures")
+        logger.error(f"Dropped {len(batch)} signatures")
+        self.dropped_signatures += len(batch)